@@ -45,14 +45,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
     'core',
+    'user',
+    'rent',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -126,6 +130,21 @@ DATABASES = {
     }
 }
 
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+if CACHE_BACKEND.endswith('.LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -178,8 +197,36 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'rent.pagination.IdCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('PAGE_SIZE', 50)),
 }
 
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+AUTOCOMPLETE_LIMIT = int(os.environ.get('AUTOCOMPLETE_LIMIT', 10))
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 80))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', 8000))
+
+AGREEMENT_NO_PREFIX = os.environ.get('AGREEMENT_NO_PREFIX', 'AG-')
+AGREEMENT_NO_YEARLY = bool(int(os.environ.get('AGREEMENT_NO_YEARLY', 1)))
+AGREEMENT_NO_PADDING = int(os.environ.get('AGREEMENT_NO_PADDING', 6))
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 16))
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+SERVER_TIMING = bool(int(os.environ.get('SERVER_TIMING', 1)))
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+SLOW_REQUEST_SQL = int(os.environ.get('SLOW_REQUEST_SQL', 5))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
@@ -23,6 +23,8 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -33,6 +35,7 @@ urlpatterns = [
     ),
     path('api/user/', include('user.urls')),
     path('api/rent/', include('rent.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,246 @@
+"""
+Storage and resized renditions of uploaded vehicle images.
+
+Images are stored under the SHA-256 of their content, so an image uploaded
+again is kept once and shared by every vehicle showing it. A file is
+deleted when the last vehicle stops referring to it.
+
+Uploads are stored as they arrive and resized after the request has
+committed. Pillow runs in a process pool so decoding large photos does
+not hold the GIL of the web worker, and a single writer thread records
+the finished renditions on the vehicles.
+"""
+import contextlib
+import hashlib
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from PIL import Image, ImageOps, features
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each rendition.
+RENDITIONS = {
+    'thumbnail': 160,
+    'card': 640,
+    'full': 1600,
+}
+
+if features.check('webp'):
+    FORMAT, EXTENSION = 'WEBP', '.webp'
+else:
+    FORMAT, EXTENSION = 'JPEG', '.jpg'
+
+_lock = threading.Lock()
+_pool = None
+_writer = None
+
+
+def file_digest(content):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    sha256 = hashlib.sha256()
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    content.seek(0)
+
+    return sha256.hexdigest()
+
+
+def lock_image(name):
+    """Serialize storing and deleting name until the transaction ends."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [name])
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage naming each file after the SHA-256 of its content.
+
+    Saving content that is already stored returns the existing name
+    without writing the file again. Uploads hashed while they streamed
+    in carry their digest in ``sha256`` and are not read again. Save
+    inside a transaction so a concurrent delete of the same content
+    waits for it.
+    """
+
+    def _save(self, name, content):
+        digest = getattr(content, 'sha256', None) or file_digest(content)
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], f'{digest}{ext}')
+
+        lock_image(name)
+        if self.exists(name):
+            return name
+
+        return super()._save(name, content)
+
+
+image_storage = ContentAddressedStorage()
+
+
+def rendition_names(name):
+    """Return the storage names of the renditions of the image name."""
+    stem = os.path.splitext(name)[0]
+    return {
+        rendition: f'{stem}/{rendition}{EXTENSION}' for rendition in RENDITIONS
+    }
+
+
+def rendition_paths(renditions):
+    """Return the files the renditions are stored in."""
+    return {
+        rendition: image_storage.path(name)
+        for rendition, name in renditions.items()
+    }
+
+
+def render_image(source, paths, quality):
+    """Write the renditions of the image at source.
+
+    paths maps each rendition to the file it is written to. Runs in a
+    worker process, so it only touches the filesystem.
+    """
+    with Image.open(source) as image:
+        # Let JPEG decode at a reduced scale when the photo is much
+        # larger than the biggest rendition.
+        largest = max(RENDITIONS.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        mode = 'RGBA' if FORMAT == 'WEBP' and 'A' in image.getbands() \
+            else 'RGB'
+        image = image.convert(mode)
+
+        for rendition, size in sorted(
+                RENDITIONS.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size), Image.LANCZOS)
+            path = paths[rendition]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, FORMAT, quality=quality)
+
+    return paths
+
+
+def _interpreter():
+    """Return the Python executable the pool's workers are spawned with."""
+    # Servers embedding Python, like uWSGI, set sys.executable to their
+    # own binary, which would be started as a worker instead.
+    if os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+
+    return os.path.join(sys.exec_prefix, 'bin', 'python')
+
+
+def _executors():
+    """Return the process pool and writer thread, starting them once."""
+    global _pool, _writer
+    with _lock:
+        if _pool is None:
+            # Spawned workers do not inherit the database connections.
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(_interpreter())
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=context,
+            )
+            _writer = ThreadPoolExecutor(max_workers=1)
+
+    return _pool, _writer
+
+
+def save_renditions(model, name, renditions):
+    """Record renditions on every object showing the image name."""
+    # Imported here as core.models imports this module.
+    from core.versions import bump_version
+
+    with transaction.atomic():
+        objects = model.objects.filter(image=name)
+        objects.update(image_renditions=renditions)
+        bump_version(objects.values_list('user_id', flat=True), model)
+
+
+def _write(model, name, renditions):
+    """Save renditions from the writer thread, which owns its connection."""
+    try:
+        save_renditions(model, name, renditions)
+    except Exception:
+        logger.exception('Could not save renditions of %s', name)
+    finally:
+        connection.close()
+
+
+def _rendered(model, name, renditions, future):
+    """Hand the result of a finished render to the writer thread."""
+    try:
+        future.result()
+    except Exception:
+        logger.exception('Could not render %s', name)
+        return
+
+    _executors()[1].submit(_write, model, name, renditions)
+
+
+def _render(model, name):
+    """Render the image name."""
+    renditions = rendition_names(name)
+    source = image_storage.path(name)
+    paths = rendition_paths(renditions)
+
+    if not settings.IMAGE_WORKERS:
+        render_image(source, paths, settings.IMAGE_QUALITY)
+        save_renditions(model, name, renditions)
+        return
+
+    future = _executors()[0].submit(
+        render_image, source, paths, settings.IMAGE_QUALITY)
+    future.add_done_callback(
+        partial(_rendered, model, name, renditions))
+
+
+def schedule_renditions(instance):
+    """Render the image of instance once the transaction commits.
+
+    The renditions of the previous image are cleared straight away so
+    they are never served for the new one, and the renditions of an
+    image already shown elsewhere are reused. With IMAGE_WORKERS set to 0
+    the renditions are made in the calling process instead.
+    """
+    model = type(instance)
+    name = instance.image.name
+    renditions = model.objects.filter(image=name).exclude(
+        pk=instance.pk,
+    ).exclude(
+        image_renditions={},
+    ).values_list('image_renditions', flat=True).first() or {}
+    model.objects.filter(pk=instance.pk).update(image_renditions=renditions)
+    instance.image_renditions = renditions
+    if not renditions:
+        transaction.on_commit(partial(_render, model, name))
+
+
+def _delete_unused(model, name):
+    """Delete the image name and its renditions if nothing shows it."""
+    with transaction.atomic():
+        lock_image(name)
+        if model.objects.filter(image=name).exists():
+            return
+
+        renditions = rendition_names(name)
+        for stored in [name, *renditions.values()]:
+            image_storage.delete(stored)
+        with contextlib.suppress(OSError):
+            os.rmdir(os.path.dirname(rendition_paths(renditions)['full']))
+
+
+def release_image(model, name):
+    """Delete the image name after commit once no object refers to it."""
+    transaction.on_commit(partial(_delete_unused, model, name))
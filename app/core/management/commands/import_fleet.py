@@ -0,0 +1,413 @@
+"""
+Django command to import vehicles, customers and agreements from CSV.
+"""
+import csv
+import time
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Vehicle, Customer, Agreement
+from core.summaries import summarize_new
+from core.versions import bump_version
+
+
+DECIMAL_RE = r'^\d{1,7}(\.\d{1,3})?$'
+EMAIL_RE = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+BOOLEAN_VALUES = ('true', 'false', '1', '0', 'yes', 'no')
+
+Column = namedtuple('Column', ['checks', 'value', 'required'])
+
+TRY_DATE_SQL = """
+    CREATE OR REPLACE FUNCTION pg_temp.import_try_date(value text)
+    RETURNS date AS $$
+    BEGIN
+        RETURN value::date;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def text(column, max_length, required=True):
+    """Return the checks and value expression of a text column."""
+    value = f"NULLIF(trim({column}), '')"
+    checks = [(f'length({value}) > {max_length}',
+               f'{column} is longer than {max_length} characters')]
+    if required:
+        checks.insert(0, (f'{value} IS NULL', f'{column} is required'))
+
+    return Column(checks, value, required)
+
+
+def email(column, max_length, required=True):
+    """Return the checks and value expression of an email column."""
+    spec = text(column, max_length, required)
+    spec.checks.append((f"{spec.value} !~ '{EMAIL_RE}'",
+                        f'{column} is not a valid email address'))
+
+    return spec
+
+
+def decimal(column):
+    """Return the checks and value expression of a rate column."""
+    value = f"NULLIF(trim({column}), '')"
+    checks = [
+        (f'{value} IS NULL', f'{column} is required'),
+        (f"{value} !~ '{DECIMAL_RE}'",
+         f'{column} is not a number with at most 7 digits and 3 decimals'),
+    ]
+
+    return Column(checks, f'{value}::numeric', True)
+
+
+def boolean(column):
+    """Return the checks and value expression of an optional flag."""
+    value = f"lower(NULLIF(trim({column}), ''))"
+    allowed = ', '.join(f"'{v}'" for v in BOOLEAN_VALUES)
+    checks = [(f'{value} NOT IN ({allowed})',
+               f'{column} must be one of {", ".join(BOOLEAN_VALUES)}')]
+
+    return Column(
+        checks, f"COALESCE({value} IN ('true', '1', 'yes'), false)", False)
+
+
+def date(column, required=True):
+    """Return the checks and value expression of a date column."""
+    value = f"NULLIF(trim({column}), '')"
+    checks = [(f'pg_temp.import_try_date({value}) IS NULL '
+               f'AND {value} IS NOT NULL',
+               f'{column} is not a valid YYYY-MM-DD date')]
+    if required:
+        checks.insert(0, (f'{value} IS NULL', f'{column} is required'))
+
+    return Column(checks, f'{value}::date', required)
+
+
+VEHICLE_COLUMNS = {
+    'vehicle_type': text('vehicle_type', 40),
+    'vehicle_name': text('vehicle_name', 255),
+    'registration_no': text('registration_no', 20),
+    'daily_min_rate': decimal('daily_min_rate'),
+    'daily_max_rate': decimal('daily_max_rate'),
+    'monthly_min_rate': decimal('monthly_min_rate'),
+    'monthly_max_rate': decimal('monthly_max_rate'),
+    'status': text('status', 40),
+}
+
+CUSTOMER_COLUMNS = {
+    'customer_type': text('customer_type', 40),
+    'customer_name': text('customer_name', 255),
+    'cr_id_no': text('cr_id_no', 40),
+    'customer_email': email('customer_email', 100),
+    'customer_mobile': text('customer_mobile', 100),
+    'customer_phone': text('customer_phone', 100, required=False),
+    'customer_address': text('customer_address', 10000, required=False),
+    'is_blocked': boolean('is_blocked'),
+}
+
+AGREEMENT_COLUMNS = {
+    'rent_type': text('rent_type', 50),
+    'agreement_no': text('agreement_no', 255),
+    'deposit_type': text('deposit_type', 40),
+    'external_customer_name': email(
+        'external_customer_name', 255, required=False),
+    'checkin_date': date('checkin_date'),
+    'checkout_date': date('checkout_date', required=False),
+}
+
+AGREEMENT_LOOKUPS = ['vehicle_registration_no', 'customer_cr_id_no']
+# Columns not read from the files that have no database default.
+VEHICLE_DEFAULTS = {'image_renditions': "'{}'::jsonb"}
+
+
+class Command(BaseCommand):
+    """Django command to bulk import a tenant's fleet from CSV files."""
+    help = (
+        'Import vehicles, customers and agreements for a user from CSV '
+        'files with a header row. Rows are loaded with COPY into a '
+        'staging table, validated and inserted with one statement per '
+        'file. Agreements reference vehicles by registration_no and '
+        'customers by cr_id_no through the vehicle_registration_no and '
+        'customer_cr_id_no columns.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Owner email.')
+        parser.add_argument('--vehicles', help='Vehicles CSV file.')
+        parser.add_argument('--customers', help='Customers CSV file.')
+        parser.add_argument('--agreements', help='Agreements CSV file.')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything.',
+        )
+        parser.add_argument(
+            '--max-reported',
+            type=int,
+            default=20,
+            help='Rejected rows to print per file.',
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write every rejected row to this CSV file.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        jobs = [
+            (name, path) for name, path in (
+                ('vehicles', options['vehicles']),
+                ('customers', options['customers']),
+                ('agreements', options['agreements']),
+            ) if path
+        ]
+        if not jobs:
+            raise CommandError('Nothing to import.')
+
+        rejects = []
+        started = time.monotonic()
+        inserted = 0
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(TRY_DATE_SQL)
+                for name, path in jobs:
+                    loaded, rejected = self._import(
+                        cursor, name, path, user, options)
+                    inserted += loaded
+                    rejects.extend((name, row, reason)
+                                   for row, reason in rejected)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        elapsed = time.monotonic() - started
+        if options['rejects']:
+            with open(options['rejects'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['file', 'row', 'reason'])
+                writer.writerows(rejects)
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        rows = inserted + len(rejects)
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {inserted} rows with {len(rejects)} rejected in '
+            f'{elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s).'
+        ))
+
+    def _import(self, cursor, name, path, user, options):
+        """Load one CSV file and return (inserted, rejected rows)."""
+        if name == 'vehicles':
+            model, columns, lookups = Vehicle, VEHICLE_COLUMNS, []
+            defaults = VEHICLE_DEFAULTS
+        elif name == 'customers':
+            model, columns, lookups = Customer, CUSTOMER_COLUMNS, []
+            defaults = {}
+        else:
+            model, columns, lookups = (
+                Agreement, AGREEMENT_COLUMNS, AGREEMENT_LOOKUPS)
+            defaults = {}
+
+        started = time.monotonic()
+        required = [
+            column for column, spec in columns.items() if spec.required
+        ] + lookups
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            header = next(csv.reader(f), [])
+            self._check_header(
+                name, header, list(columns) + lookups, required)
+            f.seek(0)
+
+            stage = f'import_{name}'
+            cursor.execute(f'DROP TABLE IF EXISTS pg_temp.{stage}')
+            cursor.execute(
+                f'CREATE TEMP TABLE {stage} ('
+                f'row_no bigint GENERATED ALWAYS AS IDENTITY, '
+                f'reason text, '
+                f'vehicle_id bigint, '
+                f'customer_id bigint, '
+                + ', '.join(f'{column} text'
+                            for column in list(columns) + lookups)
+                + ')'
+            )
+            cursor.copy_expert(
+                f'COPY {stage} ({", ".join(header)}) '
+                f'FROM STDIN WITH (FORMAT csv, HEADER true)',
+                f,
+            )
+
+        checks = [check for spec in columns.values()
+                  for check in spec.checks]
+        self._reject(cursor, stage, checks)
+        if model is Agreement:
+            self._resolve_agreements(cursor, stage, user)
+
+        targets = ['user_id'] + list(columns)
+        values = ['%s'] + [spec.value for spec in columns.values()]
+        if lookups:
+            targets += ['vehicle_id', 'customer_id']
+            values += ['vehicle_id', 'customer_id']
+        targets += list(defaults)
+        values += list(defaults.values())
+        cursor.execute(
+            f'INSERT INTO {model._meta.db_table} ({", ".join(targets)}) '
+            f'SELECT {", ".join(values)} FROM {stage} '
+            f'WHERE reason IS NULL ORDER BY row_no RETURNING id',
+            [user.id],
+        )
+        ids = [pk for pk, in cursor.fetchall()]
+        inserted = len(ids)
+        if inserted:
+            bump_version([user.id], model)
+            summarize_new(model, ids)
+
+        cursor.execute(
+            f'SELECT row_no, reason FROM {stage} '
+            f'WHERE reason IS NOT NULL ORDER BY row_no'
+        )
+        rejected = cursor.fetchall()
+        cursor.execute(f'DROP TABLE {stage}')
+
+        elapsed = time.monotonic() - started
+        rows = inserted + len(rejected)
+        self.stdout.write(
+            f'{name}: {inserted} inserted, {len(rejected)} rejected of '
+            f'{rows} rows in {elapsed:.2f}s '
+            f'({rows / max(elapsed, 1e-9):,.0f} rows/s)'
+        )
+        for row, reason in rejected[:options['max_reported']]:
+            self.stdout.write(f'  row {row}: {reason}')
+        if len(rejected) > options['max_reported']:
+            more = len(rejected) - options['max_reported']
+            self.stdout.write(f'  ... and {more} more')
+
+        return inserted, rejected
+
+    def _check_header(self, name, header, allowed, required):
+        """Raise CommandError unless header has valid, unique columns."""
+        unknown = [column for column in header if column not in allowed]
+        missing = [column for column in required if column not in header]
+        if unknown or missing or len(set(header)) != len(header):
+            raise CommandError(
+                f'{name}: header must have the columns '
+                f'{", ".join(required)} and may have '
+                f'{", ".join(c for c in allowed if c not in required)}; '
+                f'unknown: {", ".join(unknown) or "-"}, '
+                f'missing: {", ".join(missing) or "-"}.'
+            )
+
+    def _reject(self, cursor, stage, checks):
+        """Set the reason of every row failing one of checks."""
+        cases = ' '.join(f'WHEN {condition} THEN %s'
+                         for condition, _ in checks)
+        cursor.execute(
+            f'UPDATE {stage} SET reason = r.reason '
+            f'FROM (SELECT row_no, CASE {cases} END AS reason '
+            f'FROM {stage}) r '
+            f'WHERE {stage}.row_no = r.row_no AND r.reason IS NOT NULL',
+            [reason for _, reason in checks],
+        )
+
+    def _resolve_agreements(self, cursor, stage, user):
+        """Resolve vehicles and customers and reject overlapping rows.
+
+        Rows reusing an agreement number of the user are rejected last.
+        """
+        for column, model, key, target in (
+            ('vehicle_registration_no', Vehicle, 'registration_no',
+             'vehicle_id'),
+            ('customer_cr_id_no', Customer, 'cr_id_no', 'customer_id'),
+        ):
+            cursor.execute(
+                f'UPDATE {stage} s SET {target} = m.id '
+                f'FROM (SELECT {key}, min(id) AS id '
+                f'FROM {model._meta.db_table} WHERE user_id = %s '
+                f'GROUP BY {key} HAVING count(*) = 1) m '
+                f'WHERE s.reason IS NULL AND m.{key} = trim(s.{column})',
+                [user.id],
+            )
+            cursor.execute(
+                f'UPDATE {stage} SET reason = %s '
+                f'WHERE reason IS NULL AND {target} IS NULL',
+                [f'{column} does not match exactly one {key}'],
+            )
+
+        checkin = "pg_temp.import_try_date(trim({0}.checkin_date))"
+        checkout = "pg_temp.import_try_date(trim({0}.checkout_date))"
+        period = f"daterange({checkin}, {checkout}, '[)')"
+        cursor.execute(
+            f'UPDATE {stage} s SET reason = %s '
+            f'WHERE s.reason IS NULL '
+            f'AND {checkout.format("s")} < {checkin.format("s")}',
+            ['checkout_date is before checkin_date'],
+        )
+        cursor.execute(
+            f'UPDATE {stage} s SET reason = %s '
+            f'WHERE s.reason IS NULL AND EXISTS ('
+            f'SELECT 1 FROM {Agreement._meta.db_table} a '
+            f'WHERE a.vehicle_id = s.vehicle_id '
+            f"AND daterange(a.checkin_date, a.checkout_date, '[)') "
+            f'&& {period.format("s")})',
+            ['overlaps an existing agreement for the vehicle'],
+        )
+        # Earlier rows win and a rejected row blocks nothing, so whether a
+        # row is kept depends on the rows kept before it. One pass in row
+        # order looks each period up among the kept ones in a GiST index,
+        # instead of comparing all pairs of rows again on every pass. The
+        # index is on a table of its own: one built on the updated staged
+        # rows could not be used before the import commits.
+        periods = f'{stage}_periods'
+        cursor.execute(
+            f'CREATE TEMP TABLE {periods} (row_no bigint, vehicle_id bigint, '
+            f'period daterange, blocked_by bigint)'
+        )
+        cursor.execute(
+            f'CREATE INDEX ON {periods} USING gist (vehicle_id, period) '
+            f'WHERE blocked_by IS NULL'
+        )
+        cursor.execute(f"""
+            DO $$
+            DECLARE
+                r record;
+                kept bigint;
+            BEGIN
+                FOR r IN SELECT row_no, vehicle_id, {period.format(stage)}
+                         AS period FROM {stage}
+                         WHERE reason IS NULL ORDER BY row_no LOOP
+                    SELECT min(row_no) INTO kept FROM {periods}
+                    WHERE blocked_by IS NULL AND vehicle_id = r.vehicle_id
+                    AND period && r.period;
+                    INSERT INTO {periods}
+                    VALUES (r.row_no, r.vehicle_id, r.period, kept);
+                END LOOP;
+            END
+            $$
+        """)
+        cursor.execute(
+            f"UPDATE {stage} s SET reason = 'overlaps row ' || p.blocked_by "
+            f'FROM {periods} p '
+            f'WHERE s.row_no = p.row_no AND p.blocked_by IS NOT NULL'
+        )
+        cursor.execute(f'DROP TABLE {periods}')
+
+        cursor.execute(
+            f'UPDATE {stage} s SET reason = %s '
+            f'WHERE s.reason IS NULL AND EXISTS ('
+            f'SELECT 1 FROM {Agreement._meta.db_table} a '
+            f'WHERE a.user_id = %s AND a.agreement_no = trim(s.agreement_no))',
+            ['agreement_no already exists', user.id],
+        )
+        cursor.execute(
+            f"UPDATE {stage} s SET reason = 'duplicates row ' || d.first "
+            f'FROM (SELECT row_no, min(row_no) OVER ('
+            f'PARTITION BY trim(agreement_no)) AS first '
+            f'FROM {stage} WHERE reason IS NULL) d '
+            f'WHERE s.row_no = d.row_no AND d.first < d.row_no'
+        )
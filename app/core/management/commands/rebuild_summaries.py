@@ -0,0 +1,51 @@
+"""
+Django command to recompute the monthly rental summaries.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CustomerMonthlySummary, VehicleMonthlySummary
+from core.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    """Rebuild the vehicle and customer summaries from the agreements."""
+    help = 'Recompute the monthly rental summaries from the agreements.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            help='Owner email; may be repeated. Defaults to every user.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user_ids = None
+        if options['user']:
+            users = dict(get_user_model().objects.filter(
+                email__in=options['user'],
+            ).values_list('email', 'id'))
+            missing = sorted(set(options['user']).difference(users))
+            if missing:
+                raise CommandError(
+                    f'User {", ".join(missing)} does not exist.')
+            user_ids = list(users.values())
+
+        started = time.monotonic()
+        rebuild_summaries(user_ids)
+        elapsed = time.monotonic() - started
+
+        rows = [
+            VehicleMonthlySummary.objects.all(),
+            CustomerMonthlySummary.objects.all(),
+        ]
+        if user_ids is not None:
+            rows = [summary.filter(user_id__in=user_ids) for summary in rows]
+        vehicles, customers = (summary.count() for summary in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {vehicles} vehicle and {customers} customer monthly '
+            f'summaries in {elapsed:.2f}s.'
+        ))
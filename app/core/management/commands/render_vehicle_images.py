@@ -0,0 +1,68 @@
+"""
+Django command to make the missing renditions of vehicle images.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.images import (
+    image_storage,
+    render_image,
+    rendition_names,
+    rendition_paths,
+    save_renditions,
+)
+from core.models import Vehicle
+
+
+class Command(BaseCommand):
+    """Render vehicle images uploaded before renditions existed."""
+    help = 'Make the renditions of vehicle images that have none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Render every image again, not only those without '
+                 'renditions.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        vehicles = Vehicle.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            vehicles = vehicles.filter(image_renditions={})
+
+        rendered = failed = 0
+        workers = max(settings.IMAGE_WORKERS, 1)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            futures = {}
+            names = vehicles.values_list('image', flat=True).distinct()
+            for name in names.iterator():
+                renditions = rendition_names(name)
+                future = pool.submit(
+                    render_image,
+                    image_storage.path(name),
+                    rendition_paths(renditions),
+                    settings.IMAGE_QUALITY,
+                )
+                futures[future] = (name, renditions)
+
+            for future in as_completed(futures):
+                name, renditions = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{name}: {exc}')
+                    continue
+                save_renditions(Vehicle, name, renditions)
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} images, {failed} failed.'))
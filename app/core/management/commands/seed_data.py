@@ -0,0 +1,153 @@
+"""
+Django command to generate a large synthetic dataset.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Vehicle, Customer, Agreement
+from core.seeding import BATCH_SIZE, init_worker, seed_tenant
+from core.summaries import rebuild_summaries
+
+
+def seed_email(seed, tenant):
+    """Return the email of a seeded tenant."""
+    return f'seed-{seed}-{tenant}@example.com'
+
+
+class Command(BaseCommand):
+    """Generate vehicles, customers and agreements for new tenants."""
+    help = (
+        'Create --users tenants and generate their vehicles, customers and '
+        'agreements with realistic distributions: overlapping rentals, '
+        'open agreements, repeat and blocked customers. The data depends '
+        'only on --seed. Each tenant is loaded with COPY in one '
+        'transaction by one of --workers processes, then the monthly '
+        'summaries are rebuilt and the tables analyzed. --defer-indexes '
+        'builds the indexes, but not the constraints, after loading: '
+        'faster when the seeded rows are most of the tables, but queries '
+        'of other tenants are slow meanwhile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=4)
+        parser.add_argument(
+            '--vehicles',
+            type=int,
+            default=25000,
+            help='Vehicles per tenant.',
+        )
+        parser.add_argument(
+            '--customers',
+            type=int,
+            default=50000,
+            help='Customers per tenant.',
+        )
+        parser.add_argument(
+            '--agreements',
+            type=int,
+            default=250000,
+            help='Agreements per tenant.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Worker processes, 0 seeds in this process.',
+        )
+        parser.add_argument(
+            '--defer-indexes',
+            action='store_true',
+            help='Drop the indexes while loading and rebuild them after.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        counts = (
+            options['vehicles'], options['customers'], options['agreements'])
+        if min(counts) < 0:
+            raise CommandError('Counts must not be negative.')
+        if options['users'] < 1:
+            raise CommandError('At least one user is needed.')
+        if options['agreements'] and not all(counts[:2]):
+            raise CommandError('Agreements need vehicles and customers.')
+
+        emails = [
+            seed_email(options['seed'], tenant)
+            for tenant in range(options['users'])
+        ]
+        User = get_user_model()
+        existing = User.objects.filter(email__in=emails)
+        if existing.exists():
+            raise CommandError(
+                f'Seed {options["seed"]} was already used; pick another '
+                f'--seed.'
+            )
+
+        started = time.monotonic()
+        users = User.objects.bulk_create(
+            User(email=email, password=make_password(None))
+            for email in emails
+        )
+        jobs = [
+            (user.id, options['seed'], tenant, counts, options['batch_size'])
+            for tenant, user in enumerate(users)
+        ]
+        deferred = self._deferred() if options['defer_indexes'] else []
+        self._alter(deferred, drop=True)
+        try:
+            rows = self._seed(jobs, options['workers'])
+        finally:
+            self._alter(deferred, drop=False)
+        elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        rebuild_summaries([user.id for user in users])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE core_vehicle, core_customer, core_agreement')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {rows:,} rows for {len(users)} users in {elapsed:.2f}s '
+            f'({rows / elapsed:,.0f} rows/s), summarized in '
+            f'{time.monotonic() - started:.2f}s.'
+        ))
+
+    def _seed(self, jobs, workers):
+        """Seed the tenants of jobs and return the rows created."""
+        if not workers:
+            return sum(seed_tenant(*job) for job in jobs)
+
+        # Spawned workers do not inherit the database connections.
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(connection.settings_dict['NAME'],),
+        ) as pool:
+            return sum(pool.map(seed_tenant, *zip(*jobs)))
+
+    def _deferred(self):
+        """Return the plain indexes of the seeded models."""
+        return [
+            (model, index)
+            for model in (Vehicle, Customer, Agreement)
+            for index in model._meta.indexes
+        ]
+
+    def _alter(self, deferred, drop):
+        """Drop or build the deferred indexes."""
+        with connection.schema_editor() as editor:
+            for model, index in deferred:
+                if drop:
+                    editor.remove_index(model, index)
+                else:
+                    editor.add_index(model, index)
@@ -0,0 +1,115 @@
+"""
+Prometheus metrics of the API.
+
+When PROMETHEUS_MULTIPROC_DIR is set, as scripts/run.sh does for the
+server workers, each process writes its values to memory mapped files in
+that directory. metrics_view() then adds up every worker's files, so a
+scrape answered by any worker reports the whole server. Otherwise the
+values are kept in this process.
+
+Cache hit ratios are left to the queries, e.g.
+rate(cache_lookups_total{result="hit"}[5m])
+/ rate(cache_lookups_total[5m]).
+"""
+import atexit
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from django.http import HttpResponse
+
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'Requests answered, by route, method and status.',
+    ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time taken to answer requests, by route and method.',
+    ['route', 'method'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    ),
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requests being answered.',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Counter(
+    'db_queries_total',
+    'SQL queries made by requests, by route.',
+    ['route'],
+)
+DB_TIME = Counter(
+    'db_query_duration_seconds_total',
+    'Time requests spent in SQL, by route.',
+    ['route'],
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total',
+    'Cache lookups, by cache and result.',
+    ['cache', 'result'],
+)
+
+
+def route_name(request):
+    """Return the name of the route request matched.
+
+    Unmatched paths share one name to keep the number of series bounded.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.view_name:
+        return 'unmatched'
+
+    return match.view_name
+
+
+def observe_request(request, response, seconds, timings):
+    """Record an answered request with its SQL timings."""
+    route = route_name(request)
+    REQUESTS.labels(route, request.method, response.status_code).inc()
+    LATENCY.labels(route, request.method).observe(seconds)
+    if timings.queries:
+        DB_QUERIES.labels(route).inc(timings.queries)
+        DB_TIME.labels(route).inc(timings.db)
+
+
+def count_lookup(cache, hit):
+    """Record a lookup in cache."""
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def metrics_view(request):
+    """Return the metrics of every server process in the text format."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(
+        generate_latest(registry),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+def _mark_process_dead():
+    """Drop the in flight requests of this process when it exits."""
+    multiprocess.mark_process_dead(os.getpid())
+
+
+if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+    # Workers forked from the server's master process inherit this, and
+    # each one removes its own files.
+    atexit.register(_mark_process_dead)
@@ -0,0 +1,112 @@
+"""
+Middleware timing each request and recording it in the metrics.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from core.metrics import IN_FLIGHT, observe_request
+from core.timing import current_timings, finish_request, start_request
+
+
+logger = logging.getLogger(__name__)
+
+# Longest SQL text written to the slow request log.
+MAX_SQL_LENGTH = 1000
+
+
+class ServerTimingMiddleware:
+    """Add a Server-Timing header, log slow requests and record metrics.
+
+    The header reports the SQL time and query count, the authentication
+    time, the time views spend serializing, the view's total and the
+    request's total. Auth and serialize leave out their queries.
+    Requests taking SLOW_REQUEST_MS or longer are logged as one JSON
+    line with their SLOW_REQUEST_SQL slowest statements, without their
+    parameters. Every request is also recorded in the Prometheus
+    metrics of core.metrics. Listed first in MIDDLEWARE, so the total
+    includes the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Django awaits middleware marked like MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        token = start_request(settings.SLOW_REQUEST_SQL)
+        IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+            timings = finish_request(token)
+
+        return self._report(request, response, timings)
+
+    async def __acall__(self, request):
+        token = start_request(settings.SLOW_REQUEST_SQL)
+        IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            IN_FLIGHT.dec()
+            timings = finish_request(token)
+
+        return self._report(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Note when the view starts."""
+        timings = current_timings()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def _report(self, request, response, timings):
+        """Add the header to response, record it and log it if slow."""
+        ended = time.perf_counter()
+        durations = {
+            'db': timings.db,
+            'auth': timings.spans['auth'],
+            'serialize': timings.spans['serialize'],
+            'view': 0.0,
+            'total': ended - timings.started,
+        }
+        if timings.view_started is not None:
+            durations['view'] = ended - timings.view_started
+        observe_request(request, response, durations['total'], timings)
+
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.1f}'
+                + (f';desc="{timings.queries} queries"'
+                   if name == 'db' else '')
+                for name, seconds in durations.items()
+            )
+
+        if durations['total'] * 1000 >= settings.SLOW_REQUEST_MS:
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': timings.queries,
+            }
+            record.update(
+                (f'{name}_ms', round(seconds * 1000, 1))
+                for name, seconds in durations.items()
+            )
+            record['slowest_sql'] = [
+                {'ms': round(seconds * 1000, 1), 'sql': sql[:MAX_SQL_LENGTH]}
+                for seconds, sql in timings.slowest_statements()
+            ]
+            logger.warning('Slow request %s', json.dumps(record))
+
+        return response
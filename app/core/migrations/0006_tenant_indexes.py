@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auto_20230107_0920'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['user', '-id'], name='agreement_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['user', 'checkin_date'], name='agreement_user_checkin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['user', 'checkout_date'], name='agreement_user_checkout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['user', '-id'], name='customer_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', '-id'], name='vehicle_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'status'], name='vehicle_user_status_idx'),
+        ),
+        migrations.AlterField(
+            model_name='agreement',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.RESTRICT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.RESTRICT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.RESTRICT, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:38
+
+import core.models
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+import django.db.models.expressions
+
+
+# Agreements listed when some end before they start.
+MAX_REPORTED = 50
+
+
+def check_periods(apps, schema_editor):
+    """Refuse to migrate agreements whose checkout precedes their checkin.
+
+    A [checkin, checkout) range cannot be built for them, so the index
+    and the availability queries would fail on them.
+    """
+    Agreement = apps.get_model('core', 'Agreement')
+    ids = list(Agreement.objects.filter(
+        checkout_date__lt=django.db.models.expressions.F('checkin_date'),
+    ).order_by('id').values_list('id', flat=True))
+    if ids:
+        listed = ', '.join(str(pk) for pk in ids[:MAX_REPORTED])
+        if len(ids) > MAX_REPORTED:
+            listed += f' and {len(ids) - MAX_REPORTED} more'
+        raise ValueError(
+            f'{len(ids)} agreements have a checkout date before their '
+            f'checkin date: {listed}. Correct their dates, then migrate '
+            f'again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_periods, migrations.RunPython.noop),
+        BtreeGistExtension(),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=django.contrib.postgres.indexes.GistIndex(django.db.models.expressions.F('vehicle'), core.models.DateRange('checkin_date', 'checkout_date', django.db.models.expressions.Value('[)')), name='agreement_vehicle_period_idx'),
+        ),
+    ]
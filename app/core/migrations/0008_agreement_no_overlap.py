@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:40
+
+import core.models
+import django.contrib.postgres.constraints
+from django.db import migrations
+import django.db.models.expressions
+
+
+# Agreements listed when some share a vehicle over overlapping periods.
+MAX_REPORTED = 50
+
+
+def check_overlaps(apps, schema_editor):
+    """Refuse to migrate agreements that double-book a vehicle.
+
+    The exclusion constraint cannot be added while they exist, and
+    Postgres would only name one pair of them.
+    """
+    Agreement = apps.get_model('core', 'Agreement')
+    F = django.db.models.expressions.F
+    OuterRef = django.db.models.expressions.OuterRef
+    agreements = Agreement.objects.annotate(
+        period=core.models.DateRange(
+            F('checkin_date'), F('checkout_date'),
+            django.db.models.expressions.Value('[)'),
+        ),
+    )
+    ids = list(agreements.filter(
+        django.db.models.expressions.Exists(
+            agreements.filter(
+                vehicle=OuterRef('vehicle'),
+                period__overlap=OuterRef('period'),
+            ).exclude(pk=OuterRef('pk')),
+        ),
+    ).order_by('id').values_list('id', flat=True))
+    if ids:
+        listed = ', '.join(str(pk) for pk in ids[:MAX_REPORTED])
+        if len(ids) > MAX_REPORTED:
+            listed += f' and {len(ids) - MAX_REPORTED} more'
+        raise ValueError(
+            f'{len(ids)} agreements overlap another agreement of the same '
+            f'vehicle: {listed}. Correct their dates or vehicles, then '
+            f'migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_agreement_period_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='agreement',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('vehicle', '='), (core.models.DateRange('checkin_date', 'checkout_date', django.db.models.expressions.Value('[)')), '&&')], name='agreement_vehicle_no_overlap'),
+        ),
+        migrations.RemoveIndex(
+            model_name='agreement',
+            name='agreement_vehicle_period_idx',
+        ),
+    ]
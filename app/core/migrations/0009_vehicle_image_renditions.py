@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_agreement_no_overlap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:57
+
+import core.images
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_vehicle_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehicle',
+            name='image',
+            field=models.ImageField(null=True, storage=core.images.ContentAddressedStorage(), upload_to=core.models.vehicle_image_file_path),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['image'], name='vehicle_image_idx'),
+        ),
+    ]
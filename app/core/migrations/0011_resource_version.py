@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_vehicle_content_addressed_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=100)),
+                ('version', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resourceversion',
+            constraint=models.UniqueConstraint(fields=('user', 'resource'), name='resourceversion_user_resource_uniq'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resource_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='agreement',
+            name='agreement_user_checkin_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='agreement',
+            name='agreement_user_checkout_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vehicle',
+            name='vehicle_user_status_idx',
+        ),
+        migrations.AlterField(
+            model_name='agreement',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='agreement_customer', to='core.customer'),
+        ),
+        migrations.AlterField(
+            model_name='agreement',
+            name='vehicle',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='agreement_vehicle', to='core.vehicle'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['user', 'checkin_date', 'id'], name='agreement_user_checkin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['user', 'checkout_date', 'id'], name='agreement_user_checkout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(condition=models.Q(('checkout_date__isnull', True)), fields=['user', '-id'], name='agreement_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['customer', '-id'], name='agreement_customer_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agreement',
+            index=models.Index(fields=['vehicle', '-id'], name='agreement_vehicle_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['user', 'customer_type', 'id'], name='customer_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['user', 'is_blocked', 'id'], name='customer_user_blocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['user', 'customer_name', 'id'], name='customer_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'status', 'id'], name='vehicle_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'vehicle_type', 'id'], name='vehicle_user_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'vehicle_name', 'id'], name='vehicle_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'daily_min_rate', 'id'], name='vehicle_user_daily_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['user', 'monthly_min_rate', 'id'], name='vehicle_user_monthly_rate_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:32
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['customer_name', 'customer_mobile', 'customer_email', 'cr_id_no'], name='customer_search_idx', opclasses=['gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops', 'gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['registration_no'], name='vehicle_search_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
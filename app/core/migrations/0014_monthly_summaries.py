@@ -0,0 +1,114 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Contributions of every agreement to the months its period covers, as
+# core.summaries computed them when the tables were added.
+CONTRIBUTIONS_SQL = """
+    SELECT a.user_id, a.vehicle_id, a.customer_id, m.month,
+        (m.month = date_trunc('month', a.checkin_date))::int AS rentals,
+        d.days AS rental_days,
+        CASE WHEN lower(a.rent_type) = 'monthly'
+            THEN round(
+                v.monthly_min_rate * d.days
+                / ((m.month + interval '1 month')::date - m.month),
+                3
+            )
+            ELSE v.daily_min_rate * d.days
+        END AS revenue
+    FROM {agreements} a
+    JOIN {vehicles} v ON v.id = a.vehicle_id
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('month', a.checkin_date),
+        date_trunc('month', GREATEST(a.checkin_date, a.checkout_date - 1)),
+        interval '1 month'
+    ) AS g(start)
+    CROSS JOIN LATERAL (SELECT g.start::date AS month) AS m
+    CROSS JOIN LATERAL (
+        SELECT GREATEST(
+            LEAST(
+                COALESCE(a.checkout_date, a.checkin_date),
+                (m.month + interval '1 month')::date
+            ) - GREATEST(a.checkin_date, m.month),
+            0
+        ) AS days
+    ) AS d
+"""
+
+
+def summarize_agreements(apps, schema_editor):
+    """Summarize the agreements made before the summary tables."""
+    # The signals only apply changes to existing summaries, so without
+    # this they would subtract contributions that were never added.
+    contributions = CONTRIBUTIONS_SQL.format(
+        agreements=apps.get_model('core', 'Agreement')._meta.db_table,
+        vehicles=apps.get_model('core', 'Vehicle')._meta.db_table,
+    )
+    with schema_editor.connection.cursor() as cursor:
+        for name, key in (
+            ('VehicleMonthlySummary', 'vehicle_id'),
+            ('CustomerMonthlySummary', 'customer_id'),
+        ):
+            table = apps.get_model('core', name)._meta.db_table
+            cursor.execute(
+                f'INSERT INTO {table} '
+                f'(user_id, {key}, month, rentals, rental_days, revenue) '
+                f'SELECT user_id, {key}, month, SUM(rentals), '
+                f'SUM(rental_days), SUM(revenue) '
+                f'FROM ({contributions}) c '
+                f'GROUP BY user_id, {key}, month'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_trigram_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('rentals', models.IntegerField(default=0)),
+                ('rental_days', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('vehicle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.vehicle')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomerMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('rentals', models.IntegerField(default=0)),
+                ('rental_days', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.customer')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemonthlysummary',
+            index=models.Index(fields=['user', 'month'], name='vehiclesummary_user_month_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='vehiclemonthlysummary',
+            constraint=models.UniqueConstraint(fields=('vehicle', 'month'), name='vehiclesummary_vehicle_month_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='customermonthlysummary',
+            index=models.Index(fields=['user', 'month'], name='customersummary_user_month_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customermonthlysummary',
+            constraint=models.UniqueConstraint(fields=('customer', 'month'), name='customersummary_customer_month_uniq'),
+        ),
+        migrations.RunPython(summarize_agreements, migrations.RunPython.noop),
+    ]
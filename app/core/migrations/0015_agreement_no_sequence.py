@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+# Numbers repeated by a user's agreements get the agreement id appended,
+# all but the oldest, so the numbers can be made unique.
+DEDUPLICATE_SQL = """
+    UPDATE core_agreement a
+    SET agreement_no = left(a.agreement_no, 200) || '-' || a.id
+    FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id, agreement_no ORDER BY id
+        ) AS n
+        FROM core_agreement
+    ) d
+    WHERE d.id = a.id AND d.n > 1
+"""
+
+# Return count values of the sequence named seq, creating it on first
+# use. A concurrent creation of the same sequence is waited for and then
+# used.
+AGREEMENT_NUMBERS_SQL = """
+    CREATE FUNCTION agreement_numbers(seq text, count integer)
+    RETURNS SETOF bigint AS $$
+    BEGIN
+        BEGIN
+            RETURN QUERY
+                SELECT nextval(seq::regclass) FROM generate_series(1, count);
+            RETURN;
+        EXCEPTION WHEN undefined_table THEN
+            BEGIN
+                EXECUTE format('CREATE SEQUENCE %I', seq);
+            EXCEPTION WHEN duplicate_table OR unique_violation THEN
+                NULL;
+            END;
+        END;
+        RETURN QUERY
+            SELECT nextval(seq::regclass) FROM generate_series(1, count);
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_monthly_summaries'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPLICATE_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(
+            AGREEMENT_NUMBERS_SQL,
+            'DROP FUNCTION agreement_numbers(text, integer)',
+        ),
+        migrations.AddConstraint(
+            model_name='agreement',
+            constraint=models.UniqueConstraint(fields=('user', 'agreement_no'), name='agreement_user_no_uniq'),
+        ),
+    ]
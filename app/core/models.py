@@ -1,22 +1,43 @@
 """
 Database models.
 """
-import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import Func, Value
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.images import image_storage
+
+
+class DateRange(Func):
+    """Build a Postgres daterange from two date expressions."""
+    function = 'daterange'
+    output_field = DateRangeField()
+
+
+def rental_period(checkin='checkin_date', checkout='checkout_date'):
+    """Return the half-open [checkin, checkout) range of a rental.
+
+    A null checkout gives an unbounded range, so open agreements overlap
+    every later date. The vehicle is free again on the checkout day.
+    """
+    return DateRange(checkin, checkout, Value('[)'))
+
+
 def vehicle_image_file_path(instance, filename):
-    """Generate file path for new vehicle image."""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    """Generate file path for new vehicle image.
 
+    The storage replaces the file name with a hash of the content.
+    """
     return os.path.join('uploads', 'vehicle', filename)
 
 
@@ -59,6 +80,7 @@ class Vehicle(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.RESTRICT,
+        db_index=False,
     )
     vehicle_type = models.CharField(max_length=40)
     vehicle_name = models.CharField(max_length=255)
@@ -68,7 +90,43 @@ class Vehicle(models.Model):
     monthly_min_rate = models.DecimalField(max_digits=10, decimal_places=3)
     monthly_max_rate = models.DecimalField(max_digits=10, decimal_places=3)
     status = models.CharField(max_length=40)
-    image = models.ImageField(null=True, upload_to=vehicle_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=vehicle_image_file_path,
+        storage=image_storage,
+    )
+    image_renditions = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='vehicle_user_id_idx'),
+            models.Index(
+                fields=['user', 'status', 'id'],
+                name='vehicle_user_status_idx',
+            ),
+            models.Index(
+                fields=['user', 'vehicle_type', 'id'],
+                name='vehicle_user_type_idx',
+            ),
+            models.Index(
+                fields=['user', 'vehicle_name', 'id'],
+                name='vehicle_user_name_idx',
+            ),
+            models.Index(
+                fields=['user', 'daily_min_rate', 'id'],
+                name='vehicle_user_daily_rate_idx',
+            ),
+            models.Index(
+                fields=['user', 'monthly_min_rate', 'id'],
+                name='vehicle_user_monthly_rate_idx',
+            ),
+            models.Index(fields=['image'], name='vehicle_image_idx'),
+            GinIndex(
+                fields=['registration_no'],
+                opclasses=['gin_trgm_ops'],
+                name='vehicle_search_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.vehicle_name
@@ -79,6 +137,7 @@ class Customer(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.RESTRICT,
+        db_index=False,
     )
     customer_type = models.CharField(max_length=40)
     customer_name = models.CharField(max_length=255)
@@ -89,6 +148,33 @@ class Customer(models.Model):
     customer_address = models.TextField(null=True, default=None, blank=True)
     is_blocked = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='customer_user_id_idx'),
+            models.Index(
+                fields=['user', 'customer_type', 'id'],
+                name='customer_user_type_idx',
+            ),
+            models.Index(
+                fields=['user', 'is_blocked', 'id'],
+                name='customer_user_blocked_idx',
+            ),
+            models.Index(
+                fields=['user', 'customer_name', 'id'],
+                name='customer_user_name_idx',
+            ),
+            GinIndex(
+                fields=[
+                    'customer_name',
+                    'customer_mobile',
+                    'customer_email',
+                    'cr_id_no',
+                ],
+                opclasses=['gin_trgm_ops'] * 4,
+                name='customer_search_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.customer_name
 
@@ -98,6 +184,7 @@ class Agreement(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.RESTRICT,
+        db_index=False,
     )
     rent_type = models.CharField(max_length=50)
     agreement_no = models.CharField(max_length=255)
@@ -107,9 +194,163 @@ class Agreement(models.Model):
     checkin_date = models.DateField()
     checkout_date = models.DateField(null=True, default=None, blank=True)
     
-    customer = models.ForeignKey(Customer,on_delete=models.PROTECT, related_name="agreement_customer")
-    vehicle = models.ForeignKey(Vehicle,on_delete=models.PROTECT, related_name="agreement_vehicle")
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.PROTECT,
+        related_name="agreement_customer",
+        db_index=False,
+    )
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.PROTECT,
+        related_name="agreement_vehicle",
+        db_index=False,
+    )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='agreement_user_id_idx'),
+            models.Index(
+                fields=['user', 'checkin_date', 'id'],
+                name='agreement_user_checkin_idx',
+            ),
+            models.Index(
+                fields=['user', 'checkout_date', 'id'],
+                name='agreement_user_checkout_idx',
+            ),
+            models.Index(
+                fields=['user', '-id'],
+                name='agreement_user_open_idx',
+                condition=models.Q(checkout_date__isnull=True),
+            ),
+            models.Index(
+                fields=['customer', '-id'],
+                name='agreement_customer_id_idx',
+            ),
+            models.Index(
+                fields=['vehicle', '-id'],
+                name='agreement_vehicle_id_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'agreement_no'],
+                name='agreement_user_no_uniq',
+            ),
+            ExclusionConstraint(
+                name='agreement_vehicle_no_overlap',
+                expressions=[
+                    ('vehicle', RangeOperators.EQUAL),
+                    (rental_period(), RangeOperators.OVERLAPS),
+                ],
+            ),
+        ]
 
     def __str__(self):
         return self.customer_name
+
+
+class ResourceVersion(models.Model):
+    """Counter bumped on every change to a user's objects of a model."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    resource = models.CharField(max_length=100)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'resource'],
+                name='resourceversion_user_resource_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.resource} v{self.version}'
+
+
+class VehicleMonthlySummary(models.Model):
+    """Rentals, days rented and estimated revenue of a vehicle in a month.
+
+    Kept up to date from agreements by core.summaries.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    month = models.DateField()
+    rentals = models.IntegerField(default=0)
+    rental_days = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=3,
+        default=0,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'month'],
+                name='vehiclesummary_user_month_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vehicle', 'month'],
+                name='vehiclesummary_vehicle_month_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.vehicle_id} {self.month:%Y-%m}'
+
+
+class CustomerMonthlySummary(models.Model):
+    """Rentals, days rented and estimated revenue of a customer in a month.
+
+    Kept up to date from agreements by core.summaries.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    month = models.DateField()
+    rentals = models.IntegerField(default=0)
+    rental_days = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=3,
+        default=0,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'month'],
+                name='customersummary_user_month_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['customer', 'month'],
+                name='customersummary_customer_month_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.customer_id} {self.month:%Y-%m}'
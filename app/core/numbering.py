@@ -0,0 +1,58 @@
+"""
+Server generated agreement numbers.
+
+Each user numbers their agreements from their own PostgreSQL sequence,
+one per year when the numbers carry the year, made on first use by the
+agreement_numbers() database function. nextval() never waits for other
+transactions, so concurrent creates do not block each other or scan the
+agreements. Numbers are not given back: those taken by transactions
+that roll back, such as rejected bookings, leave gaps. Numbers already
+used, by imported agreements for instance, are skipped.
+"""
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Agreement
+
+
+def sequence_name(user_id, year=None):
+    """Return the name of the sequence numbering user_id's agreements."""
+    if year is None:
+        return f'agreement_no_{user_id}'
+
+    return f'agreement_no_{user_id}_{year}'
+
+
+def format_number(number, year=None):
+    """Return the agreement number for a value of the sequence."""
+    padded = str(number).zfill(settings.AGREEMENT_NO_PADDING)
+    if year is None:
+        return f'{settings.AGREEMENT_NO_PREFIX}{padded}'
+
+    return f'{settings.AGREEMENT_NO_PREFIX}{year}-{padded}'
+
+
+def next_agreement_numbers(user_id, count=1):
+    """Return count unused agreement numbers for user_id, in order."""
+    year = timezone.localdate().year if settings.AGREEMENT_NO_YEARLY \
+        else None
+    numbers = []
+    with connection.cursor() as cursor:
+        while len(numbers) < count:
+            cursor.execute(
+                'SELECT agreement_numbers(%s, %s)',
+                [sequence_name(user_id, year), count - len(numbers)],
+            )
+            candidates = [
+                format_number(value, year) for value, in cursor.fetchall()
+            ]
+            taken = set(Agreement.objects.filter(
+                user_id=user_id,
+                agreement_no__in=candidates,
+            ).values_list('agreement_no', flat=True))
+            numbers += [
+                number for number in candidates if number not in taken
+            ]
+
+    return numbers
@@ -0,0 +1,98 @@
+"""
+Rental quotes for many vehicles at once.
+
+A rental period is split into whole calendar months from its start and
+the days left over. Each vehicle is quoted a lowest and a highest price:
+the months at its monthly rate and the days at its daily rate, the days
+never costing more than a month. Rates are read in one query as integer
+thousandths and priced for the whole fleet in one pass over arrays, so
+the prices are exact.
+"""
+import calendar
+from datetime import date
+
+import numpy as np
+
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast
+
+
+SCALE = 1000
+
+# Daily then monthly rates, lowest and highest, as columns of the rates.
+RATE_FIELDS = [
+    'daily_min_rate',
+    'daily_max_rate',
+    'monthly_min_rate',
+    'monthly_max_rate',
+]
+
+
+def add_months(day, months):
+    """Return day moved months later, clamped to the end of the month."""
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    month += 1
+    last = calendar.monthrange(year, month)[1]
+
+    return date(year, month, min(day.day, last))
+
+
+def decompose(start, end):
+    """Return the whole months and left over days of [start, end)."""
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if add_months(start, months) > end:
+        months -= 1
+
+    return months, (end - add_months(start, months)).days
+
+
+def price(rates, months, days):
+    """Return the lowest and highest price of each row of rates.
+
+    rates holds the RATE_FIELDS of one vehicle per row, in thousandths,
+    and so do the two columns returned.
+    """
+    daily = rates[:, :2]
+    monthly = rates[:, 2:]
+
+    return months * monthly + np.minimum(days * daily, monthly)
+
+
+def fetch_rates(queryset):
+    """Return the ids and rates in thousandths of queryset's vehicles."""
+    rows = queryset.values_list('id', *(
+        Cast(F(field) * SCALE, BigIntegerField()) for field in RATE_FIELDS
+    ))
+    table = np.array(list(rows), dtype=np.int64).reshape(
+        -1, len(RATE_FIELDS) + 1)
+
+    return table[:, 0], table[:, 1:]
+
+
+def format_price(value):
+    """Return a price in thousandths as DecimalField writes it."""
+    value = int(value)
+    whole, fraction = divmod(abs(value), SCALE)
+    sign = '-' if value < 0 else ''
+    return f'{sign}{whole}.{fraction:03d}'
+
+
+def quote_vehicles(queryset, start, end):
+    """Return the months, days and price of each vehicle for [start, end).
+
+    Prices are dicts of the vehicle id, lowest and highest price, in
+    queryset's order.
+    """
+    months, days = decompose(start, end)
+    ids, rates = fetch_rates(queryset)
+    prices = price(rates, months, days)
+
+    return months, days, [
+        {
+            'id': pk,
+            'min_price': format_price(low),
+            'max_price': format_price(high),
+        }
+        for pk, (low, high) in zip(ids.tolist(), prices.tolist())
+    ]
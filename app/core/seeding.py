@@ -0,0 +1,222 @@
+"""
+Synthetic tenants for load testing and local reproduction.
+
+The rows of a tenant depend only on the seed and the tenant's number,
+and are generated as columns with numpy and loaded with COPY. The module
+imports no models so spawned workers can load it before setting Django
+up.
+"""
+import io
+
+import numpy as np
+
+import django
+from django.db import connection, connections, transaction
+
+
+START = np.datetime64('2018-01-01')
+# Rows sent per COPY.
+BATCH_SIZE = 50000
+
+VEHICLE_TYPES = ['Sedan', 'SUV', 'Van', 'Pickup', 'Hatchback']
+VEHICLE_TYPE_WEIGHTS = [0.45, 0.25, 0.1, 0.1, 0.1]
+VEHICLE_MODELS = [
+    'Corolla', 'Camry', 'Civic', 'Accord', 'Sunny', 'Altima', 'Elantra',
+    'Sonata', 'Land Cruiser', 'Patrol', 'Pajero', 'Hiace', 'Hilux', 'Yaris',
+]
+FIRST_NAMES = [
+    'Ahmed', 'Fatima', 'Mohammed', 'Aisha', 'Ali', 'Maryam', 'Omar', 'Sara',
+    'John', 'Priya', 'Ravi', 'Maria', 'James', 'Noor', 'Hassan', 'Layla',
+]
+LAST_NAMES = [
+    'Al Balushi', 'Al Harthy', 'Khan', 'Smith', 'Kumar', 'Said', 'Nair',
+    'Al Hinai', 'Rahman', 'Fernandes', 'Al Lawati', 'Jones', 'Salim',
+]
+COMPANY_SUFFIXES = ['LLC', 'Trading', 'Contracting', 'Group', 'Services']
+DEPOSIT_TYPES = ['Cash', 'Card', 'Cheque']
+
+# Share of agreements rented by the month, of customers that are
+# companies or blocked, and of vehicles whose last rental is still open.
+MONTHLY_SHARE = 0.15
+COMPANY_SHARE = 0.2
+BLOCKED_SHARE = 0.02
+OPEN_SHARE = 0.1
+
+VEHICLE_COLUMNS = [
+    'user_id', 'vehicle_type', 'vehicle_name', 'registration_no',
+    'daily_min_rate', 'daily_max_rate', 'monthly_min_rate',
+    'monthly_max_rate', 'status', 'image_renditions',
+]
+CUSTOMER_COLUMNS = [
+    'user_id', 'customer_type', 'customer_name', 'cr_id_no',
+    'customer_email', 'customer_mobile', 'is_blocked',
+]
+AGREEMENT_COLUMNS = [
+    'user_id', 'rent_type', 'agreement_no', 'deposit_type', 'checkin_date',
+    'checkout_date', 'customer_id', 'vehicle_id',
+]
+
+
+def money(values):
+    """Return thousandths as decimal strings with three places."""
+    return [f'{value // 1000}.{value % 1000:03d}' for value in values.tolist()]
+
+
+def pick(rng, choices, size, weights=None):
+    """Return size strings drawn from choices."""
+    return np.array(choices)[rng.choice(len(choices), size, p=weights)]
+
+
+def generate_vehicles(rng, count):
+    """Return the columns of count vehicles, leaving out the owner."""
+    types = pick(rng, VEHICLE_TYPES, count, VEHICLE_TYPE_WEIGHTS)
+    models = pick(rng, VEHICLE_MODELS, count)
+    letters = rng.integers(0, 26, (count, 2)) + ord('A')
+    numbers = rng.integers(1, 100000, count)
+    daily = rng.integers(8, 60, count) * 1000
+    monthly = daily * rng.integers(18, 26, count)
+    markup = rng.integers(110, 151, count)
+
+    return [
+        types.tolist(),
+        [f'{model} {i}' for i, model in enumerate(models.tolist(), 1)],
+        [
+            f'{chr(a)}{chr(b)}-{number:05d}'
+            for (a, b), number in zip(letters.tolist(), numbers.tolist())
+        ],
+        money(daily),
+        money(daily * markup // 100),
+        money(monthly),
+        money(monthly * markup // 100),
+        ['Ready'] * count,
+        ['{}'] * count,
+    ]
+
+
+def generate_customers(rng, count):
+    """Return the columns of count customers, leaving out the owner."""
+    company = rng.random(count) < COMPANY_SHARE
+    first = pick(rng, FIRST_NAMES, count).tolist()
+    last = pick(rng, LAST_NAMES, count).tolist()
+    suffix = pick(rng, COMPANY_SUFFIXES, count).tolist()
+    ids = rng.integers(10 ** 7, 10 ** 8, count).tolist()
+    mobiles = rng.integers(9 * 10 ** 7, 10 ** 8, count).tolist()
+
+    return [
+        np.where(company, 'Company', 'Individual').tolist(),
+        [
+            f'{last[i]} {suffix[i]}' if company[i] else
+            f'{first[i]} {last[i]}'
+            for i in range(count)
+        ],
+        [str(value) for value in ids],
+        [f'customer{i}@example.com' for i in range(1, count + 1)],
+        [f'+968{value}' for value in mobiles],
+        np.where(rng.random(count) < BLOCKED_SHARE, 't', 'f').tolist(),
+    ]
+
+
+def generate_agreements(rng, count, vehicles, customers):
+    """Return the agreements' columns, their vehicles and customers.
+
+    Each vehicle's rentals follow each other with random gaps, so they
+    never overlap, while rentals of different vehicles and of the same
+    customer do. The last rental of some vehicles is still open. A few
+    customers account for most agreements. Vehicles and customers are
+    indexes into the generated ones, and agreements are ordered by
+    checkin date.
+    """
+    vehicle = np.sort(rng.integers(0, vehicles, count))
+    monthly = rng.random(count) < MONTHLY_SHARE
+    days = np.where(
+        monthly,
+        30 * rng.integers(1, 7, count),
+        rng.integers(1, 15, count),
+    )
+    span = rng.integers(0, 30, count) + days
+
+    # Each vehicle's rentals end at the running total of its spans.
+    first = np.flatnonzero(np.r_[True, vehicle[1:] != vehicle[:-1]])
+    lengths = np.diff(np.r_[first, count])
+    total = np.cumsum(span)
+    ends = total - np.repeat(total[first] - span[first], lengths)
+    offset = rng.integers(0, 90, vehicles)[vehicle]
+    checkin = START + (offset + ends - days).astype('timedelta64[D]')
+    checkout = (checkin + days.astype('timedelta64[D]')).astype(str)
+
+    last = np.r_[first[1:] - 1, count - 1]
+    still_open = last[rng.random(len(last)) < OPEN_SHARE]
+    checkout[still_open] = '\\N'
+
+    customer = (rng.random(count) ** 3 * customers).astype(np.int64)
+    order = np.argsort(checkin, kind='stable')
+    columns = [
+        np.where(monthly, 'Monthly', 'Daily')[order].tolist(),
+        [f'SD-{i:07d}' for i in range(1, count + 1)],
+        pick(rng, DEPOSIT_TYPES, count)[order].tolist(),
+        checkin[order].astype(str).tolist(),
+        checkout[order].tolist(),
+    ]
+
+    return columns, vehicle[order], customer[order], vehicle[still_open]
+
+
+def copy_rows(cursor, table, columns, user_id, values, batch_size):
+    """COPY rows of the column values for user_id into table in batches."""
+    count = len(values[0])
+    owner = str(user_id)
+    for start in range(0, count, batch_size):
+        batch = [column[start:start + batch_size] for column in values]
+        data = io.StringIO(''.join(
+            f'{owner}\t' + '\t'.join(row) + '\n' for row in zip(*batch)
+        ))
+        cursor.copy_expert(
+            f'COPY {table} ({", ".join(columns)}) FROM STDIN', data)
+
+
+def seed_tenant(user_id, seed, tenant, counts, batch_size=BATCH_SIZE):
+    """Generate and save the rows of one tenant, return how many."""
+    rng = np.random.default_rng([seed, tenant])
+    vehicles, customers, agreements = counts
+    with transaction.atomic(), connection.cursor() as cursor:
+        copy_rows(
+            cursor, 'core_vehicle', VEHICLE_COLUMNS, user_id,
+            generate_vehicles(rng, vehicles), batch_size,
+        )
+        copy_rows(
+            cursor, 'core_customer', CUSTOMER_COLUMNS, user_id,
+            generate_customers(rng, customers), batch_size,
+        )
+        if not agreements:
+            return vehicles + customers
+
+        ids = {}
+        for table in ('core_vehicle', 'core_customer'):
+            cursor.execute(
+                f'SELECT id FROM {table} WHERE user_id = %s ORDER BY id',
+                [user_id],
+            )
+            ids[table] = np.array([row for row, in cursor.fetchall()])
+
+        columns, vehicle, customer, rented = generate_agreements(
+            rng, agreements, vehicles, customers)
+        columns += [
+            ids['core_customer'][customer].astype(str).tolist(),
+            ids['core_vehicle'][vehicle].astype(str).tolist(),
+        ]
+        copy_rows(
+            cursor, 'core_agreement', AGREEMENT_COLUMNS, user_id,
+            columns, batch_size,
+        )
+        cursor.execute(
+            "UPDATE core_vehicle SET status = 'Rented' WHERE id = ANY(%s)",
+            [ids['core_vehicle'][rented].tolist()],
+        )
+
+    return vehicles + customers + agreements
+
+
+def init_worker(database):
+    """Set up Django in a spawned worker using the parent's database."""
+    django.setup()
+    connections['default'].settings_dict['NAME'] = database
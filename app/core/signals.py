@@ -0,0 +1,106 @@
+"""
+Signal handlers for the core app.
+"""
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from core.images import release_image
+from core.models import Vehicle, Customer, Agreement
+from core.summaries import (
+    SUMMARY_FIELDS,
+    add_summaries,
+    subtract_summaries,
+    summarize_new,
+)
+from core.versions import bump_version
+
+
+@receiver(post_init, sender=Vehicle)
+def remember_image(sender, instance, **kwargs):
+    """Keep the stored image name to notice when it is replaced."""
+    # Read the raw value so deferred images are not loaded.
+    instance._stored_image = instance.__dict__.get('image')
+
+
+@receiver(post_save, sender=Vehicle)
+def release_replaced_image(sender, instance, **kwargs):
+    """Release the previous image of a vehicle when it is replaced."""
+    stored = getattr(instance, '_stored_image', None)
+    name = instance.image.name if 'image' in instance.__dict__ else stored
+    if stored and stored != name:
+        release_image(sender, stored)
+    instance._stored_image = name
+
+
+@receiver(post_delete, sender=Vehicle)
+def release_deleted_image(sender, instance, **kwargs):
+    """Release the image of a deleted vehicle."""
+    name = instance.__dict__.get('image')
+    if name:
+        release_image(sender, str(name))
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Agreement)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Agreement)
+def bump_resource_version(sender, instance, **kwargs):
+    """Bump the version of the changed object's model for its user."""
+    bump_version([instance.user_id], sender)
+
+
+@receiver(post_init, sender=Vehicle)
+def remember_rates(sender, instance, **kwargs):
+    """Keep the stored rates to notice when they change."""
+    instance._stored_rates = {
+        name: instance.__dict__.get(name)
+        for name in SUMMARY_FIELDS[Vehicle][0]
+    }
+
+
+@receiver(pre_save, sender=Vehicle)
+@receiver(pre_save, sender=Agreement)
+def subtract_from_summaries(sender, instance, update_fields=None, **kwargs):
+    """Take an object about to be changed out of the monthly summaries."""
+    if instance._state.adding:
+        return
+
+    fields = update_fields
+    if fields is None and sender is Vehicle:
+        fields = [
+            name for name, value in instance._stored_rates.items()
+            if instance.__dict__.get(name) != value
+        ]
+    emptied = subtract_summaries(sender, [instance.pk], fields)
+    instance._summary_change = (fields, emptied)
+
+
+@receiver(pre_delete, sender=Agreement)
+def subtract_deleted(sender, instance, **kwargs):
+    """Take an agreement about to be deleted out of the summaries."""
+    instance._summary_change = (
+        None, subtract_summaries(sender, [instance.pk]))
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=Agreement)
+@receiver(post_delete, sender=Agreement)
+def add_to_summaries(sender, instance, created=False, **kwargs):
+    """Add a new or changed object to the monthly summaries."""
+    if sender is Vehicle:
+        remember_rates(sender, instance)
+
+    change = instance.__dict__.pop('_summary_change', None)
+    if change is not None:
+        fields, emptied = change
+        add_summaries(sender, [instance.pk], fields, emptied)
+    elif created:
+        summarize_new(sender, [instance.pk])
@@ -0,0 +1,226 @@
+"""
+Monthly rental summaries of vehicles and customers.
+
+Each agreement counts as one rental in the month of its checkin, and
+adds to every month its [checkin, checkout) period covers the days it
+covers and their revenue estimated at the vehicle's minimum rates; a
+monthly rental costs the monthly rate for a whole calendar month and its
+share of it for part of one. Open agreements have no days or revenue
+until they are checked out.
+
+Changes are applied in the transaction that makes them: the
+contributions of the agreements about to change are subtracted from the
+summary rows, and those of the changed agreements added back, so the
+tables always hold what rebuild_summaries() computes and reports read
+them instead of every agreement. Migration 0014 summarized the
+agreements that existed before the tables.
+
+A change keeps the summary rows of its vehicles' and customers' months
+locked until its transaction ends: uncommitted changes to agreements of
+the same vehicle or customer in the same month, or to the same vehicle's
+rates, wait for each other. Changes to other vehicles and customers, or
+to other months, do not.
+"""
+from django.db import connection, transaction
+
+from core.models import (
+    Agreement,
+    CustomerMonthlySummary,
+    Vehicle,
+    VehicleMonthlySummary,
+)
+
+
+# Fields the summaries are computed from, and the SQL condition on the
+# agreements a change to them affects.
+SUMMARY_FIELDS = {
+    Agreement: (
+        {
+            'user',
+            'customer',
+            'vehicle',
+            'rent_type',
+            'checkin_date',
+            'checkout_date',
+        },
+        'a.id = ANY(%(ids)s)',
+    ),
+    Vehicle: (
+        {'daily_min_rate', 'monthly_min_rate'},
+        'a.vehicle_id = ANY(%(ids)s)',
+    ),
+}
+
+# Summary model and the agreement column it sums per month.
+SUMMARIES = [
+    (VehicleMonthlySummary, 'vehicle_id'),
+    (CustomerMonthlySummary, 'customer_id'),
+]
+
+CONTRIBUTIONS_SQL = f"""
+    SELECT a.user_id, a.vehicle_id, a.customer_id, m.month,
+        (m.month = date_trunc('month', a.checkin_date))::int AS rentals,
+        d.days AS rental_days,
+        CASE WHEN lower(a.rent_type) = 'monthly'
+            THEN round(
+                v.monthly_min_rate * d.days
+                / ((m.month + interval '1 month')::date - m.month),
+                3
+            )
+            ELSE v.daily_min_rate * d.days
+        END AS revenue
+    FROM {Agreement._meta.db_table} a
+    JOIN {Vehicle._meta.db_table} v ON v.id = a.vehicle_id
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('month', a.checkin_date),
+        date_trunc('month', GREATEST(a.checkin_date, a.checkout_date - 1)),
+        interval '1 month'
+    ) AS g(start)
+    CROSS JOIN LATERAL (SELECT g.start::date AS month) AS m
+    CROSS JOIN LATERAL (
+        SELECT GREATEST(
+            LEAST(
+                COALESCE(a.checkout_date, a.checkin_date),
+                (m.month + interval '1 month')::date
+            ) - GREATEST(a.checkin_date, m.month),
+            0
+        ) AS days
+    ) AS d
+    WHERE {{condition}}
+"""
+
+UPSERT_SQL = """
+    {name} AS (
+        INSERT INTO {table} AS s
+            (user_id, {key}, month, rentals, rental_days, revenue)
+        SELECT user_id, {key}, month,
+            %(sign)s * SUM(rentals),
+            %(sign)s * SUM(rental_days),
+            %(sign)s * SUM(revenue)
+        FROM contributions
+        GROUP BY user_id, {key}, month
+        ORDER BY {key}, month
+        ON CONFLICT ({key}, month) DO UPDATE SET
+            rentals = s.rentals + excluded.rentals,
+            rental_days = s.rental_days + excluded.rental_days,
+            revenue = s.revenue + excluded.revenue
+        RETURNING s.id,
+            s.rentals = 0 AND s.rental_days = 0 AND s.revenue = 0 AS empty
+    )
+"""
+
+
+def _apply(sign, condition, params, lock=False):
+    """Add sign times the contributions of the agreements matching condition.
+
+    Return the summary rows left empty, as lists of ids per model.
+    """
+    contributions = CONTRIBUTIONS_SQL.format(condition=condition)
+    if lock:
+        contributions += ' FOR UPDATE OF a'
+    names = [f'summary_{i}' for i in range(len(SUMMARIES))]
+    upserts = [
+        UPSERT_SQL.format(name=name, table=model._meta.db_table, key=key)
+        for name, (model, key) in zip(names, SUMMARIES)
+    ]
+    emptied = ' UNION ALL '.join(
+        f'SELECT {i}, id FROM {name} WHERE empty'
+        for i, name in enumerate(names)
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH contributions AS ({contributions}), '
+            + ', '.join(upserts) + ' ' + emptied,
+            {'sign': sign, **params},
+        )
+        rows = cursor.fetchall()
+
+    return [[pk for i, pk in rows if i == index]
+            for index in range(len(SUMMARIES))]
+
+
+def _condition(model, fields):
+    """Return the SQL condition on agreements affected by a change.
+
+    None means changes to these fields of model, or to any field when
+    fields is None, leave the summaries alone.
+    """
+    if model not in SUMMARY_FIELDS:
+        return None
+
+    names, condition = SUMMARY_FIELDS[model]
+    if fields is not None and not names.intersection(
+            model._meta.get_field(name).name for name in fields):
+        return None
+
+    return condition
+
+
+def subtract_summaries(model, ids, fields=None):
+    """Take the contributions of objects about to change out of summaries.
+
+    Call before changing fields of model's objects with ids, or every
+    field when None, in the transaction that changes them; pass the
+    result to add_summaries() once they are changed. The agreements are
+    locked until the transaction ends, so concurrent changes queue up.
+    """
+    condition = _condition(model, fields)
+    if condition is None or not ids:
+        return None
+
+    return _apply(-1, condition, {'ids': sorted(ids)}, lock=True)
+
+
+def add_summaries(model, ids, fields=None, emptied=None):
+    """Add the contributions of changed objects back to the summaries.
+
+    emptied is what subtract_summaries() returned before the change; the
+    summary rows it lists that are still empty are deleted. Deleted
+    objects add nothing back.
+    """
+    condition = _condition(model, fields)
+    if condition is None or not ids:
+        return
+
+    _apply(1, condition, {'ids': sorted(ids)})
+    if emptied and any(emptied):
+        with connection.cursor() as cursor:
+            for (summary, _), pks in zip(SUMMARIES, emptied):
+                if not pks:
+                    continue
+                cursor.execute(
+                    f'DELETE FROM {summary._meta.db_table} '
+                    f'WHERE id = ANY(%s) AND rentals = 0 '
+                    f'AND rental_days = 0 AND revenue = 0',
+                    [pks],
+                )
+
+
+def summarize_new(model, ids):
+    """Add new objects of model to the summaries."""
+    # New vehicles and customers have no agreements yet.
+    if model is Agreement and ids:
+        _apply(1, SUMMARY_FIELDS[model][1], {'ids': sorted(ids)})
+
+
+def rebuild_summaries(user_ids=None):
+    """Recompute the summaries of user_ids, or of every user, from scratch.
+
+    The summary tables are locked against writes while they are rebuilt,
+    so changes made meanwhile are applied on top of the rebuilt rows.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        tables = ', '.join(
+            summary._meta.db_table for summary, _ in SUMMARIES)
+        cursor.execute(f'LOCK TABLE {tables} IN EXCLUSIVE MODE')
+        for summary, _ in SUMMARIES:
+            rows = summary.objects.all()
+            if user_ids is not None:
+                rows = rows.filter(user_id__in=user_ids)
+            rows.delete()
+
+        if user_ids is None:
+            _apply(1, 'TRUE', {})
+        elif user_ids:
+            _apply(1, 'a.user_id = ANY(%(ids)s)', {'ids': sorted(user_ids)})
@@ -0,0 +1,88 @@
+"""
+Sample objects shared by the tests.
+"""
+import itertools
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from core.models import (
+    Vehicle,
+    Customer,
+    Agreement,
+    VehicleMonthlySummary,
+    CustomerMonthlySummary,
+)
+
+
+# Numbers of the sample agreements, unique for each user.
+agreement_numbers = itertools.count(1)
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        'email': 'user@example.com',
+        'password': 'test123',
+    }
+    defaults.update(params)
+
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_vehicle(user, **params):
+    """Create and return a sample vehicle."""
+    defaults = {
+        'vehicle_type': 'Sedan',
+        'vehicle_name': 'Sample vehicle name',
+        'registration_no': '234355',
+        'daily_min_rate': Decimal('10.00'),
+        'daily_max_rate': Decimal('12.00'),
+        'monthly_min_rate': Decimal('233.44'),
+        'monthly_max_rate': Decimal('1034.44'),
+        'status': 'Ready',
+    }
+    defaults.update(params)
+
+    return Vehicle.objects.create(user=user, **defaults)
+
+
+def create_customer(user, **params):
+    """Create and return a sample customer."""
+    defaults = {
+        'customer_type': 'Individual',
+        'customer_name': 'Sample customer',
+        'cr_id_no': '1234',
+        'customer_email': 'customer@example.com',
+        'customer_mobile': '555000',
+    }
+    defaults.update(params)
+
+    return Customer.objects.create(user=user, **defaults)
+
+
+def create_agreement(user, vehicle, customer, **params):
+    """Create and return a sample daily agreement."""
+    defaults = {
+        'rent_type': 'Daily',
+        'agreement_no': f'Sample-{next(agreement_numbers)}',
+        'deposit_type': 'Cash',
+        'checkin_date': date(2023, 1, 30),
+        'checkout_date': date(2023, 2, 3),
+    }
+    defaults.update(params)
+
+    return Agreement.objects.create(
+        user=user, vehicle=vehicle, customer=customer, **defaults)
+
+
+def summary_rows():
+    """Return every vehicle and customer summary row as tuples."""
+    fields = ['month', 'rentals', 'rental_days', 'revenue']
+    return (
+        sorted(VehicleMonthlySummary.objects.values_list(
+            'user', 'vehicle', *fields)),
+        sorted(CustomerMonthlySummary.objects.values_list(
+            'user', 'customer', *fields)),
+    )
@@ -0,0 +1,258 @@
+"""
+Tests for the import_fleet management command.
+"""
+import csv
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Vehicle, Customer, Agreement
+from core.tests.helpers import create_user
+
+
+VEHICLE_HEADER = [
+    'vehicle_type', 'vehicle_name', 'registration_no', 'daily_min_rate',
+    'daily_max_rate', 'monthly_min_rate', 'monthly_max_rate', 'status',
+]
+CUSTOMER_HEADER = [
+    'customer_type', 'customer_name', 'cr_id_no', 'customer_email',
+    'customer_mobile', 'is_blocked',
+]
+AGREEMENT_HEADER = [
+    'rent_type', 'agreement_no', 'deposit_type', 'checkin_date',
+    'checkout_date', 'vehicle_registration_no', 'customer_cr_id_no',
+]
+
+
+class ImportFleetTests(TestCase):
+    """Test importing a fleet from CSV files."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_csv(self, name, header, rows):
+        """Write a CSV file and return its path."""
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+        return path
+
+    def run_import(self, **files):
+        """Run the command and return its output."""
+        out = StringIO()
+        call_command('import_fleet', user=self.user.email, stdout=out, **files)
+
+        return out.getvalue()
+
+    def test_import_vehicles(self):
+        """Test valid vehicles are inserted and invalid rows reported."""
+        path = self.write_csv('vehicles.csv', VEHICLE_HEADER, [
+            ['Sedan', 'Camry', 'R-1', '10.5', '12', '200', '300', 'Ready'],
+            ['Sedan', '', 'R-2', '10', '12', '200', '300', 'Ready'],
+            ['SUV', 'Patrol', 'R-3', '1,5', '12', '200', '300', 'Ready'],
+        ])
+
+        out = self.run_import(vehicles=path)
+
+        vehicle = Vehicle.objects.get(user=self.user)
+        self.assertEqual(vehicle.registration_no, 'R-1')
+        self.assertEqual(vehicle.daily_min_rate, Decimal('10.5'))
+        self.assertIn('row 2: vehicle_name is required', out)
+        self.assertIn('row 3: daily_min_rate is not a number', out)
+        self.assertIn('rows/s', out)
+
+    def test_import_customers_optional_columns(self):
+        """Test optional columns may be left out of the file."""
+        path = self.write_csv('customers.csv', CUSTOMER_HEADER, [
+            ['Individual', 'Ali', 'CR-1', 'ali@example.com', '555', 'yes'],
+            ['Individual', 'Sara', 'CR-2', 'sara@example.com', '556', ''],
+            ['Individual', 'Bad', 'CR-3', 'not-an-email', '557', ''],
+        ])
+
+        out = self.run_import(customers=path)
+
+        customers = Customer.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(
+            [(c.cr_id_no, c.is_blocked) for c in customers],
+            [('CR-1', True), ('CR-2', False)],
+        )
+        self.assertIsNone(customers[0].customer_phone)
+        self.assertIn('row 3: customer_email is not a valid email', out)
+
+    def test_import_agreements(self):
+        """Test agreements resolve references and reject overlaps."""
+        vehicles = self.write_csv('vehicles.csv', VEHICLE_HEADER, [
+            ['Sedan', 'Camry', 'R-1', '10', '12', '200', '300', 'Ready'],
+        ])
+        customers = self.write_csv('customers.csv', CUSTOMER_HEADER, [
+            ['Individual', 'Ali', 'CR-1', 'ali@example.com', '555', ''],
+        ])
+        agreements = self.write_csv('agreements.csv', AGREEMENT_HEADER, [
+            ['Daily', 'A-1', 'Cash', '2023-01-01', '2023-01-10', 'R-1',
+             'CR-1'],
+            ['Daily', 'A-2', 'Cash', '2023-01-05', '', 'R-1', 'CR-1'],
+            ['Daily', 'A-3', 'Cash', '2023-01-10', '2023-01-12', 'R-1',
+             'CR-1'],
+            ['Daily', 'A-4', 'Cash', '2023-02-30', '', 'R-1', 'CR-1'],
+            ['Daily', 'A-5', 'Cash', '2023-03-01', '', 'R-9', 'CR-1'],
+            ['Daily', 'A-6', 'Cash', '2023-03-05', '2023-03-01', 'R-1',
+             'CR-1'],
+        ])
+
+        out = self.run_import(
+            vehicles=vehicles,
+            customers=customers,
+            agreements=agreements,
+        )
+
+        numbers = Agreement.objects.filter(
+            user=self.user).order_by('id').values_list(
+                'agreement_no', 'checkout_date')
+        self.assertEqual(list(numbers), [
+            ('A-1', date(2023, 1, 10)),
+            ('A-3', date(2023, 1, 12)),
+        ])
+        self.assertIn('row 2: overlaps row 1', out)
+        self.assertIn('row 4: checkin_date is not a valid', out)
+        self.assertIn('row 5: vehicle_registration_no does not match', out)
+        self.assertIn('row 6: checkout_date is before checkin_date', out)
+
+    def test_agreement_overlapping_existing(self):
+        """Test agreements overlapping stored agreements are rejected."""
+        vehicle = Vehicle.objects.create(
+            user=self.user,
+            vehicle_type='Sedan',
+            vehicle_name='Camry',
+            registration_no='R-1',
+            daily_min_rate=Decimal('10'),
+            daily_max_rate=Decimal('12'),
+            monthly_min_rate=Decimal('200'),
+            monthly_max_rate=Decimal('300'),
+            status='Ready',
+        )
+        customer = Customer.objects.create(
+            user=self.user,
+            customer_type='Individual',
+            customer_name='Ali',
+            cr_id_no='CR-1',
+            customer_email='ali@example.com',
+            customer_mobile='555',
+        )
+        Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no='A-0',
+            deposit_type='Cash',
+            checkin_date=date(2023, 1, 1),
+            customer=customer,
+            vehicle=vehicle,
+        )
+        agreements = self.write_csv('agreements.csv', AGREEMENT_HEADER, [
+            ['Daily', 'A-1', 'Cash', '2024-01-01', '', 'R-1', 'CR-1'],
+        ])
+
+        out = self.run_import(agreements=agreements)
+
+        self.assertIn('row 1: overlaps an existing agreement', out)
+        self.assertEqual(Agreement.objects.count(), 1)
+
+    def test_agreement_duplicate_numbers(self):
+        """Test agreements reusing an agreement number are rejected."""
+        vehicle = Vehicle.objects.create(
+            user=self.user,
+            vehicle_type='Sedan',
+            vehicle_name='Camry',
+            registration_no='R-1',
+            daily_min_rate=Decimal('10'),
+            daily_max_rate=Decimal('12'),
+            monthly_min_rate=Decimal('200'),
+            monthly_max_rate=Decimal('300'),
+            status='Ready',
+        )
+        customer = Customer.objects.create(
+            user=self.user,
+            customer_type='Individual',
+            customer_name='Ali',
+            cr_id_no='CR-1',
+            customer_email='ali@example.com',
+            customer_mobile='555',
+        )
+        Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no='A-0',
+            deposit_type='Cash',
+            checkin_date=date(2023, 1, 1),
+            checkout_date=date(2023, 1, 2),
+            customer=customer,
+            vehicle=vehicle,
+        )
+        agreements = self.write_csv('agreements.csv', AGREEMENT_HEADER, [
+            ['Daily', ' A-0', 'Cash', '2023-02-01', '2023-02-02', 'R-1',
+             'CR-1'],
+            ['Daily', 'A-1', 'Cash', '2023-03-01', '2023-03-02', 'R-1',
+             'CR-1'],
+            ['Daily', 'A-1 ', 'Cash', '2023-04-01', '2023-04-02', 'R-1',
+             'CR-1'],
+        ])
+
+        out = self.run_import(agreements=agreements)
+
+        self.assertIn('row 1: agreement_no already exists', out)
+        self.assertIn('row 3: duplicates row 2', out)
+        numbers = Agreement.objects.order_by('id').values_list(
+            'agreement_no', flat=True)
+        self.assertEqual(list(numbers), ['A-0', 'A-1'])
+
+    def test_dry_run_saves_nothing(self):
+        """Test a dry run validates without inserting."""
+        path = self.write_csv('vehicles.csv', VEHICLE_HEADER, [
+            ['Sedan', 'Camry', 'R-1', '10', '12', '200', '300', 'Ready'],
+        ])
+
+        out = self.run_import(vehicles=path, dry_run=True)
+
+        self.assertIn('Validated 1 rows', out)
+        self.assertFalse(Vehicle.objects.exists())
+
+    def test_rejects_file(self):
+        """Test every rejected row is written to the rejects file."""
+        path = self.write_csv('vehicles.csv', VEHICLE_HEADER, [
+            ['Sedan', '', 'R-1', '10', '12', '200', '300', 'Ready'],
+        ])
+        rejects = os.path.join(self.tmpdir, 'rejects.csv')
+
+        self.run_import(vehicles=path, rejects=rejects)
+
+        with open(rejects, newline='') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(
+            rows, [['file', 'row', 'reason'],
+                   ['vehicles', '1', 'vehicle_name is required']])
+
+    def test_unknown_column_error(self):
+        """Test a header with unknown columns is rejected."""
+        path = self.write_csv(
+            'vehicles.csv', VEHICLE_HEADER + ['colour'], [])
+
+        with self.assertRaises(CommandError):
+            self.run_import(vehicles=path)
+
+    def test_unknown_user_error(self):
+        """Test importing for an unknown user fails."""
+        with self.assertRaises(CommandError):
+            call_command('import_fleet', user='nobody@example.com')
@@ -0,0 +1,176 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.metrics import metrics_view
+from core.tests.helpers import create_user, create_vehicle
+from rent.views import VehicleViewSet
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+METRICS_URL = reverse('metrics')
+
+# Counts a request in a separate process writing to a metrics directory.
+WORKER_SCRIPT = """
+import django
+django.setup()
+from core.metrics import REQUESTS
+REQUESTS.labels('rent:vehicle-list', 'GET', 200).inc()
+"""
+
+
+def sample(name, **labels):
+    """Return the current value of a sample, 0 if not recorded yet."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    """Test requests are recorded in the metrics."""
+
+    def setUp(self):
+        self.user = create_user()
+        token = Token.objects.create(user=self.user)
+        self.auth = f'Token {token.key}'
+        create_vehicle(self.user)
+
+    def get_vehicles(self):
+        """Request the vehicle list."""
+        return self.client.get(VEHICLES_URL, HTTP_AUTHORIZATION=self.auth)
+
+    def test_requests_recorded_per_route(self):
+        """Test requests are counted and timed under their route name."""
+        labels = {'route': 'rent:vehicle-list', 'method': 'GET'}
+        requests = sample('http_requests_total', status='200', **labels)
+        latencies = sample('http_request_duration_seconds_count', **labels)
+        queries = sample('db_queries_total', route='rent:vehicle-list')
+
+        res = self.get_vehicles()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sample('http_requests_total', status='200', **labels),
+            requests + 1,
+        )
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', **labels),
+            latencies + 1,
+        )
+        self.assertGreater(
+            sample('db_queries_total', route='rent:vehicle-list'), queries)
+
+    def test_unmatched_paths_share_route(self):
+        """Test unknown paths are not recorded under their own path."""
+        before = sample(
+            'http_requests_total',
+            route='unmatched', method='GET', status='404',
+        )
+
+        self.client.get('/no-such-path/')
+
+        self.assertEqual(
+            sample(
+                'http_requests_total',
+                route='unmatched', method='GET', status='404',
+            ),
+            before + 1,
+        )
+
+    def test_in_flight_requests(self):
+        """Test requests count as in flight while they are answered."""
+        seen = []
+        get_queryset = VehicleViewSet.get_queryset
+
+        def record(view):
+            seen.append(sample('http_requests_in_flight'))
+            return get_queryset(view)
+
+        before = sample('http_requests_in_flight')
+        with patch.object(VehicleViewSet, 'get_queryset', record):
+            self.get_vehicles()
+
+        self.assertEqual(seen, [before + 1])
+        self.assertEqual(sample('http_requests_in_flight'), before)
+
+    def test_cache_lookups(self):
+        """Test token and response cache lookups are counted."""
+        hits = sample('cache_lookups_total', cache='token', result='hit')
+        responses = sum(
+            sample('cache_lookups_total', cache='response', result=result)
+            for result in ('hit', 'miss')
+        )
+
+        self.get_vehicles()
+        self.get_vehicles()
+
+        self.assertGreater(
+            sample('cache_lookups_total', cache='token', result='hit'), hits)
+        self.assertGreater(
+            sum(
+                sample('cache_lookups_total', cache='response', result=result)
+                for result in ('hit', 'miss')
+            ),
+            responses,
+        )
+
+    def test_metrics_endpoint(self):
+        """Test the metrics are served in the Prometheus text format."""
+        self.get_vehicles()
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        names = {
+            family.name for family
+            in text_string_to_metric_families(res.content.decode())
+        }
+        for name in (
+            'http_requests', 'http_request_duration_seconds',
+            'http_requests_in_flight', 'db_queries',
+            'db_query_duration_seconds', 'cache_lookups',
+        ):
+            self.assertIn(name, names)
+
+    def test_metrics_summed_across_processes(self):
+        """Test the endpoint adds up the metrics of every worker."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        workers = [
+            subprocess.Popen(
+                [sys.executable, '-c', WORKER_SCRIPT],
+                cwd=settings.BASE_DIR,
+                env=env,
+            )
+            for _ in range(2)
+        ]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+
+        with patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+            res = metrics_view(None)
+
+        samples = {
+            (sample.name, sample.labels.get('route')): sample.value
+            for family in text_string_to_metric_families(
+                res.content.decode())
+            for sample in family.samples
+        }
+        self.assertEqual(
+            samples[('http_requests_total', 'rent:vehicle-list')], 2)
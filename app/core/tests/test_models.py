@@ -1,13 +1,17 @@
 """
 Tests for models.
 """
-from unittest.mock import patch
+import hashlib
+import os
+import shutil
+import tempfile
 from decimal import Decimal
 
+from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
-from core import models
+from core import images, models
 
 
 class ModelTests(TestCase):
@@ -72,14 +76,28 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(vehicle), vehicle.vehicle_name)
 
-    @patch('core.models.uuid.uuid4')
-    def test_vehicle_file_name_uuid(self, mock_uuid):
+    def test_vehicle_image_file_path(self):
         """Test generating image path."""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
         file_path = models.vehicle_image_file_path(None, 'example.jpg')
 
-        self.assertEqual(file_path, f'uploads/vehicle/{uuid}.jpg')
+        self.assertEqual(file_path, 'uploads/vehicle/example.jpg')
+
+    def test_vehicle_image_named_by_content(self):
+        """Test image files are named by content and stored once."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storage = images.ContentAddressedStorage(location=location)
+        digest = hashlib.sha256(b'image').hexdigest()
+
+        first = storage.save('uploads/vehicle/a.JPG', ContentFile(b'image'))
+        second = storage.save('uploads/vehicle/b.jpg', ContentFile(b'image'))
+
+        self.assertEqual(first, f'uploads/vehicle/{digest[:2]}/{digest}.jpg')
+        self.assertEqual(second, first)
+        self.assertEqual(
+            os.listdir(os.path.dirname(storage.path(first))),
+            [f'{digest}.jpg'],
+        )
 
     def test_create_customer(self):
         """Test creating a customer is successful."""
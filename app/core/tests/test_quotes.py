@@ -0,0 +1,63 @@
+"""
+Tests for the rental quote engine.
+"""
+from datetime import date
+
+import numpy as np
+
+from django.test import SimpleTestCase
+
+from core.quotes import decompose, format_price, price
+
+
+class QuoteTests(SimpleTestCase):
+    """Test splitting periods and pricing them."""
+
+    def test_decompose_whole_months(self):
+        """Test a period is split in whole months and left over days."""
+        self.assertEqual(decompose(date(2023, 1, 15), date(2023, 3, 20)),
+                         (2, 5))
+        self.assertEqual(decompose(date(2023, 1, 15), date(2023, 2, 14)),
+                         (0, 30))
+        self.assertEqual(decompose(date(2023, 1, 15), date(2023, 2, 15)),
+                         (1, 0))
+
+    def test_decompose_month_end(self):
+        """Test months from a late day end on the last day of short months."""
+        self.assertEqual(decompose(date(2023, 1, 31), date(2023, 2, 28)),
+                         (1, 0))
+        self.assertEqual(decompose(date(2023, 1, 31), date(2023, 3, 30)),
+                         (1, 30))
+        self.assertEqual(decompose(date(2023, 12, 31), date(2024, 3, 1)),
+                         (2, 1))
+
+    def test_price_rows(self):
+        """Test each vehicle is priced at its own rates."""
+        rates = np.array([
+            [10000, 12000, 280000, 300000],
+            [25500, 30000, 500000, 600000],
+        ], dtype=np.int64)
+
+        prices = price(rates, 2, 5)
+
+        self.assertEqual(prices.tolist(), [
+            [610000, 660000],
+            [1127500, 1350000],
+        ])
+
+    def test_days_capped_at_month(self):
+        """Test left over days never cost more than a month."""
+        rates = np.array([[10000, 12000, 200000, 300000]], dtype=np.int64)
+
+        self.assertEqual(price(rates, 0, 25).tolist(), [[200000, 300000]])
+
+    def test_format_price(self):
+        """Test prices are written with three decimal places."""
+        self.assertEqual(format_price(1127500), '1127.500')
+        self.assertEqual(format_price(7), '0.007')
+
+    def test_format_negative_price(self):
+        """Test negative prices keep their sign and digits."""
+        self.assertEqual(format_price(-1500), '-1.500')
+        self.assertEqual(format_price(-7), '-0.007')
+        self.assertEqual(format_price(0), '0.000')
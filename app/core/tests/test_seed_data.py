@@ -0,0 +1,148 @@
+"""
+Tests for the seed_data management command.
+"""
+from io import StringIO
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from core.models import (
+    Vehicle,
+    Customer,
+    Agreement,
+    VehicleMonthlySummary,
+)
+from core.seeding import generate_agreements, generate_customers
+from core.summaries import rebuild_summaries
+
+
+def seed(**options):
+    """Run the command and return its output."""
+    out = StringIO()
+    params = {
+        'users': 2,
+        'vehicles': 20,
+        'customers': 30,
+        'agreements': 200,
+        'workers': 0,
+    }
+    params.update(options)
+    call_command('seed_data', stdout=out, **params)
+
+    return out.getvalue()
+
+
+class GenerateTests(SimpleTestCase):
+    """Test the synthetic rows generated."""
+
+    def test_rentals_of_vehicle_do_not_overlap(self):
+        """Test a vehicle's rentals follow each other, the last may be open."""
+        columns, vehicle, _, rented = generate_agreements(
+            np.random.default_rng(1), 2000, 50, 80)
+        checkin, checkout = columns[3], columns[4]
+
+        self.assertEqual(checkin, sorted(checkin))
+        periods = {}
+        for i, number in enumerate(vehicle.tolist()):
+            periods.setdefault(number, []).append((checkin[i], checkout[i]))
+        for number, rentals in periods.items():
+            for (_, end), (start, _) in zip(rentals, rentals[1:]):
+                self.assertNotEqual(end, '\\N')
+                self.assertLessEqual(end, start)
+        self.assertEqual(
+            sorted(rented.tolist()),
+            sorted(n for n, rentals in periods.items()
+                   if rentals[-1][1] == '\\N'),
+        )
+        self.assertTrue(len(rented))
+
+    def test_same_seed_same_rows(self):
+        """Test the rows depend only on the seed."""
+        first = generate_customers(np.random.default_rng([3, 0]), 100)
+        second = generate_customers(np.random.default_rng([3, 0]), 100)
+        other = generate_customers(np.random.default_rng([3, 1]), 100)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+
+class SeedDataTests(TestCase):
+    """Test seeding tenants in process."""
+
+    def test_seed_tenants(self):
+        """Test each tenant gets the rows asked for with their mix."""
+        out = seed()
+
+        self.assertIn('Seeded 500 rows for 2 users', out)
+        users = get_user_model().objects.filter(
+            email__startswith='seed-0-')
+        self.assertEqual(users.count(), 2)
+        for user in users:
+            self.assertFalse(user.has_usable_password())
+            self.assertEqual(Vehicle.objects.filter(user=user).count(), 20)
+            self.assertEqual(Customer.objects.filter(user=user).count(), 30)
+            agreements = Agreement.objects.filter(user=user)
+            self.assertEqual(agreements.count(), 200)
+            self.assertTrue(agreements.filter(
+                checkout_date__isnull=True).exists())
+            # Open agreements keep their vehicles rented.
+            self.assertEqual(
+                set(agreements.filter(checkout_date__isnull=True)
+                    .values_list('vehicle', flat=True)),
+                set(Vehicle.objects.filter(user=user, status='Rented')
+                    .values_list('id', flat=True)),
+            )
+            repeat = Customer.objects.filter(user=user).annotate(
+                rentals=Count('agreement_customer')).filter(rentals__gt=1)
+            self.assertTrue(repeat.exists())
+
+    def test_summaries_rebuilt(self):
+        """Test the seeded tenants' summaries match a rebuild."""
+        seed(users=1)
+        summaries = list(VehicleMonthlySummary.objects.order_by(
+            'vehicle', 'month').values_list(
+                'vehicle', 'month', 'rentals', 'rental_days', 'revenue'))
+
+        rebuild_summaries()
+
+        self.assertTrue(summaries)
+        self.assertEqual(summaries, list(
+            VehicleMonthlySummary.objects.order_by(
+                'vehicle', 'month').values_list(
+                    'vehicle', 'month', 'rentals', 'rental_days',
+                    'revenue')))
+
+    def test_seed_used_error(self):
+        """Test a seed cannot be used twice."""
+        seed(users=1, agreements=0)
+
+        with self.assertRaisesMessage(CommandError, 'already used'):
+            seed(users=1)
+
+    def test_agreements_need_vehicles_error(self):
+        """Test agreements cannot be seeded without vehicles."""
+        with self.assertRaises(CommandError):
+            seed(vehicles=0)
+
+
+class ParallelSeedDataTests(TransactionTestCase):
+    """Test seeding tenants in worker processes."""
+
+    def test_workers_and_deferred_indexes(self):
+        """Test workers seed the tenants and indexes are rebuilt."""
+        out = seed(seed=1, workers=2, defer_indexes=True)
+
+        self.assertIn('Seeded 500 rows for 2 users', out)
+        self.assertEqual(Agreement.objects.count(), 400)
+        with self.assertNumQueries(1):
+            indexes = Agreement.objects.raw(
+                "SELECT 1 AS id, indexname FROM pg_indexes "
+                "WHERE tablename = 'core_agreement'")
+            names = {row.indexname for row in indexes}
+        for index in Agreement._meta.indexes:
+            self.assertIn(index.name, names)
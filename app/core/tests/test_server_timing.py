@@ -0,0 +1,149 @@
+"""
+Tests for the Server-Timing middleware.
+"""
+import json
+import re
+import time
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from core.models import Vehicle
+from core.tests.helpers import create_user, create_vehicle
+from core.timing import finish_request, start_request, timed
+from rent.serializers import VehicleDetailSerializer
+from rent.views import VehicleViewSet
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+
+TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def detail_url(vehicle_id):
+    """Create and return a vehicle detail URL."""
+    return reverse('rent:vehicle-detail', args=[vehicle_id])
+
+
+def parse_timing(header):
+    """Return the durations and query count of a Server-Timing header."""
+    durations, queries = {}, None
+    for name, duration, count in TIMING_RE.findall(header):
+        durations[name] = float(duration)
+        if count:
+            queries = int(count)
+
+    return durations, queries
+
+
+class ServerTimingTests(TestCase):
+    """Test requests report where their time went."""
+
+    def setUp(self):
+        self.user = create_user()
+        token = Token.objects.create(user=self.user)
+        self.auth = f'Token {token.key}'
+        create_vehicle(self.user)
+
+    def test_header_reports_timings(self):
+        """Test the header counts the queries and times each part."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(VEHICLES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        durations, count = parse_timing(res['Server-Timing'])
+        self.assertEqual(
+            list(durations), ['db', 'auth', 'serialize', 'view', 'total'])
+        self.assertEqual(count, len(queries))
+        self.assertGreater(durations['auth'], 0)
+        self.assertLessEqual(durations['view'], durations['total'])
+        self.assertLessEqual(
+            durations['db'] + durations['auth'] + durations['serialize'],
+            durations['view'] + 0.2,
+        )
+
+    def test_serialize_times_serializer_only(self):
+        """Test serialize is the serializer's time, not the view's."""
+        vehicle = Vehicle.objects.get()
+        to_representation = VehicleDetailSerializer.to_representation
+        get_queryset = VehicleViewSet.get_queryset
+
+        def slow_serializer(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        def slow_queryset(view):
+            time.sleep(0.2)
+            return get_queryset(view)
+
+        with patch.object(
+                VehicleDetailSerializer, 'to_representation',
+                slow_serializer), \
+                patch.object(VehicleViewSet, 'get_queryset', slow_queryset):
+            res = self.client.get(
+                detail_url(vehicle.id), HTTP_AUTHORIZATION=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        durations, _ = parse_timing(res['Server-Timing'])
+        self.assertGreaterEqual(durations['serialize'], 50)
+        self.assertLess(durations['serialize'], 200)
+        self.assertGreaterEqual(durations['view'], 250)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_header_disabled(self):
+        """Test the header can be turned off."""
+        res = self.client.get(VEHICLES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_SQL=2)
+    def test_slow_request_logged(self):
+        """Test slow requests are logged with their slowest statements."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(VEHICLES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        record = json.loads(logs.records[0].getMessage().split(' ', 2)[2])
+        self.assertEqual(record['path'], VEHICLES_URL)
+        self.assertEqual(record['status'], status.HTTP_200_OK)
+        self.assertGreater(record['queries'], 2)
+        slowest = record['slowest_sql']
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]['ms'], slowest[1]['ms'])
+        self.assertNotIn('user@example.com', json.dumps(record))
+
+    @override_settings(SLOW_REQUEST_MS=60000)
+    def test_fast_request_not_logged(self):
+        """Test requests under the threshold are not logged."""
+        with patch('core.middleware.logger') as logger:
+            self.client.get(VEHICLES_URL, HTTP_AUTHORIZATION=self.auth)
+
+        logger.warning.assert_not_called()
+
+    async def test_async_requests(self):
+        """Test requests served through ASGI are timed."""
+        res = await AsyncClient().get(VEHICLES_URL, authorization=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        durations, count = parse_timing(res['Server-Timing'])
+        self.assertGreater(count, 0)
+        self.assertGreater(durations['view'], 0)
+
+    def test_timed_excludes_queries(self):
+        """Test spans leave out the time of the queries made in them."""
+        token = start_request(5)
+        try:
+            with timed('work'):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_sleep(0.05)')
+        finally:
+            timings = finish_request(token)
+
+        self.assertEqual(timings.queries, 1)
+        self.assertGreaterEqual(timings.db, 0.05)
+        self.assertLess(timings.spans['work'], 0.05)
@@ -0,0 +1,235 @@
+"""
+Tests for the monthly rental summaries.
+"""
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from core.models import (
+    CustomerMonthlySummary,
+    Vehicle,
+    VehicleMonthlySummary,
+)
+from core.summaries import rebuild_summaries
+from core.tests.helpers import (
+    create_user,
+    create_vehicle,
+    create_customer,
+    create_agreement,
+    summary_rows,
+)
+
+
+class SummaryTests(TestCase):
+    """Test the summaries follow agreements and vehicle rates."""
+
+    def setUp(self):
+        self.user = create_user()
+        # February's 28 days cost 10.00 each at the monthly rate.
+        self.vehicle = create_vehicle(
+            self.user, monthly_min_rate=Decimal('280.00'))
+        self.customer = create_customer(self.user)
+
+    def vehicle_months(self, vehicle=None):
+        """Return the (month, rentals, days, revenue) rows of a vehicle."""
+        return list(VehicleMonthlySummary.objects.filter(
+            vehicle=vehicle or self.vehicle,
+        ).order_by('month').values_list(
+            'month', 'rentals', 'rental_days', 'revenue'))
+
+    def assertRebuildUnchanged(self):
+        """Assert rebuilding the summaries from scratch changes nothing."""
+        rows = summary_rows()
+        rebuild_summaries()
+        self.assertEqual(summary_rows(), rows)
+
+    def test_daily_rental_split_by_month(self):
+        """Test days and revenue are counted in the months they fall in."""
+        create_agreement(self.user, self.vehicle, self.customer)
+
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 1, 1), 1, 2, Decimal('20.000')),
+            (date(2023, 2, 1), 0, 2, Decimal('20.000')),
+        ])
+        customer_months = CustomerMonthlySummary.objects.filter(
+            customer=self.customer).values_list('month', 'revenue')
+        self.assertEqual(sorted(customer_months), [
+            (date(2023, 1, 1), Decimal('20.000')),
+            (date(2023, 2, 1), Decimal('20.000')),
+        ])
+        self.assertRebuildUnchanged()
+
+    def test_monthly_rental_prorated(self):
+        """Test monthly rentals cost the monthly rate per calendar month."""
+        create_agreement(
+            self.user, self.vehicle, self.customer,
+            rent_type='Monthly',
+            checkin_date=date(2023, 2, 1),
+            checkout_date=date(2023, 3, 16),
+        )
+
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 2, 1), 1, 28, Decimal('280.000')),
+            (date(2023, 3, 1), 0, 15, Decimal('135.484')),
+        ])
+        self.assertRebuildUnchanged()
+
+    def test_open_agreement_counts_rental_only(self):
+        """Test an agreement not checked out has no days or revenue."""
+        agreement = create_agreement(
+            self.user, self.vehicle, self.customer, checkout_date=None)
+
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 1, 1), 1, 0, Decimal('0.000')),
+        ])
+
+        agreement.checkout_date = date(2023, 2, 1)
+        agreement.save()
+
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 1, 1), 1, 2, Decimal('20.000')),
+        ])
+        self.assertRebuildUnchanged()
+
+    def test_changed_agreement_moves(self):
+        """Test changing an agreement moves it between summary rows."""
+        other = create_vehicle(self.user, registration_no='2')
+        create_agreement(self.user, self.vehicle, self.customer)
+        moved = create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 3, 1),
+            checkout_date=date(2023, 3, 5),
+        )
+
+        moved.vehicle = other
+        moved.checkin_date = date(2023, 4, 1)
+        moved.checkout_date = date(2023, 4, 4)
+        moved.save()
+
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 1, 1), 1, 2, Decimal('20.000')),
+            (date(2023, 2, 1), 0, 2, Decimal('20.000')),
+        ])
+        self.assertEqual(self.vehicle_months(other), [
+            (date(2023, 4, 1), 1, 3, Decimal('30.000')),
+        ])
+        self.assertRebuildUnchanged()
+
+    def test_deleted_agreement_removed(self):
+        """Test deleting an agreement removes its emptied summary rows."""
+        create_agreement(self.user, self.vehicle, self.customer)
+        deleted = create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 5, 1),
+            checkout_date=date(2023, 5, 3),
+        )
+
+        deleted.delete()
+
+        self.assertEqual([row[0] for row in self.vehicle_months()], [
+            date(2023, 1, 1),
+            date(2023, 2, 1),
+        ])
+        self.assertRebuildUnchanged()
+
+    def test_rate_change_updates_revenue(self):
+        """Test changing a vehicle's rates re-estimates its revenue."""
+        create_agreement(self.user, self.vehicle, self.customer)
+
+        self.vehicle.daily_min_rate = Decimal('15.000')
+        self.vehicle.save()
+
+        revenue = [row[3] for row in self.vehicle_months()]
+        self.assertEqual(revenue, [Decimal('30.000'), Decimal('30.000')])
+        self.assertRebuildUnchanged()
+
+    def test_other_vehicle_changes_skip_summaries(self):
+        """Test saving a vehicle without new rates leaves summaries alone."""
+        create_agreement(self.user, self.vehicle, self.customer)
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        vehicle.status = 'Rented'
+
+        # UPDATE only, the version is bumped on commit.
+        with self.assertNumQueries(1):
+            vehicle.save()
+
+    def test_agreements_before_migration_summarized(self):
+        """Test agreements made before the summary tables are summarized."""
+        agreement = create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 1, 10),
+            checkout_date=date(2023, 1, 14),
+        )
+        other = create_vehicle(self.user)
+        create_agreement(
+            self.user, other, self.customer,
+            rent_type='Monthly',
+            checkin_date=date(2023, 1, 20),
+            checkout_date=date(2023, 3, 5),
+        )
+        create_agreement(
+            self.user, other, self.customer,
+            checkin_date=date(2023, 4, 1),
+            checkout_date=None,
+        )
+        expected = summary_rows()
+        VehicleMonthlySummary.objects.all().delete()
+        CustomerMonthlySummary.objects.all().delete()
+        migration = import_module('core.migrations.0014_monthly_summaries')
+
+        with connection.schema_editor() as schema_editor:
+            migration.summarize_agreements(apps, schema_editor)
+
+        self.assertEqual(summary_rows(), expected)
+        agreement.checkin_date = date(2023, 3, 10)
+        agreement.checkout_date = date(2023, 3, 14)
+        agreement.save()
+        self.assertEqual(self.vehicle_months(), [
+            (date(2023, 3, 1), 1, 4, Decimal('40.000')),
+        ])
+
+    def test_rebuild_command(self):
+        """Test the command recomputes summaries that drifted."""
+        create_agreement(self.user, self.vehicle, self.customer)
+        expected = summary_rows()
+        VehicleMonthlySummary.objects.update(revenue=0)
+        CustomerMonthlySummary.objects.all().delete()
+        out = StringIO()
+
+        call_command('rebuild_summaries', stdout=out)
+
+        self.assertEqual(summary_rows(), expected)
+        self.assertIn('Rebuilt 2 vehicle and 2 customer', out.getvalue())
+
+    def test_rebuild_command_for_user(self):
+        """Test the command can rebuild the summaries of some users."""
+        create_agreement(self.user, self.vehicle, self.customer)
+        other = create_user(email='other@example.com')
+        create_agreement(
+            other, create_vehicle(other), create_customer(other),
+            checkin_date=date(2023, 1, 1),
+            checkout_date=date(2023, 1, 2),
+        )
+        VehicleMonthlySummary.objects.update(revenue=0)
+
+        call_command(
+            'rebuild_summaries', user=['user@example.com'], stdout=StringIO())
+
+        revenue = dict(VehicleMonthlySummary.objects.values_list(
+            'user', 'revenue').filter(month=date(2023, 1, 1)))
+        self.assertEqual(revenue, {
+            self.user.id: Decimal('20.000'),
+            other.id: Decimal('0.000'),
+        })
+
+    def test_rebuild_command_unknown_user(self):
+        """Test the command rejects users that do not exist."""
+        with self.assertRaises(CommandError):
+            call_command('rebuild_summaries', user=['nobody@example.com'])
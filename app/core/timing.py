@@ -0,0 +1,108 @@
+"""
+Per-request timings reported by ServerTimingMiddleware.
+
+The timings of the current request live in a context variable, which
+follows a request onto the threads its view runs on. Every database
+connection runs its queries through record_query(), so the queries and
+their time are counted wherever they are made, and timed() adds the
+time spent in a block, less its queries, to a named span.
+"""
+import contextvars
+import heapq
+import itertools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Queries, database time and spans of one request, in seconds."""
+
+    def __init__(self, slowest):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.db = 0.0
+        self.spans = defaultdict(float)
+        self._slowest = slowest
+        self._statements = []
+        self._order = itertools.count()
+
+    def add_query(self, sql, duration):
+        """Count a query and keep it if it is among the slowest."""
+        self.queries += 1
+        self.db += duration
+        if self._slowest <= 0:
+            return
+        entry = (duration, next(self._order), sql)
+        if len(self._statements) < self._slowest:
+            heapq.heappush(self._statements, entry)
+        else:
+            heapq.heappushpop(self._statements, entry)
+
+    def slowest_statements(self):
+        """Return (seconds, sql) of the slowest queries, slowest first."""
+        return [
+            (duration, sql) for duration, _, sql
+            in sorted(self._statements, reverse=True)
+        ]
+
+
+def start_request(slowest):
+    """Start timing a request, return the token to finish it with."""
+    return _current.set(RequestTimings(slowest))
+
+
+def finish_request(token):
+    """Stop timing the request started with token and return its timings."""
+    timings = _current.get()
+    _current.reset(token)
+
+    return timings
+
+
+def current_timings():
+    """Return the timings of the current request, or None."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute a query, adding it to the current request's timings."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block, less its queries, to span name."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started, db = time.perf_counter(), timings.db
+    try:
+        yield
+    finally:
+        timings.spans[name] += \
+            time.perf_counter() - started - (timings.db - db)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Record the queries of every new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,58 @@
+"""
+Per-user version counters of the rent resources.
+
+Every change to a user's vehicles, customers or agreements bumps the
+counter of that model once its transaction commits, so a reader that
+sees a version also sees every change made up to it. Bumping after the
+commit holds the counter row's lock for one statement only, instead of
+queueing every write of a user's model behind the open transactions
+writing to it. Clients use the counter to tell whether anything changed
+without running the query.
+"""
+from functools import partial
+
+from django.db import connection, transaction
+
+from core.models import ResourceVersion
+
+
+def resource_name(model):
+    """Return the name a model's version counter is stored under."""
+    return model._meta.label_lower
+
+
+def get_versions(user_id, models):
+    """Return the current versions of a user's objects of each of models."""
+    names = [resource_name(model) for model in models]
+    versions = dict(ResourceVersion.objects.filter(
+        user_id=user_id,
+        resource__in=names,
+    ).values_list('resource', 'version'))
+
+    return [versions.get(name, 0) for name in names]
+
+
+def bump_version(user_ids, model):
+    """Bump the versions of model for each of user_ids on commit.
+
+    Outside a transaction the versions are bumped right away.
+    """
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        transaction.on_commit(
+            partial(_bump, user_ids, resource_name(model)))
+
+
+def _bump(user_ids, resource):
+    """Bump the versions of resource for each of user_ids."""
+    # Sorted ids lock the counter rows in the same order in every
+    # transaction, so concurrent bumps cannot deadlock.
+    table = ResourceVersion._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, resource, version) '
+            f'SELECT user_id, %s, 1 FROM unnest(%s::bigint[]) AS user_id '
+            f'ON CONFLICT (user_id, resource) '
+            f'DO UPDATE SET version = {table}.version + 1',
+            [resource, user_ids],
+        )
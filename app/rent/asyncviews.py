@@ -0,0 +1,107 @@
+"""
+Async entry points of the rent APIs for the ASGI server mode.
+
+Under ASGI, Django 3.2 runs every sync view of a process on one shared
+thread, so one slow query holds up every request, while DRF 3.12 views
+and the ORM can only run synchronously. The async views below wrap the
+rent viewsets instead: reads and image uploads run on a pool of
+ASYNC_VIEW_THREADS threads, each with its own database connection, and
+the event loop keeps receiving bodies from and sending responses to slow
+clients meanwhile. Other writes run where Django runs sync views.
+"""
+import asyncio
+import contextvars
+import functools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import FileWrapper
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from rest_framework.permissions import SAFE_METHODS
+
+
+# Actions run on the pool whatever their method.
+POOLED_ACTIONS = {'upload_image'}
+
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEW_THREADS,
+    thread_name_prefix='rent-view',
+)
+
+
+def _spool(response):
+    """Read a streaming response's content into a temporary file.
+
+    Django 3.2 iterates streaming content on the event loop, where the
+    database cannot be used, so the rows are read here and the file is
+    streamed instead. Memory use stays bounded by spilling to disk.
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    try:
+        for chunk in response.streaming_content:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    response.streaming_content = FileWrapper(spool, SPOOL_CHUNK_SIZE)
+
+
+def _run_pooled(view, request, *args, **kwargs):
+    """Run view on a pool thread and return its finished response."""
+    # The request signals only manage the connection of Django's thread.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        if response.streaming:
+            _spool(response)
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Return an async view answering view's reads on the thread pool."""
+    actions = getattr(view, 'actions', None) or {}
+    pooled = {
+        method.upper() for method, name in actions.items()
+        if name in POOLED_ACTIONS
+    }
+    run_sync = sync_to_async(view, thread_sensitive=True)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS and \
+                request.method not in pooled:
+            return await run_sync(request, *args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(
+            _run_pooled, view, request, *args, **kwargs)
+        return await loop.run_in_executor(
+            executor, contextvars.copy_context().run, call)
+
+    return wrapper
+
+
+def async_urlpatterns(urlpatterns):
+    """Return urlpatterns with every view wrapped by async_view()."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,141 @@
+"""
+HTTP load helpers shared by the benchmark commands.
+"""
+import asyncio
+import io
+import itertools
+import time
+
+from PIL import Image
+
+
+BOUNDARY = 'bench-boundary'
+
+
+def percentile(latencies, fraction):
+    """Return the fraction percentile of sorted latencies."""
+    if not latencies:
+        return 0.0
+
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def http_request(method, path, host, headers=None, body=b''):
+    """Return the bytes of an HTTP/1.1 request."""
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {host}']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    if body or method not in ('GET', 'HEAD'):
+        lines.append(f'Content-Length: {len(body)}')
+
+    return '\r\n'.join(lines + ['', '']).encode() + body
+
+
+def image_upload():
+    """Return the content type and body of a multipart JPEG upload."""
+    image = io.BytesIO()
+    Image.new('RGB', (640, 480), color='red').save(image, format='JPEG')
+    body = (
+        f'--{BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="image"; '
+        f'filename="bench.jpg"\r\n'
+        f'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + image.getvalue() + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+    return f'multipart/form-data; boundary={BOUNDARY}', body
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response and return (status, keep alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by the server.')
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value != 'close'
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+
+    return status, keep_alive
+
+
+async def drive(host, port, build, concurrency, duration, first=0):
+    """Send requests over keep-alive connections for duration seconds.
+
+    build is called with increasing numbers from first and returns the
+    bytes of each request. Return the number of requests, of failed ones
+    (connection errors or non 2xx statuses), the elapsed seconds and the
+    sorted latencies.
+    """
+    numbers = itertools.count(first)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        reader = writer = None
+        while time.monotonic() < deadline:
+            request = build(next(numbers))
+            started = time.perf_counter()
+            reused = writer is not None
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await read_response(reader)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                # Servers may close idle keep-alive connections.
+                if not reused:
+                    errors += 1
+                status, keep_alive = None, False
+            else:
+                latencies.append(time.perf_counter() - started)
+                if not 200 <= status < 300:
+                    errors += 1
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    latencies.sort()
+
+    return len(latencies), errors, time.monotonic() - started, latencies
+
+
+def summarize(requests, errors, elapsed, latencies):
+    """Return the throughput and latency percentiles, in ms, of a run."""
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rate': requests / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+    }
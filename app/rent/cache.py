@@ -0,0 +1,68 @@
+"""
+Cache of rendered rent API responses.
+
+Entries are keyed by the response ETag, which covers the user, the
+model's version counter, the path with its query string and the media
+type. Saving or deleting an object bumps the version through the model
+signals, so entries of changed resources are never read again and age
+out of the cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core.metrics import count_lookup
+
+
+HITS_KEY = 'rent:response-cache:hits'
+MISSES_KEY = 'rent:response-cache:misses'
+
+
+def _key(etag):
+    """Return the cache key of the response with etag."""
+    return f'rent:response:{etag.strip(chr(34))}'
+
+
+def _count(key):
+    """Increment the counter key."""
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr, count it again from here.
+        cache.add(key, 1, timeout=None)
+
+
+def get_response(etag):
+    """Return the cached response with etag, or None on a miss."""
+    cached = cache.get(_key(etag))
+    _count(MISSES_KEY if cached is None else HITS_KEY)
+    count_lookup('response', cached is not None)
+    if cached is None:
+        return None
+
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def store_response(etag, response):
+    """Cache the rendered response under etag."""
+    cache.set(
+        _key(etag),
+        (response.content, response['Content-Type']),
+        settings.RESPONSE_CACHE_TIMEOUT,
+    )
+
+
+def get_stats():
+    """Return the hit and miss counts of the cache."""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    total = hits + misses
+
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
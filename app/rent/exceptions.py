@@ -0,0 +1,27 @@
+"""
+Exceptions for the rent APIs.
+"""
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ErrorDetail
+
+
+class BookingConflict(APIException):
+    """The vehicle is already rented for an overlapping period."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _('Vehicle is already rented for these dates.')
+    default_code = 'booking_conflict'
+
+    def __init__(self, conflicting_agreement=None):
+        self.detail = {
+            'detail': ErrorDetail(self.default_detail, self.default_code),
+            'conflicting_agreement': conflicting_agreement,
+        }
+
+
+class UploadTooLarge(APIException):
+    """The uploaded file is larger than allowed."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('Uploaded file is too large.')
+    default_code = 'upload_too_large'
@@ -0,0 +1,131 @@
+"""
+Fast JSON rendering of list pages for the rent APIs.
+
+List pages are read with ``.values()`` for exactly the serializer's fields
+and encoded with orjson, skipping the per-field ``ModelSerializer``
+machinery. The bytes are the same as ``JSONRenderer`` writes for the
+serializer's output.
+"""
+import orjson
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from rent.serializers import ImageRenditionsField
+
+
+# Fields whose database value is already what the serializer outputs;
+# dates are written by orjson in the same ISO 8601 format. Subclasses
+# overriding to_representation are not plain.
+PLAIN_REPRESENTATIONS = {
+    serializers.BooleanField.to_representation,
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    PrimaryKeyRelatedField.to_representation,
+}
+
+
+def format_decimal(value):
+    """Return a decimal as DecimalField writes it.
+
+    Values read from a numeric column already have the column's scale,
+    which the model serializer gives the field, so no quantizing is done.
+    """
+    return '{:f}'.format(value)
+
+
+def _encoder(field):
+    """Return how the value of field is encoded, or False if it cannot be.
+
+    None means the value is used as it is.
+    """
+    if isinstance(field, ImageRenditionsField):
+        return field.to_representation
+    if isinstance(field, serializers.DecimalField):
+        coerce_to_string = getattr(
+            field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if coerce_to_string and not field.localize:
+            return format_decimal
+        return False
+    if isinstance(field, serializers.DateField):
+        if type(field).to_representation is not \
+                serializers.DateField.to_representation:
+            return False
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        return None if output_format in (ISO_8601, None) else False
+    if isinstance(field, PrimaryKeyRelatedField) and field.pk_field:
+        return False
+
+    if type(field).to_representation in PLAIN_REPRESENTATIONS:
+        return None
+    return False
+
+
+def row_encoders(serializer, prefix=''):
+    """Return (name, source, encode) for each field of serializer.
+
+    A nested serializer's encode is the list of its own encoders, whose
+    sources are the related columns. Returns None if a field has no fast
+    equivalent, so the caller falls back to the serializer.
+    """
+    encoders = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if '.' in field.source:
+            return None
+        if isinstance(field, serializers.ListSerializer):
+            return None
+        if isinstance(field, serializers.BaseSerializer):
+            encode = row_encoders(field, f'{prefix}{field.source}__')
+            if encode is None:
+                return None
+        else:
+            encode = _encoder(field)
+            if encode is False:
+                return None
+        encoders.append((name, prefix + field.source, encode))
+
+    return encoders
+
+
+def encoder_columns(encoders):
+    """Return the columns encoders read, related columns included."""
+    columns = []
+    for _, source, encode in encoders:
+        columns.append(source)
+        if isinstance(encode, list):
+            columns += encoder_columns(encode)
+
+    return columns
+
+
+def encode_row(row, encoders):
+    """Return the serializer output for a row read with ``.values()``."""
+    item = {}
+    for name, source, encode in encoders:
+        value = row[source]
+        if value is None or encode is None:
+            item[name] = value
+        elif isinstance(encode, list):
+            item[name] = encode_row(row, encode)
+        else:
+            item[name] = encode(value)
+
+    return item
+
+
+def encode_rows(rows, encoders):
+    """Return the serializer output for rows read with ``.values()``."""
+    return [encode_row(row, encoders) for row in rows]
+
+
+def render_json(data):
+    """Return data as JSONRenderer writes it with its default settings."""
+    # JSONRenderer escapes these two for use in JavaScript.
+    return orjson.dumps(data).replace(
+        b'\xe2\x80\xa8', b'\\u2028',
+    ).replace(
+        b'\xe2\x80\xa9', b'\\u2029',
+    )
@@ -0,0 +1,175 @@
+"""
+Filter backends for the rent APIs.
+"""
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.functions import Cast, Greatest
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import (
+    BaseFilterBackend,
+    OrderingFilter,
+    SearchFilter,
+)
+
+
+SCHEMA_TYPES = [
+    (serializers.BooleanField, {'type': 'boolean'}),
+    (serializers.IntegerField, {'type': 'integer'}),
+    (serializers.DecimalField, {'type': 'string', 'format': 'decimal'}),
+    (serializers.DateField, {'type': 'string', 'format': 'date'}),
+]
+
+
+class QueryParamsFilter(BaseFilterBackend):
+    """Filter by the query parameters of the view's filter serializer.
+
+    The view's filter_serializer_class validates the parameters and
+    applies them; invalid values are answered with a 400.
+    """
+
+    def get_filter_serializer(self, request, view):
+        """Return the validated filter serializer of view, or None."""
+        serializer_class = getattr(view, 'filter_serializer_class', None)
+        if serializer_class is None:
+            return None
+
+        serializer = serializer_class(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def filter_queryset(self, request, queryset, view):
+        serializer = self.get_filter_serializer(request, view)
+        if serializer is None:
+            return queryset
+
+        return serializer.filter_queryset(queryset)
+
+    def get_schema_operation_parameters(self, view):
+        serializer_class = getattr(view, 'filter_serializer_class', None)
+        if serializer_class is None:
+            return []
+
+        parameters = []
+        for name, field in serializer_class().fields.items():
+            schema = next(
+                (schema for field_class, schema in SCHEMA_TYPES
+                 if isinstance(field, field_class)),
+                {'type': 'string'},
+            )
+            parameters.append({
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': str(field.help_text or ''),
+                'schema': schema,
+            })
+
+        return parameters
+
+
+class WordSimilarity(Func):
+    """Return how similar a query is to the closest words of a column."""
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+
+class WordSimilar(Func):
+    """``query <% column``, the indexable form of a word similarity match."""
+    arg_joiner = ' <%% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class ILike(Func):
+    """``column ILIKE pattern``, which a trigram index can serve."""
+    arg_joiner = ' ILIKE '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class TrigramSearchFilter(SearchFilter):
+    """Keep the rows of the view's search_fields matching ``?search=``.
+
+    A row matches when the query is part of a field, or, for fields
+    prefixed with ``%``, is similar to some of its words so that typos
+    in names are forgiven; the fields' trigram GIN index serves both.
+    Matches are annotated with their best word similarity as
+    ``search_rank``, which KeysetOrderingFilter orders by.
+    """
+    min_length = 3
+    rank_field = 'search_rank'
+
+    def get_search_query(self, request, view):
+        """Return the search query of request, or None."""
+        if not getattr(view, 'search_fields', None):
+            return None
+
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return None
+        if len(query) < self.min_length:
+            msg = _('Search for at least %(min)d characters.') % {
+                'min': self.min_length,
+            }
+            raise ValidationError({self.search_param: [msg]})
+
+        return query
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request, view)
+        if query is None:
+            return queryset
+
+        pattern = '%{}%'.format(connection.ops.prep_for_like_query(query))
+        condition = Q()
+        ranks = []
+        for search_field in view.search_fields:
+            field = search_field.lstrip('%')
+            if search_field.startswith('%'):
+                condition |= Q(WordSimilar(Value(query), F(field)))
+            condition |= Q(ILike(F(field), Value(pattern)))
+            ranks.append(WordSimilarity(Value(query), F(field)))
+        rank = Greatest(*ranks) if len(ranks) > 1 else ranks[0]
+
+        # Double precision, so the rank in a cursor compares exactly.
+        return queryset.filter(condition).annotate(**{
+            self.rank_field: Cast(rank, FloatField()),
+        })
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """Order by one of the view's ordering_fields, then by id.
+
+    The id breaks ties in the same direction, so the ordering is unique
+    and every position can be paged from with a keyset cursor. Fields
+    not in ordering_fields are rejected instead of ignored. Search
+    results are ordered by their rank instead.
+    """
+    default_ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        param = request.query_params.get(self.ordering_param)
+        search = TrigramSearchFilter()
+        if search.get_search_query(request, view) is not None:
+            if param:
+                msg = _('Search results are ordered by similarity.')
+                raise ValidationError({self.ordering_param: [msg]})
+            return ('-' + search.rank_field, '-id')
+
+        if not param:
+            return self.default_ordering
+
+        allowed = getattr(view, 'ordering_fields', ())
+        field = param.strip()
+        if field.lstrip('-') not in allowed:
+            msg = _('Order by one of: %(fields)s.') % {
+                'fields': ', '.join(allowed),
+            }
+            raise ValidationError({self.ordering_param: [msg]})
+
+        if field.lstrip('-') == 'id':
+            return (field,)
+        return (field, '-id' if field.startswith('-') else 'id')
@@ -0,0 +1,248 @@
+"""
+Django command to benchmark the API endpoints against a running server.
+"""
+import asyncio
+import json
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Vehicle, Customer, Agreement
+from core.numbering import sequence_name
+from core.seeding import seed_tenant
+from core.summaries import rebuild_summaries
+from rent.benchmarks import drive, http_request, image_upload, summarize
+
+
+EMAIL = 'bench-api@example.com'
+PASSWORD = 'bench-api-password'
+
+SCENARIOS = [
+    'vehicle-list',
+    'vehicle-detail',
+    'agreement-create',
+    'image-upload',
+    'token',
+]
+
+# Created agreements start after every seeded one.
+CREATE_START = date(2030, 1, 1)
+
+
+class Command(BaseCommand):
+    """Report throughput, latency and queries per request of the API."""
+    help = (
+        'Seed a throwaway tenant, count the queries of one request of each '
+        'scenario in process, then load --server with --concurrency '
+        'keep-alive clients per scenario and print requests per second, '
+        'p50/p95/p99 latency and queries per request. --output saves the '
+        'results as JSON and --compare prints the change from a saved run. '
+        'The tenant is deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5,
+            help='Seconds each scenario is run for.',
+        )
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument(
+            '--scenario',
+            choices=SCENARIOS,
+            action='append',
+            help='Scenario to run, repeat for several. Default all.',
+        )
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output', help='File to save results to.')
+        parser.add_argument(
+            '--compare',
+            help='Results file of an earlier run to compare with.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        parts = urlsplit(options['server'])
+        if not parts.hostname:
+            raise CommandError(f'Expected a URL, got {options["server"]}.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as results_file:
+                baseline = json.load(results_file)['scenarios']
+
+        user = get_user_model().objects.create_user(
+            email=EMAIL, password=PASSWORD)
+        try:
+            self.key = Token.objects.create(user=user).key
+            self._seed(user, max(options['rows'], 1))
+            scenarios = {}
+            for name in options['scenario'] or SCENARIOS:
+                build = getattr(self, '_' + name.replace('-', '_'))
+                queries = self._count_queries(build)
+                run = asyncio.run(drive(
+                    parts.hostname,
+                    parts.port or 80,
+                    lambda number: self._request(
+                        build(number), parts.hostname),
+                    options['concurrency'],
+                    options['duration'],
+                    first=2,
+                ))
+                scenarios[name] = dict(summarize(*run), queries=queries)
+        finally:
+            self._delete(user)
+
+        self._report(scenarios, baseline)
+        if options['output']:
+            results = {
+                'label': options['label'],
+                'created': timezone.now().isoformat(),
+                'server': options['server'],
+                'concurrency': options['concurrency'],
+                'duration': options['duration'],
+                'rows': options['rows'],
+                'scenarios': scenarios,
+            }
+            with open(options['output'], 'w') as results_file:
+                json.dump(results, results_file, indent=2)
+
+    def _seed(self, user, rows):
+        """Generate rows vehicles, customers and past agreements for user."""
+        seed_tenant(user.id, 0, 0, (rows, rows, rows))
+        # Deleting the tenant takes its agreements out of the summaries.
+        rebuild_summaries([user.id])
+        # Rented vehicles have an open agreement, new ones would overlap.
+        self.vehicles = list(Vehicle.objects.filter(
+            user=user, status='Ready').order_by('id').values_list(
+                'id', flat=True))
+        self.customers = list(Customer.objects.filter(
+            user=user).order_by('id').values_list('id', flat=True))
+
+    def _delete(self, user):
+        """Delete user and everything seeded or created for them."""
+        Agreement.objects.filter(user=user).delete()
+        Customer.objects.filter(user=user).delete()
+        Vehicle.objects.filter(user=user).delete()
+        with connection.cursor() as cursor:
+            for name in (sequence_name(user.id),
+                         sequence_name(user.id, timezone.localdate().year)):
+                cursor.execute(f'DROP SEQUENCE IF EXISTS "{name}"')
+        user.delete()
+
+    def _request(self, request, host):
+        """Return the bytes of a request built by a scenario."""
+        method, path, content_type, body = request
+        headers = {
+            'Authorization': f'Token {self.key}',
+            'Accept': 'application/json',
+        }
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        return http_request(method, path, host, headers, body)
+
+    def _count_queries(self, build):
+        """Return the queries of a scenario's request with warm caches."""
+        client = Client(HTTP_AUTHORIZATION=f'Token {self.key}')
+        for number in range(2):
+            method, path, content_type, body = build(number)
+            kwargs = {'content_type': content_type} if content_type else {}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.generic(method, path, body, **kwargs)
+            if not 200 <= response.status_code < 300:
+                raise CommandError(
+                    f'{method} {path} answered {response.status_code}.')
+
+        return len(queries)
+
+    def _vehicle_list(self, number):
+        """Return a request for the first page of vehicles."""
+        return 'GET', reverse('rent:vehicle-list'), None, b''
+
+    def _vehicle_detail(self, number):
+        """Return a request for one vehicle, a different one each time."""
+        vehicle = self.vehicles[number % len(self.vehicles)]
+
+        return 'GET', reverse('rent:vehicle-detail', args=[vehicle]), None, b''
+
+    def _agreement_create(self, number):
+        """Return a request creating a two day agreement.
+
+        Numbers walk the vehicles first and then the dates, so no two
+        created agreements overlap.
+        """
+        checkin = CREATE_START + timedelta(
+            days=2 * (number // len(self.vehicles)))
+        body = json.dumps({
+            'rent_type': 'Daily',
+            'deposit_type': 'Cash',
+            'checkin_date': checkin.isoformat(),
+            'checkout_date': (checkin + timedelta(days=1)).isoformat(),
+            'customer': self.customers[number % len(self.customers)],
+            'vehicle': self.vehicles[number % len(self.vehicles)],
+        }).encode()
+
+        return 'POST', reverse('rent:agreement-list'), 'application/json', body
+
+    def _image_upload(self, number):
+        """Return a request uploading an image to one vehicle."""
+        vehicle = self.vehicles[number % len(self.vehicles)]
+        if not hasattr(self, 'upload'):
+            self.upload = image_upload()
+        content_type, body = self.upload
+
+        return (
+            'POST',
+            reverse('rent:vehicle-upload-image', args=[vehicle]),
+            content_type,
+            body,
+        )
+
+    def _token(self, number):
+        """Return a request for the auth token of the seeded user."""
+        body = json.dumps({'email': EMAIL, 'password': PASSWORD}).encode()
+
+        return 'POST', reverse('user:token'), 'application/json', body
+
+    def _report(self, scenarios, baseline):
+        """Print the results, and their change from baseline if given."""
+        self.stdout.write(
+            f'{"scenario":<18}{"requests":>10}{"errors":>8}{"req/s":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>9}'
+        )
+        for name, result in scenarios.items():
+            self.stdout.write(
+                f'{name:<18}{result["requests"]:>10}{result["errors"]:>8}'
+                f'{result["rate"]:>10,.0f}{result["p50"]:>10.1f}'
+                f'{result["p95"]:>10.1f}{result["p99"]:>10.1f}'
+                f'{result["queries"]:>9}'
+            )
+            before = (baseline or {}).get(name)
+            if before:
+                self.stdout.write(
+                    f'{"  vs baseline":<18}{"":>18}'
+                    f'{self._change(before["rate"], result["rate"]):>10}'
+                    f'{self._change(before["p50"], result["p50"]):>10}'
+                    f'{self._change(before["p95"], result["p95"]):>10}'
+                    f'{self._change(before["p99"], result["p99"]):>10}'
+                    f'{result["queries"] - before["queries"]:>+9}'
+                )
+
+    def _change(self, before, after):
+        """Return the relative change from before to after."""
+        if not before:
+            return '-'
+
+        return f'{(after - before) / before:+.0%}'
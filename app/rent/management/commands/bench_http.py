@@ -0,0 +1,142 @@
+"""
+Django command to load test running servers of the rent APIs.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Vehicle
+from core.seeding import seed_tenant
+from rent.benchmarks import (
+    drive,
+    http_request,
+    image_upload,
+    read_response,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    """Compare server modes by throughput and tail latency."""
+    help = (
+        'Seed a throwaway tenant, load each --server with concurrent '
+        'keep-alive GETs of --path, optionally while --slow clients trickle '
+        'image uploads, and print requests per second and p50/p99 latency. '
+        'The tenant is deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--server',
+            action='append',
+            required=True,
+            help='NAME=URL of a running server, repeat to compare several.',
+        )
+        parser.add_argument('--path', default='/api/rent/vehicles/')
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument(
+            '--slow',
+            type=int,
+            default=0,
+            help='Clients uploading images slowly during the run.',
+        )
+        parser.add_argument(
+            '--slow-seconds',
+            type=float,
+            default=5,
+            help='Time each slow client takes to send an upload.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        servers = []
+        for value in options['server']:
+            name, _, url = value.partition('=')
+            parts = urlsplit(url)
+            if not name or not parts.hostname:
+                raise CommandError(f'Expected NAME=URL, got {value}.')
+            servers.append((name, parts.hostname, parts.port or 80))
+
+        user = get_user_model().objects.create_user(
+            email='bench-http@example.com')
+        try:
+            token = Token.objects.create(user=user)
+            seed_tenant(user.id, 0, 0, (max(options['rows'], 1), 0, 0))
+            vehicle = Vehicle.objects.filter(user=user).first()
+
+            self.stdout.write(
+                f'{"server":<12}{"requests":>10}{"errors":>8}{"req/s":>10}'
+                f'{"p50 ms":>10}{"p99 ms":>10}{"uploads":>9}'
+            )
+            for name, host, port in servers:
+                result = asyncio.run(self._load(
+                    host, port, token.key, vehicle.id, options))
+                self.stdout.write(
+                    f'{name:<12}{result["requests"]:>10}'
+                    f'{result["errors"]:>8}{result["rate"]:>10,.0f}'
+                    f'{result["p50"]:>10.1f}{result["p99"]:>10.1f}'
+                    f'{result["uploads"]:>9}'
+                )
+        finally:
+            Vehicle.objects.filter(user=user).delete()
+            user.delete()
+
+    async def _load(self, host, port, key, vehicle_id, options):
+        """Load one server and return its counts and latencies."""
+        request = http_request('GET', options['path'], host, {
+            'Authorization': f'Token {key}',
+            'Accept': 'application/json',
+        })
+        content_type, body = image_upload()
+        upload = http_request(
+            'POST',
+            f'/api/rent/vehicles/{vehicle_id}/upload-image/',
+            host,
+            {
+                'Authorization': f'Token {key}',
+                'Content-Type': content_type,
+                'Connection': 'close',
+            },
+            body,
+        )
+        uploads = 0
+        deadline = time.monotonic() + options['duration']
+
+        async def slow_client():
+            nonlocal uploads
+            pieces = 20
+            step = -(-len(upload) // pieces)
+            while time.monotonic() < deadline:
+                try:
+                    reader, writer = await asyncio.open_connection(host, port)
+                    for i in range(0, len(upload), step):
+                        writer.write(upload[i:i + step])
+                        await writer.drain()
+                        await asyncio.sleep(options['slow_seconds'] / pieces)
+                    status, _ = await read_response(reader)
+                    writer.close()
+                except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                    await asyncio.sleep(0.1)
+                    continue
+                if status == 200:
+                    uploads += 1
+
+        run, *_ = await asyncio.gather(
+            drive(
+                host,
+                port,
+                lambda number: request,
+                options['concurrency'],
+                options['duration'],
+            ),
+            *(slow_client() for _ in range(options['slow'])),
+        )
+
+        return dict(summarize(*run), uploads=uploads)
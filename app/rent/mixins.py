@@ -0,0 +1,489 @@
+"""
+Reusable viewset behaviour for the rent APIs.
+"""
+import csv
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.utils.translation import gettext as _
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+from core.timing import timed
+from core.versions import get_versions, resource_name
+from rent.cache import get_response, store_response
+from rent.fastpath import encode_rows, encoder_columns, row_encoders
+from rent.filters import QueryParamsFilter, TrigramSearchFilter
+from rent.renderers import ExportRenderer, FastJSONRenderer
+
+
+def is_read(view):
+    """Return whether view is answering a request that only reads."""
+    request = getattr(view, 'request', None)
+    return request is not None and request.method in SAFE_METHODS
+
+
+def is_plain_json(request):
+    """Return whether request accepts compact JSON orjson can write."""
+    renderer = request.accepted_renderer
+    return renderer.format == 'json' \
+        and request.accepted_media_type == renderer.media_type
+
+
+def ordering_fields(view, queryset):
+    """Return the names of the fields the view's pages are ordered by."""
+    get_ordering = getattr(view.paginator, 'get_ordering', None)
+    if get_ordering is None:
+        return []
+
+    ordering = get_ordering(view.request, queryset, view)
+    return [field.lstrip('-') for field in ordering]
+
+
+def requested_fields(request, allowed, param='fields'):
+    """Return the names in allowed asked for by the query, or None.
+
+    None means the query does not narrow the fields. The names keep the
+    order of allowed; unknown names raise a ValidationError.
+    """
+    value = request.query_params.get(param, '')
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    if not names:
+        return None
+
+    unknown = names.difference(allowed)
+    if unknown:
+        msg = _('Unknown fields: %(fields)s.') % {
+            'fields': ', '.join(sorted(unknown)),
+        }
+        raise ValidationError({param: [msg]})
+
+    return [name for name in allowed if name in names]
+
+
+class ConditionalGetMixin:
+    """Answer list and detail requests with ETags, 304s and cached bodies.
+
+    The ETag is derived from the user's version counters of the models
+    in the response, so an unchanged resource is answered without running
+    the query or the serializer. JSON bodies are cached under their ETag,
+    and the ``X-Cache`` header tells whether one was served from the
+    cache.
+    """
+
+    def get_etag_models(self):
+        """Return the models whose changes change the response."""
+        return [self.queryset.model]
+
+    def get_etag(self, request):
+        """Return the strong ETag of the response to request."""
+        models = self.get_etag_models()
+        versions = get_versions(request.user.pk, models)
+        key = '\n'.join([
+            str(request.user.pk),
+            *(
+                f'{resource_name(model)}:{version}'
+                for model, version in zip(models, versions)
+            ),
+            request.get_full_path(),
+            request.accepted_media_type,
+        ])
+
+        return '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        """Return 304 if the client has the current ETag, else handler's."""
+        etag = self.get_etag(request)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif request.accepted_renderer.format != 'json':
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        else:
+            response = get_response(etag)
+            if response is not None:
+                response['X-Cache'] = 'HIT'
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                response.add_post_render_callback(
+                    partial(store_response, etag))
+                response['X-Cache'] = 'MISS'
+
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ExpandMixin:
+    """Nest related objects named in ``?expand=`` in read responses.
+
+    expandable_fields maps each related field to the serializer nesting
+    it. Expanded relations are joined with select_related, so a page
+    costs the same number of queries expanded or not, and their models'
+    versions are part of the ETag. Writes ignore the parameter.
+    """
+    expandable_fields = {}
+
+    def get_expanded_fields(self):
+        """Return the names of the fields the request expands."""
+        if not is_read(self):
+            return []
+
+        return requested_fields(
+            self.request, list(self.expandable_fields), 'expand') or []
+
+    def get_etag_models(self):
+        return super().get_etag_models() + [
+            self.expandable_fields[name].Meta.model
+            for name in self.get_expanded_fields()
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        child = getattr(serializer, 'child', serializer)
+        for name in self.get_expanded_fields():
+            # Fields left out with ?fields= stay out.
+            if name in child.fields:
+                child.fields[name] = self.expandable_fields[name](
+                    read_only=True)
+
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_serializer().fields
+        expanded = [
+            name for name in self.get_expanded_fields() if name in fields
+        ]
+        if expanded:
+            queryset = queryset.select_related(*expanded)
+
+        return queryset
+
+
+class SparseFieldsMixin:
+    """Narrow read responses to the fields named in ``?fields=``.
+
+    ``?fields=id,status`` drops the other fields from the serializer.
+    Reads also defer the columns no field shows, so they are neither
+    read from the database nor sent. Writes ignore the parameter.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if not is_read(self):
+            return serializer
+
+        child = getattr(serializer, 'child', serializer)
+        readable = [
+            name for name, field in child.fields.items()
+            if not field.write_only
+        ]
+        names = requested_fields(self.request, readable)
+        if names is not None:
+            for name in set(child.fields).difference(names):
+                child.fields.pop(name)
+
+        return serializer
+
+    def _read_columns(self, serializer, model):
+        """Return the columns serializer shows, or None if unknown.
+
+        Nested serializers of related objects add the related columns.
+        """
+        columns = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            columns.append(field.source)
+            if isinstance(field, BaseSerializer):
+                related = self._read_columns(
+                    field, model_field.related_model)
+                if related is None:
+                    return None
+                columns += [f'{field.source}__{name}' for name in related]
+
+        return columns
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not is_read(self):
+            return queryset
+
+        columns = self._read_columns(self.get_serializer(), queryset.model)
+        if columns is None:
+            return queryset
+        if not getattr(self, 'detail', False):
+            columns += [
+                name for name in ordering_fields(self, queryset)
+                if name not in queryset.query.annotations
+            ]
+        return queryset.only(*sorted(set(columns)))
+
+
+class FastListMixin:
+    """Serve JSON list pages without the ModelSerializer machinery.
+
+    Pages are read with ``.values()`` for the serializer's fields and
+    rendered with orjson to the same bytes the serializer path writes.
+    Other formats, indented JSON and serializers with fields that have
+    no fast equivalent go through the serializer. The time spent turning
+    list pages and retrieved objects into data, less its queries, is the
+    serialize span of the Server-Timing header.
+    """
+    fast_list = True
+
+    def _fast_encoders(self):
+        """Return the row encoders for the request, or None."""
+        if not self.fast_list or not is_plain_json(self.request):
+            return None
+
+        return row_encoders(self.get_serializer())
+
+    def list_response(self, queryset):
+        """Return the paginated list response for queryset."""
+        encoders = self._fast_encoders()
+        if encoders is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                with timed('serialize'):
+                    data = serializer.data
+                return self.get_paginated_response(data)
+            serializer = self.get_serializer(queryset, many=True)
+            with timed('serialize'):
+                data = serializer.data
+            return Response(data)
+
+        columns = encoder_columns(encoders)
+        # The cursor is read from the ordering fields of the last row.
+        columns += [
+            field for field in ordering_fields(self, queryset)
+            if field not in columns
+        ]
+        rows = queryset.values(*columns)
+        # Same media type as the negotiated JSONRenderer, written by orjson.
+        self.request.accepted_renderer = FastJSONRenderer()
+        page = self.paginate_queryset(rows)
+        with timed('serialize'):
+            data = encode_rows(rows if page is None else page, encoders)
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data)
+
+
+class AutocompleteMixin:
+    """Suggest the best matches of ``?search=`` for a search box.
+
+    Answers a plain list of at most AUTOCOMPLETE_LIMIT rows holding only
+    the autocomplete_fields, best match first.
+    """
+    autocomplete_fields = None
+
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """List the best few matches of a search."""
+        search = TrigramSearchFilter()
+        if search.get_search_query(request, self) is None:
+            msg = _('This parameter is required.')
+            raise ValidationError({search.search_param: [msg]})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*self.autocomplete_fields)
+        return Response(list(rows[:settings.AUTOCOMPLETE_LIMIT]))
+
+
+class BulkModelMixin:
+    """Create, update or delete many objects in a single request.
+
+    POST takes a list of objects, PATCH a list of partial objects with
+    their ``id`` and DELETE a list of ids. Each is validated up front and
+    written in one transaction; errors are returned as a list aligned with
+    the request items, empty for the items that were valid.
+    """
+
+    def _bulk_items(self, request):
+        """Return the request body after checking it is a bounded list."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'non_field_errors': [_('Expected a list of items.')]})
+        if len(items) > settings.BULK_MAX_ITEMS:
+            msg = _('At most %(max)d items can be sent at once.') % {
+                'max': settings.BULK_MAX_ITEMS,
+            }
+            raise ValidationError({'non_field_errors': [msg]})
+
+        return items
+
+    def _bulk_instances(self, ids):
+        """Return the user's objects for ids, aligned with ids."""
+        found = self.get_queryset().in_bulk(
+            [pk for pk in ids if isinstance(pk, int)])
+        errors = [
+            {} if pk in found else {'id': [_('Not found.')]}
+            for pk in ids
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+
+        return [found[pk] for pk in ids]
+
+    def perform_bulk_create(self, serializer):
+        """Create the validated objects for the user."""
+        serializer.save(user=self.request.user)
+
+    def perform_bulk_update(self, serializer):
+        """Update the validated objects."""
+        serializer.save()
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Create, update or delete a list of objects."""
+        items = self._bulk_items(request)
+
+        if request.method == 'DELETE':
+            return self._bulk_delete(items)
+
+        if request.method == 'PATCH':
+            ids = [
+                item.get('id') if isinstance(item, dict) else None
+                for item in items
+            ]
+            instances = self._bulk_instances(ids)
+            serializer = self.get_serializer(
+                instances, data=items, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                self.perform_bulk_update(serializer)
+            return Response(serializer.data)
+
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _bulk_delete(self, ids):
+        """Delete the objects for a list of ids."""
+        instances = self._bulk_instances(ids)
+        model = self.get_queryset().model
+        try:
+            with transaction.atomic():
+                model.objects.filter(
+                    pk__in=[obj.pk for obj in instances]).delete()
+        except ProtectedError as exc:
+            protected = set()
+            for obj in exc.protected_objects:
+                for field in obj._meta.concrete_fields:
+                    if field.related_model is model:
+                        protected.add(getattr(obj, field.attname))
+            msg = _('Referenced by other objects.')
+            raise ValidationError([
+                {'id': [msg]} if pk in protected else {} for pk in ids
+            ])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class Echo:
+    """File-like object returning what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class ExportMixin:
+    """Stream every object of the user as CSV or NDJSON.
+
+    Rows are read with a server-side cursor in chunks of
+    EXPORT_CHUNK_SIZE and written out as they arrive, so memory use does
+    not grow with the number of rows. ``?fields=`` narrows the exported
+    columns to some of export_fields.
+    """
+    export_fields = None
+    export_filename = None
+
+    def filter_export_queryset(self, queryset):
+        """Return queryset narrowed by the request's list filters."""
+        return QueryParamsFilter().filter_queryset(
+            self.request, queryset, self)
+
+    def _export_rows(self, fields):
+        """Yield the exported rows of fields as tuples."""
+        queryset = self.filter_export_queryset(self.get_queryset())
+        return queryset.order_by('id').values_list(
+            *fields,
+        ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+    def _stream_csv(self, rows, fields):
+        """Yield CSV lines for rows, starting with a header."""
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def _stream_ndjson(self, rows, fields):
+        """Yield one JSON object per line for rows."""
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for row in rows:
+            yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path=r'export/(?P<export_format>csv|ndjson)',
+        renderer_classes=[JSONRenderer, ExportRenderer],
+    )
+    def export(self, request, export_format):
+        """Stream the user's objects as CSV or NDJSON."""
+        fields = requested_fields(request, self.export_fields) \
+            or self.export_fields
+        rows = self._export_rows(fields)
+        if export_format == 'csv':
+            content = self._stream_csv(rows, fields)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = self._stream_ndjson(rows, fields)
+            content_type = 'application/x-ndjson; charset=utf-8'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f'{self.export_filename}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,131 @@
+"""
+Pagination for the rent APIs.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Func, Value
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class Row(Func):
+    """Build a Postgres row value, compared column by column."""
+    function = 'ROW'
+    output_field = models.Field()
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination on the list ordering, ties broken by id.
+
+    The cursor carries the ordering values of the last seen row, so every
+    page is a ``WHERE (field, id) < (%s, %s) ORDER BY field, id LIMIT n``
+    query, or ``WHERE id < %s`` for the default descending ``id``; no
+    ``COUNT(*)`` and no ``OFFSET`` are ever issued. The ordering comes
+    from the view's ordering filter when it has one.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, \
+                self.cursor.position
+
+        ordering = _reverse_ordering(self.ordering) if reverse \
+            else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = self.filter_after(queryset, ordering, current_position)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def filter_after(self, queryset, ordering, position):
+        """Return the rows of queryset following position in ordering."""
+        names = [name.lstrip('-') for name in ordering]
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        values = self.parse_position(queryset, names, position)
+        if len(names) == 1:
+            return queryset.filter(**{f'{names[0]}__{lookup}': values[0]})
+
+        # A row comparison is a single range condition on the index.
+        return queryset.alias(
+            keyset=Row(*names),
+        ).filter(**{
+            f'keyset__{lookup}': Row(*(Value(value) for value in values)),
+        })
+
+    def parse_position(self, queryset, names, position):
+        """Return the ordering values encoded in position."""
+        if len(names) == 1:
+            parts = [position]
+        else:
+            pk, _, value = position.partition(':')
+            parts = [value, pk]
+
+        annotations = queryset.query.annotations
+        try:
+            return [
+                (annotations[name].output_field if name in annotations
+                 else queryset.model._meta.get_field(name)).to_python(part)
+                for name, part in zip(names, parts)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Return the id, prefixed to the ordering value if not by id."""
+        values = [
+            instance[name] if isinstance(instance, dict)
+            else getattr(instance, name)
+            for name in (field.lstrip('-') for field in ordering)
+        ]
+        if len(values) == 1:
+            return str(values[0])
+
+        value, pk = values
+        return f'{pk}:{value}'
+
+    def decode_cursor(self, request):
+        """Decode the cursor, rejecting offsets."""
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.offset:
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
@@ -0,0 +1,30 @@
+"""
+Renderers for the rent APIs.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from rent.fastpath import render_json
+
+
+class ExportRenderer(JSONRenderer):
+    """Accept any media type for views that stream their own response.
+
+    Export actions return a StreamingHttpResponse, so this renderer only
+    renders error responses, which are sent as JSON.
+    """
+    media_type = '*/*'
+    format = 'export'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Write list pages built by the fast path with orjson.
+
+    Only given plain rows of str, int, bool, None and dates, for which
+    the bytes are the same as JSONRenderer writes with its defaults.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return render_json(data)
@@ -1,18 +1,114 @@
 """
 Serializers for vehicle APIs
 """
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
+from core.images import image_storage
 from core.models import Vehicle,Customer,Agreement
+from core.numbering import next_agreement_numbers
+from core.summaries import add_summaries, subtract_summaries, summarize_new
+from core.versions import bump_version
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """List serializer writing with bulk_create and bulk_update."""
+
+    def to_internal_value(self, data):
+        """Validate each item against the instance at the same index."""
+        if self.instance is None:
+            return super().to_internal_value(data)
+
+        ret = []
+        errors = []
+        try:
+            for instance, item in zip(self.instance, data):
+                self.child.instance = instance
+                try:
+                    ret.append(self.child.run_validation(item))
+                    errors.append({})
+                except serializers.ValidationError as exc:
+                    errors.append(exc.detail)
+        finally:
+            self.child.instance = None
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return ret
+
+    def create(self, validated_data):
+        """Create all items with one bulk INSERT."""
+        model = self.child.Meta.model
+        instances = model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data]
+        )
+        bump_version([obj.user_id for obj in instances], model)
+        summarize_new(model, [obj.pk for obj in instances])
+
+        return instances
+
+    def update(self, instances, validated_data):
+        """Update all items with one bulk UPDATE."""
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            fields.update(attrs)
+
+        if fields:
+            model = self.child.Meta.model
+            pks = [obj.pk for obj in instances]
+            emptied = subtract_summaries(model, pks, fields)
+            model.objects.bulk_update(instances, sorted(fields))
+            bump_version([obj.user_id for obj in instances], model)
+            add_summaries(model, pks, fields, emptied)
+
+        return instances
+
+
+class AgreementListSerializer(BulkListSerializer):
+    """Bulk serializer numbering the agreements it creates."""
+
+    def create(self, validated_data):
+        """Number all items from one draw of the user's sequence."""
+        if validated_data:
+            numbers = next_agreement_numbers(
+                validated_data[0]['user'].pk, len(validated_data))
+            for attrs, number in zip(validated_data, numbers):
+                attrs['agreement_no'] = number
+
+        return super().create(validated_data)
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """Map each stored image rendition to its URL.
+
+    Empty while the renditions of a new upload are being made.
+    """
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for rendition, name in value.items():
+            url = image_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[rendition] = url
+
+        return urls
 
 
 class VehicleSerializer(serializers.ModelSerializer):
     """Serializer for vehicles."""
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Vehicle
-        fields = ['id', 'vehicle_name', 'registration_no', 'daily_min_rate', 'monthly_min_rate','status']
+        fields = ['id', 'vehicle_name', 'registration_no', 'daily_min_rate', 'monthly_min_rate','status', 'image_renditions']
         read_only_fields = ['id']
+        list_serializer_class = BulkListSerializer
 
 class VehicleDetailSerializer(VehicleSerializer):
     """Serializer for vehicle detail view."""
@@ -27,6 +123,7 @@ class CustomerSerializer(serializers.ModelSerializer):
         model = Customer
         fields = ['id', 'customer_name','customer_type', 'cr_id_no', 'customer_email', 'customer_mobile']
         read_only_fields = ['id']
+        list_serializer_class = BulkListSerializer
 
 class CustomerDetailSerializer(CustomerSerializer):
     """Serializer for customer detail view."""
@@ -40,7 +137,37 @@ class AgreementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Agreement
         fields = ['id', 'rent_type', 'agreement_no', 'deposit_type', 'checkin_date', 'customer', 'vehicle']
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'agreement_no']
+        list_serializer_class = AgreementListSerializer
+
+    def get_fields(self):
+        """Only accept the requesting user's customers and vehicles."""
+        fields = super().get_fields()
+        user = getattr(self.context.get('request'), 'user', None)
+        if user is not None and user.is_authenticated:
+            fields['customer'].queryset = Customer.objects.filter(user=user)
+            fields['vehicle'].queryset = Vehicle.objects.filter(user=user)
+
+        return fields
+
+    def create(self, validated_data):
+        """Create an agreement numbered from the user's sequence."""
+        validated_data['agreement_no'], = next_agreement_numbers(
+            validated_data['user'].pk)
+
+        return super().create(validated_data)
+
+    def validate(self, attrs):
+        """Check the checkout date is not before the checkin date."""
+        checkin = attrs.get(
+            'checkin_date', getattr(self.instance, 'checkin_date', None))
+        checkout = attrs.get(
+            'checkout_date', getattr(self.instance, 'checkout_date', None))
+        if checkin and checkout and checkout < checkin:
+            msg = _('Checkout date must not be before checkin date.')
+            raise serializers.ValidationError({'checkout_date': msg})
+
+        return attrs
 
 class AgreementDetailSerializer(AgreementSerializer):
     """Serializer for agreement detail view."""
@@ -50,9 +177,167 @@ class AgreementDetailSerializer(AgreementSerializer):
 
 class VehicleImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading images to vehicles."""
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Vehicle
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_renditions']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': 'True'}}
+
+
+class VehicleAvailabilitySerializer(serializers.Serializer):
+    """Serializer for the date range of a vehicle availability search."""
+    start = serializers.DateField()
+    end = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        """Check the range is not empty."""
+        end = attrs.get('end')
+        if end is not None and end <= attrs['start']:
+            msg = _('End date must be after start date.')
+            raise serializers.ValidationError({'end': msg})
+
+        return attrs
+
+
+class VehicleQuoteSerializer(VehicleAvailabilitySerializer):
+    """Serializer for the date range of a rental quote."""
+    end = serializers.DateField()
+
+
+class QuoteSerializer(serializers.Serializer):
+    """Serializer for the price range of a vehicle."""
+    id = serializers.IntegerField()
+    min_price = serializers.DecimalField(max_digits=16, decimal_places=3)
+    max_price = serializers.DecimalField(max_digits=16, decimal_places=3)
+
+
+class FleetQuoteSerializer(serializers.Serializer):
+    """Serializer for the quotes of a rental period."""
+    months = serializers.IntegerField(help_text='Whole months rented')
+    days = serializers.IntegerField(help_text='Days left over')
+    results = QuoteSerializer(many=True)
+
+
+class FilterSerializer(serializers.Serializer):
+    """Base serializer for the query parameters filtering a list.
+
+    Meta.lookups maps each parameter to the lookup it filters with.
+    Parameters left out of the query do not filter.
+    """
+
+    def filter_queryset(self, queryset):
+        """Return queryset filtered by the validated parameters."""
+        lookups = self.Meta.lookups
+        return queryset.filter(**{
+            lookups[name]: value
+            for name, value in self.validated_data.items()
+            if value is not None
+        })
+
+
+def optional_boolean(**kwargs):
+    """Return a boolean filter that is None, not False, when left out."""
+    return serializers.BooleanField(
+        required=False, allow_null=True, default=None, **kwargs)
+
+
+def rate_field(**kwargs):
+    """Return a filter on a rate, with the precision of the rate columns."""
+    return serializers.DecimalField(
+        max_digits=10, decimal_places=3, required=False, **kwargs)
+
+
+class VehicleFilterSerializer(FilterSerializer):
+    """Serializer for the filters of the vehicle list."""
+    status = serializers.CharField(required=False)
+    vehicle_type = serializers.CharField(required=False)
+    daily_rate_from = rate_field(help_text='Lowest daily minimum rate')
+    daily_rate_to = rate_field(help_text='Highest daily minimum rate')
+    monthly_rate_from = rate_field(help_text='Lowest monthly minimum rate')
+    monthly_rate_to = rate_field(help_text='Highest monthly minimum rate')
+
+    class Meta:
+        lookups = {
+            'status': 'status',
+            'vehicle_type': 'vehicle_type',
+            'daily_rate_from': 'daily_min_rate__gte',
+            'daily_rate_to': 'daily_min_rate__lte',
+            'monthly_rate_from': 'monthly_min_rate__gte',
+            'monthly_rate_to': 'monthly_min_rate__lte',
+        }
+
+
+class CustomerFilterSerializer(FilterSerializer):
+    """Serializer for the filters of the customer list."""
+    customer_type = serializers.CharField(required=False)
+    is_blocked = optional_boolean()
+
+    class Meta:
+        lookups = {
+            'customer_type': 'customer_type',
+            'is_blocked': 'is_blocked',
+        }
+
+
+class AgreementFilterSerializer(FilterSerializer):
+    """Serializer for the filters of the agreement list and export."""
+    checkin_after = serializers.DateField(required=False)
+    checkin_before = serializers.DateField(required=False)
+    checkout_after = serializers.DateField(required=False)
+    checkout_before = serializers.DateField(required=False)
+    customer = serializers.IntegerField(required=False)
+    vehicle = serializers.IntegerField(required=False)
+    open = optional_boolean(help_text='Only agreements with no checkout')
+
+    class Meta:
+        lookups = {
+            'checkin_after': 'checkin_date__gte',
+            'checkin_before': 'checkin_date__lte',
+            'checkout_after': 'checkout_date__gte',
+            'checkout_before': 'checkout_date__lte',
+            'customer': 'customer',
+            'vehicle': 'vehicle',
+            'open': 'checkout_date__isnull',
+        }
+
+
+def month_field(**kwargs):
+    """Return a month, read and written as YYYY-MM."""
+    return serializers.DateField(
+        format='%Y-%m', input_formats=['%Y-%m'], **kwargs)
+
+
+class ReportFilterSerializer(FilterSerializer):
+    """Serializer for the month range of a report."""
+    month_from = month_field(required=False, help_text='First month, YYYY-MM')
+    month_to = month_field(required=False, help_text='Last month, YYYY-MM')
+
+    class Meta:
+        lookups = {
+            'month_from': 'month__gte',
+            'month_to': 'month__lte',
+        }
+
+
+class ReportSerializer(serializers.Serializer):
+    """Serializer for the rental totals of a report row."""
+    rentals = serializers.IntegerField()
+    rental_days = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=3)
+
+
+class MonthReportSerializer(ReportSerializer):
+    """Serializer for the rental totals of a month."""
+    month = month_field()
+
+
+class VehicleReportSerializer(ReportSerializer):
+    """Serializer for the rental totals of a vehicle."""
+    vehicle = serializers.IntegerField()
+
+
+class CustomerReportSerializer(ReportSerializer):
+    """Serializer for the rental totals of a customer."""
+    customer = serializers.IntegerField()
@@ -0,0 +1,187 @@
+"""
+Tests for server generated agreement numbers.
+"""
+import threading
+from datetime import date
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Agreement
+from core.numbering import next_agreement_numbers
+from core.tests.helpers import create_user, create_vehicle, create_customer
+
+
+AGREEMENTS_URL = reverse('rent:agreement-list')
+AGREEMENTS_BULK_URL = reverse('rent:agreement-bulk')
+
+
+def number(value):
+    """Return the default agreement number of this year for value."""
+    return f'AG-{timezone.localdate().year}-{value:06d}'
+
+
+class AgreementNumberApiTests(TestCase):
+    """Test agreements are numbered from per-user sequences."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+        self.customer = create_customer(self.user)
+
+    def payload(self, checkin, **params):
+        """Return a payload for a one day agreement from checkin."""
+        payload = {
+            'rent_type': 'Daily',
+            'deposit_type': 'Cash',
+            'checkin_date': checkin,
+            'checkout_date': checkin.replace(day=checkin.day + 1),
+            'customer': self.customer.id,
+            'vehicle': self.vehicle.id,
+        }
+        payload.update(params)
+
+        return payload
+
+    def test_numbers_assigned_in_order(self):
+        """Test created agreements are numbered, ignoring client numbers."""
+        first = self.client.post(
+            AGREEMENTS_URL,
+            self.payload(date(2023, 1, 1), agreement_no='MINE'),
+        )
+        second = self.client.post(
+            AGREEMENTS_URL, self.payload(date(2023, 1, 2)))
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['agreement_no'], number(1))
+        self.assertEqual(second.data['agreement_no'], number(2))
+
+    def test_numbers_per_user(self):
+        """Test each user's agreements are numbered on their own."""
+        other = create_user(email='other@example.com')
+        next_agreement_numbers(other.id, 3)
+
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+
+        self.assertEqual(res.data['agreement_no'], number(1))
+
+    def test_bulk_create_numbers(self):
+        """Test a bulk create numbers its items in order."""
+        res = self.client.post(AGREEMENTS_BULK_URL, [
+            self.payload(date(2023, 1, 1)),
+            self.payload(date(2023, 1, 5)),
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['agreement_no'] for item in res.data],
+            [number(1), number(2)],
+        )
+
+    def test_used_numbers_skipped(self):
+        """Test numbers already used, e.g. by imports, are skipped."""
+        Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no=number(1),
+            deposit_type='Cash',
+            checkin_date=date(2022, 1, 1),
+            checkout_date=date(2022, 1, 2),
+            customer=self.customer,
+            vehicle=self.vehicle,
+        )
+
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+
+        self.assertEqual(res.data['agreement_no'], number(2))
+
+    def test_rejected_booking_leaves_gap(self):
+        """Test a number taken by a rejected booking is not reused."""
+        self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 2)))
+
+        self.assertEqual(res.data['agreement_no'], number(3))
+
+    def test_number_not_updatable(self):
+        """Test an agreement's number cannot be changed through the API."""
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+        url = reverse('rent:agreement-detail', args=[res.data['id']])
+
+        res = self.client.patch(url, {'agreement_no': 'MINE'})
+
+        self.assertEqual(res.data['agreement_no'], number(1))
+
+    @override_settings(
+        AGREEMENT_NO_PREFIX='R',
+        AGREEMENT_NO_YEARLY=False,
+        AGREEMENT_NO_PADDING=3,
+    )
+    def test_number_format(self):
+        """Test the prefix, year and padding of numbers are configurable."""
+        res = self.client.post(AGREEMENTS_URL, self.payload(date(2023, 1, 1)))
+
+        self.assertEqual(res.data['agreement_no'], 'R001')
+
+    def test_numbers_unique_per_user(self):
+        """Test a user cannot have two agreements with the same number."""
+        params = {
+            'user': self.user,
+            'rent_type': 'Daily',
+            'agreement_no': 'A-1',
+            'deposit_type': 'Cash',
+            'checkout_date': None,
+            'customer': self.customer,
+        }
+        Agreement.objects.create(
+            vehicle=self.vehicle, checkin_date=date(2023, 1, 1), **params)
+
+        with self.assertRaises(IntegrityError):
+            Agreement.objects.create(
+                vehicle=create_vehicle(self.user),
+                checkin_date=date(2023, 1, 1),
+                **params,
+            )
+
+
+class ConcurrentNumberTests(TransactionTestCase):
+    """Test concurrent agreement creates do not wait for each other."""
+
+    def test_numbers_taken_without_blocking(self):
+        """Test a number is drawn while another transaction holds one."""
+        user = create_user()
+        next_agreement_numbers(user.id)
+        taken = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    next_agreement_numbers(user.id)
+                    taken.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(taken.wait(10))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '1s'")
+                numbers = next_agreement_numbers(user.id)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(numbers, [number(3)])
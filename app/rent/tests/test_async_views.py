@@ -0,0 +1,126 @@
+"""
+Tests for the async rent views of the ASGI server mode.
+"""
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Customer
+from core.tests.helpers import create_user, create_vehicle
+from rent import urls as rent_urls
+from rent.asyncviews import async_urlpatterns
+from rent.views import VehicleViewSet
+
+
+urlpatterns = [
+    path('api/rent/', include(
+        (async_urlpatterns(rent_urls.router.urls), 'rent'))),
+]
+
+VEHICLES_URL = '/api/rent/vehicles/'
+CUSTOMERS_EXPORT_URL = '/api/rent/customers/export/csv/'
+
+
+@override_settings(ROOT_URLCONF=__name__, IMAGE_WORKERS=0)
+class AsyncViewTests(TransactionTestCase):
+    """Test the rent viewsets answered through their async views."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = create_user()
+        token = Token.objects.create(user=self.user)
+        self.auth = {'authorization': f'Token {token.key}'}
+        self.client = AsyncClient()
+        self.vehicle = create_vehicle(self.user)
+        Customer.objects.create(
+            user=self.user,
+            customer_type='Individual',
+            customer_name='Sample customer',
+            cr_id_no='1234',
+            customer_email='customer@example.com',
+            customer_mobile='555000',
+        )
+
+        # Note the thread each request's queryset is built on.
+        self.threads = []
+        get_queryset = VehicleViewSet.get_queryset
+
+        def record(view):
+            self.threads.append(threading.current_thread().name)
+            return get_queryset(view)
+
+        recorder = patch.object(VehicleViewSet, 'get_queryset', record)
+        recorder.start()
+        self.addCleanup(recorder.stop)
+
+    def assertPooled(self, pooled=True):
+        """Assert the request ran on the view pool, or not."""
+        self.assertEqual(len(self.threads), 1)
+        self.assertEqual(self.threads[0].startswith('rent-view'), pooled)
+
+    async def test_list_runs_on_pool(self):
+        """Test list pages are read on the view thread pool."""
+        res = await self.client.get(VEHICLES_URL, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in res.json()['results']]
+        self.assertEqual(ids, [self.vehicle.id])
+        self.assertPooled()
+        # Queries made on the pool count towards the request's timings.
+        self.assertRegex(res['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    async def test_write_runs_on_django_thread(self):
+        """Test writes run where Django runs sync views."""
+        res = await self.client.patch(
+            f'{VEHICLES_URL}{self.vehicle.id}/',
+            {'status': 'Rented'},
+            content_type='application/json',
+            **self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['status'], 'Rented')
+        self.assertPooled(False)
+
+    def test_upload_runs_on_pool(self):
+        """Test image uploads are handled on the view thread pool."""
+        # The async test client cannot stream multipart bodies in Django
+        # 3.2; the sync one calls the async view through async_to_sync.
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.auth['authorization'])
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (200, 100), color='red').save(
+                image_file, format='JPEG')
+            image_file.seek(0)
+            res = client.post(
+                f'{VEHICLES_URL}{self.vehicle.id}/upload-image/',
+                {'image': image_file},
+                format='multipart',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('image', res.json())
+        self.assertPooled()
+
+    async def test_export_streams(self):
+        """Test exports read the database off the event loop."""
+        res = await self.client.get(CUSTOMERS_EXPORT_URL, **self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = b''.join(res.streaming_content).decode()
+        self.assertEqual(body.splitlines()[1].split(',')[1], 'Sample customer')
@@ -0,0 +1,139 @@
+"""
+Tests for the vehicle availability API.
+"""
+from datetime import date
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Agreement
+from core.tests.helpers import (
+    create_user,
+    create_vehicle,
+    create_customer,
+    create_agreement,
+)
+
+
+AVAILABLE_URL = reverse('rent:vehicle-available')
+AGREEMENTS_URL = reverse('rent:agreement-list')
+
+
+class VehicleAvailabilityApiTests(TestCase):
+    """Test searching for free vehicles."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.customer = create_customer(self.user)
+        self.vehicle = create_vehicle(self.user)
+        create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 1, 10),
+            checkout_date=date(2023, 1, 20),
+        )
+
+    def available_ids(self, **params):
+        """Return the ids of vehicles available for params."""
+        res = self.client.get(AVAILABLE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['id'] for item in res.data['results']]
+
+    def test_overlapping_agreement_excludes_vehicle(self):
+        """Test a vehicle rented during the range is not available."""
+        ids = self.available_ids(start='2023-01-15', end='2023-01-25')
+
+        self.assertNotIn(self.vehicle.id, ids)
+
+    def test_adjacent_ranges_available(self):
+        """Test a vehicle is free again from its checkout day."""
+        before = self.available_ids(start='2023-01-01', end='2023-01-10')
+        after = self.available_ids(start='2023-01-20', end='2023-01-30')
+
+        self.assertIn(self.vehicle.id, before)
+        self.assertIn(self.vehicle.id, after)
+
+    def test_open_agreement_blocks_later_dates(self):
+        """Test an agreement without checkout blocks every later date."""
+        other = create_vehicle(self.user, vehicle_name='Other')
+        create_agreement(
+            self.user, other, self.customer,
+            checkin_date=date(2023, 2, 1),
+            checkout_date=None,
+        )
+
+        ids = self.available_ids(start='2030-01-01', end='2030-01-05')
+
+        self.assertEqual(ids, [self.vehicle.id])
+
+    def test_open_ended_search(self):
+        """Test a search without end date conflicts with later rentals."""
+        ids = self.available_ids(start='2023-01-01')
+
+        self.assertNotIn(self.vehicle.id, ids)
+
+    def test_limited_to_user(self):
+        """Test only the user's vehicles are returned."""
+        other_user = create_user(email='other@example.com')
+        create_vehicle(other_user)
+
+        ids = self.available_ids(start='2023-02-01', end='2023-02-05')
+
+        self.assertEqual(ids, [self.vehicle.id])
+
+    def test_invalid_range_rejected(self):
+        """Test an end date on or before the start is rejected."""
+        res = self.client.get(
+            AVAILABLE_URL, {'start': '2023-02-05', 'end': '2023-02-05'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_start_required(self):
+        """Test the start date is required."""
+        res = self.client.get(AVAILABLE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_checkout_before_checkin_rejected(self):
+        """Test creating an agreement ending before it starts fails."""
+        payload = {
+            'rent_type': 'Daily',
+            'agreement_no': 'A-2',
+            'deposit_type': 'Cash',
+            'checkin_date': '2023-03-10',
+            'checkout_date': '2023-03-01',
+            'customer': self.customer.id,
+            'vehicle': self.vehicle.id,
+        }
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('checkout_date', res.data)
+
+    def test_migration_lists_checkout_before_checkin(self):
+        """Test the period index migration stops on inverted periods."""
+        migration = import_module(
+            'core.migrations.0007_agreement_period_index')
+        migration.check_periods(apps, None)
+        with connection.cursor() as cursor:
+            # Rolled back with the test, the constraint rejects these rows.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(
+                'ALTER TABLE core_agreement '
+                'DROP CONSTRAINT agreement_vehicle_no_overlap'
+            )
+        agreement = Agreement.objects.get()
+        Agreement.objects.filter(pk=agreement.pk).update(
+            checkout_date=date(2023, 1, 5))
+
+        with self.assertRaisesMessage(
+                ValueError, f'checkin date: {agreement.pk}.'):
+            migration.check_periods(apps, None)
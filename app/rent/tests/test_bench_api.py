@@ -0,0 +1,71 @@
+"""
+Tests for the API benchmark command.
+"""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, override_settings
+
+from core.models import Vehicle
+
+from rent.management.commands.bench_api import SCENARIOS
+
+
+@override_settings(IMAGE_WORKERS=0)
+class BenchApiTests(LiveServerTestCase):
+    """Test the API benchmark against a live server."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(MEDIA_ROOT=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.output = os.path.join(self.directory, 'results.json')
+
+    def bench(self, **options):
+        """Run the benchmark briefly and return what it printed."""
+        out = StringIO()
+        call_command(
+            'bench_api',
+            server=self.live_server_url,
+            concurrency=2,
+            duration=0.2,
+            rows=3,
+            stdout=out,
+            **options,
+        )
+
+        return out.getvalue()
+
+    def test_results_saved(self):
+        """Test every scenario is run and saved, leaving no rows."""
+        out = self.bench(output=self.output, label='base')
+
+        with open(self.output) as results_file:
+            results = json.load(results_file)
+        self.assertEqual(results['label'], 'base')
+        self.assertEqual(list(results['scenarios']), SCENARIOS)
+        for name, result in results['scenarios'].items():
+            self.assertIn(name, out)
+            self.assertGreater(result['requests'], 0, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['queries'], 0, name)
+            self.assertLessEqual(result['p50'], result['p99'], name)
+        self.assertFalse(
+            get_user_model().objects.filter(
+                email='bench-api@example.com').exists())
+        self.assertFalse(Vehicle.objects.exists())
+
+    def test_compare(self):
+        """Test a run is compared with saved results."""
+        self.bench(output=self.output, scenario=['vehicle-list'])
+
+        out = self.bench(compare=self.output, scenario=['vehicle-list'])
+
+        self.assertRegex(out, r'vs baseline\s+[+-]\d+%')
@@ -0,0 +1,264 @@
+"""
+Tests for double-booking prevention on agreements.
+"""
+import threading
+from datetime import date
+from importlib import import_module
+
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Agreement
+from core.tests.helpers import (
+    create_user,
+    create_vehicle,
+    create_customer,
+    create_agreement,
+)
+from core.versions import get_versions
+
+
+AGREEMENTS_URL = reverse('rent:agreement-list')
+
+
+def detail_url(agreement_id):
+    """Create and return an agreement detail URL."""
+    return reverse('rent:agreement-detail', args=[agreement_id])
+
+
+def booking_payload(vehicle, customer, checkin, checkout=None):
+    """Return a payload for creating an agreement."""
+    payload = {
+        'rent_type': 'Daily',
+        'agreement_no': 'A-1',
+        'deposit_type': 'Cash',
+        'checkin_date': checkin,
+        'customer': customer.id,
+        'vehicle': vehicle.id,
+    }
+    if checkout:
+        payload['checkout_date'] = checkout
+
+    return payload
+
+
+class BookingConflictApiTests(TestCase):
+    """Test overlapping agreements are rejected."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+        self.customer = create_customer(self.user)
+        self.existing = Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no='A-0',
+            deposit_type='Cash',
+            checkin_date=date(2023, 1, 10),
+            checkout_date=date(2023, 1, 20),
+            customer=self.customer,
+            vehicle=self.vehicle,
+        )
+
+    def test_overlapping_create_conflicts(self):
+        """Test booking a rented vehicle returns 409 with the conflict."""
+        payload = booking_payload(
+            self.vehicle, self.customer, '2023-01-15', '2023-01-25')
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['conflicting_agreement'], self.existing.id)
+        self.assertEqual(Agreement.objects.count(), 1)
+
+    def test_open_ended_create_conflicts(self):
+        """Test an open-ended booking conflicts with later rentals."""
+        payload = booking_payload(self.vehicle, self.customer, '2023-01-01')
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_adjacent_create_succeeds(self):
+        """Test booking from the previous checkout day succeeds."""
+        payload = booking_payload(
+            self.vehicle, self.customer, '2023-01-20', '2023-01-25')
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_other_vehicle_succeeds(self):
+        """Test the same dates on another vehicle succeed."""
+        other = create_vehicle(self.user)
+        payload = booking_payload(
+            other, self.customer, '2023-01-15', '2023-01-25')
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_other_users_vehicle_not_bookable(self):
+        """Test another user cannot block the vehicle with bookings."""
+        other = create_user(email='other@example.com')
+        client = APIClient()
+        client.force_authenticate(other)
+        payload = booking_payload(
+            self.vehicle, create_customer(other), '2023-02-01', '2023-02-10')
+
+        res = client.post(AGREEMENTS_URL, payload)
+        bulk = client.post(
+            reverse('rent:agreement-bulk'), [payload], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(bulk.status_code, status.HTTP_400_BAD_REQUEST)
+        payload = booking_payload(
+            self.vehicle, self.customer, '2023-02-01', '2023-02-10')
+        res = self.client.post(AGREEMENTS_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_overlapping_update_conflicts(self):
+        """Test moving an agreement onto a rented period returns 409."""
+        later = Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no='A-2',
+            deposit_type='Cash',
+            checkin_date=date(2023, 2, 1),
+            checkout_date=date(2023, 2, 5),
+            customer=self.customer,
+            vehicle=self.vehicle,
+        )
+        res = self.client.patch(
+            detail_url(later.id), {'checkin_date': '2023-01-19'})
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['conflicting_agreement'], self.existing.id)
+        later.refresh_from_db()
+        self.assertEqual(later.checkin_date, date(2023, 2, 1))
+
+    def test_extend_own_period_succeeds(self):
+        """Test an agreement does not conflict with itself."""
+        res = self.client.patch(
+            detail_url(self.existing.id), {'checkout_date': '2023-01-30'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_migration_lists_overlapping_agreements(self):
+        """Test the exclusion constraint migration stops on overlaps."""
+        migration = import_module(
+            'core.migrations.0008_agreement_no_overlap')
+        create_agreement(
+            self.user, create_vehicle(self.user), self.customer,
+            checkin_date=date(2023, 1, 15), checkout_date=None,
+        )
+        create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 1, 20), checkout_date=date(2023, 1, 25),
+        )
+        migration.check_overlaps(apps, None)
+        with connection.cursor() as cursor:
+            # Rolled back with the test, the constraint rejects these rows.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(
+                'ALTER TABLE core_agreement '
+                'DROP CONSTRAINT agreement_vehicle_no_overlap'
+            )
+        overlapping = create_agreement(
+            self.user, self.vehicle, self.customer,
+            checkin_date=date(2023, 1, 19), checkout_date=date(2023, 1, 20),
+        )
+
+        with self.assertRaisesMessage(
+                ValueError,
+                f'vehicle: {self.existing.pk}, {overlapping.pk}.'):
+            migration.check_overlaps(apps, None)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Test concurrent bookings of the same vehicle."""
+
+    def test_only_one_concurrent_booking_wins(self):
+        """Test racing overlapping inserts leave exactly one agreement."""
+        user = create_user()
+        vehicle = create_vehicle(user)
+        customer = create_customer(user)
+        barrier = threading.Barrier(4)
+        results = []
+
+        def book(number):
+            barrier.wait()
+            try:
+                Agreement.objects.create(
+                    user=user,
+                    rent_type='Daily',
+                    agreement_no=f'A-{number}',
+                    deposit_type='Cash',
+                    checkin_date=date(2023, 1, 10),
+                    checkout_date=date(2023, 1, 20),
+                    customer=customer,
+                    vehicle=vehicle,
+                )
+                results.append(True)
+            except IntegrityError:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=book, args=(i,)) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Agreement.objects.count(), 1)
+
+    def test_bookings_of_other_vehicles_do_not_wait(self):
+        """Test a booking is saved while another vehicle's is uncommitted."""
+        user = create_user()
+        vehicles = [create_vehicle(user), create_vehicle(user)]
+        customers = [create_customer(user), create_customer(user)]
+        saved = threading.Event()
+        release = threading.Event()
+
+        def book(index, month):
+            Agreement.objects.create(
+                user=user,
+                rent_type='Daily',
+                agreement_no=f'A-{index}',
+                deposit_type='Cash',
+                checkin_date=date(2023, month, 10),
+                checkout_date=date(2023, month, 20),
+                customer=customers[index],
+                vehicle=vehicles[index],
+            )
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    book(0, 1)
+                    saved.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(saved.wait(10))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '1s'")
+                book(1, 3)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(Agreement.objects.count(), 2)
+        self.assertEqual(get_versions(user.id, [Agreement]), [2])
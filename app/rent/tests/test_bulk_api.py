@@ -0,0 +1,179 @@
+"""
+Tests for the bulk rent APIs.
+"""
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Vehicle, Customer, Agreement
+from core.tests.helpers import create_user, create_vehicle, create_customer
+
+
+VEHICLES_BULK_URL = reverse('rent:vehicle-bulk')
+CUSTOMERS_BULK_URL = reverse('rent:customer-bulk')
+AGREEMENTS_BULK_URL = reverse('rent:agreement-bulk')
+
+
+def vehicle_payload(**params):
+    """Return a payload for creating a vehicle."""
+    payload = {
+        'vehicle_type': 'Sedan',
+        'vehicle_name': 'Sample vehicle name',
+        'registration_no': '234355',
+        'daily_min_rate': '10.00',
+        'daily_max_rate': '12.00',
+        'monthly_min_rate': '233.44',
+        'monthly_max_rate': '1034.44',
+        'status': 'Ready',
+    }
+    payload.update(params)
+
+    return payload
+
+
+class BulkApiTests(TestCase):
+    """Test bulk create, update and delete."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_vehicles(self):
+        """Test creating many vehicles in one INSERT."""
+        payload = [vehicle_payload(vehicle_name=f'V{i}') for i in range(20)]
+
+        # Savepoint, INSERT and release, the version is bumped on commit.
+        with self.assertNumQueries(3):
+            res = self.client.post(VEHICLES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        self.assertTrue(all(item['id'] for item in res.data))
+        vehicles = Vehicle.objects.filter(user=self.user)
+        self.assertEqual(vehicles.count(), 20)
+
+    def test_bulk_create_errors_aligned(self):
+        """Test invalid items report errors at their index."""
+        payload = [
+            vehicle_payload(),
+            vehicle_payload(daily_min_rate='abc'),
+            vehicle_payload(),
+        ]
+        res = self.client.post(VEHICLES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('daily_min_rate', res.data[1])
+        self.assertEqual(res.data[2], {})
+        self.assertFalse(Vehicle.objects.exists())
+
+    def test_bulk_requires_list(self):
+        """Test a non-list body is rejected."""
+        res = self.client.post(
+            VEHICLES_BULK_URL, vehicle_payload(), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_max_items(self):
+        """Test bodies over the item limit are rejected."""
+        with self.settings(BULK_MAX_ITEMS=2):
+            res = self.client.post(
+                VEHICLES_BULK_URL, [vehicle_payload()] * 3, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Vehicle.objects.exists())
+
+    def test_bulk_update_vehicles(self):
+        """Test partially updating many vehicles."""
+        first = create_vehicle(self.user)
+        second = create_vehicle(self.user)
+        payload = [
+            {'id': first.id, 'status': 'Rented'},
+            {'id': second.id, 'vehicle_name': 'Renamed'},
+        ]
+        res = self.client.patch(VEHICLES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, 'Rented')
+        self.assertEqual(second.vehicle_name, 'Renamed')
+        self.assertEqual(second.status, 'Ready')
+
+    def test_bulk_update_other_users_vehicle(self):
+        """Test another user's vehicle is reported as not found."""
+        other_user = create_user(email='other@example.com')
+        own = create_vehicle(self.user)
+        other = create_vehicle(other_user)
+        payload = [
+            {'id': own.id, 'status': 'Rented'},
+            {'id': other.id, 'status': 'Rented'},
+        ]
+        res = self.client.patch(VEHICLES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        other.refresh_from_db()
+        self.assertEqual(other.status, 'Ready')
+
+    def test_bulk_delete_customers(self):
+        """Test deleting many customers."""
+        customers = [create_customer(self.user) for _ in range(3)]
+        ids = [customer.id for customer in customers[:2]]
+
+        res = self.client.delete(CUSTOMERS_BULK_URL, ids, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        remaining = Customer.objects.values_list('id', flat=True)
+        self.assertEqual(list(remaining), [customers[2].id])
+
+    def test_bulk_delete_referenced_vehicle(self):
+        """Test deleting a vehicle with agreements reports its index."""
+        free = create_vehicle(self.user)
+        rented = create_vehicle(self.user)
+        Agreement.objects.create(
+            user=self.user,
+            rent_type='Daily',
+            agreement_no='A-1',
+            deposit_type='Cash',
+            checkin_date=date(2023, 1, 1),
+            customer=create_customer(self.user),
+            vehicle=rented,
+        )
+
+        res = self.client.delete(
+            VEHICLES_BULK_URL, [free.id, rented.id], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        self.assertEqual(Vehicle.objects.count(), 2)
+
+    def test_bulk_create_agreement_conflict(self):
+        """Test overlapping agreements in a bulk create return 409."""
+        vehicle = create_vehicle(self.user)
+        customer = create_customer(self.user)
+        item = {
+            'rent_type': 'Daily',
+            'agreement_no': 'A-1',
+            'deposit_type': 'Cash',
+            'checkin_date': '2023-01-01',
+            'checkout_date': '2023-01-10',
+            'customer': customer.id,
+            'vehicle': vehicle.id,
+        }
+        res = self.client.post(
+            AGREEMENTS_BULK_URL,
+            [item, dict(item, checkin_date='2023-01-05')],
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Agreement.objects.exists())
@@ -0,0 +1,113 @@
+"""
+Tests for ETags and conditional GETs on the rent APIs.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.helpers import create_user, create_vehicle
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+
+
+def detail_url(vehicle_id):
+    """Create and return a vehicle detail URL."""
+    return reverse('rent:vehicle-detail', args=[vehicle_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test conditional GETs of rent resources."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+
+    def get_etag(self, url=VEHICLES_URL, params=None):
+        """Get url and return its ETag."""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res['ETag']
+
+    def test_not_modified_without_query(self):
+        """Test a current ETag gets 304 after one version lookup."""
+        etag = self.get_etag()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_changes_modify_etag(self):
+        """Test creating, updating and deleting change the ETag."""
+        etags = [self.get_etag()]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = create_vehicle(self.user, registration_no='999')
+        etags.append(self.get_etag())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(other.id), {'status': 'Rented'})
+        etags.append(self.get_etag())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(other.id))
+        etags.append(self.get_etag())
+
+        self.assertEqual(len(set(etags)), 4)
+        res = self.client.get(VEHICLES_URL, HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_changes_modify_etag(self):
+        """Test bulk writes change the ETag."""
+        etag = self.get_etag()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('rent:vehicle-bulk'),
+                [{'id': self.vehicle.id, 'status': 'Rented'}],
+                format='json',
+            )
+
+        self.assertNotEqual(self.get_etag(), etag)
+
+    def test_other_user_changes_keep_etag(self):
+        """Test changes by another user leave the ETag alone."""
+        etag = self.get_etag()
+        other = create_user(email='other@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_vehicle(other)
+
+        self.assertEqual(self.get_etag(), etag)
+
+    def test_etag_per_representation(self):
+        """Test query params and paths get their own ETags."""
+        etags = {
+            self.get_etag(),
+            self.get_etag(params={'page_size': 1}),
+            self.get_etag(detail_url(self.vehicle.id)),
+        }
+
+        self.assertEqual(len(etags), 3)
+
+    def test_detail_not_modified(self):
+        """Test conditional GET of a detail."""
+        url = detail_url(self.vehicle.id)
+        etag = self.get_etag(url)
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", {etag}')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_detail_has_no_etag(self):
+        """Test error responses carry no ETag."""
+        res = self.client.get(detail_url(self.vehicle.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
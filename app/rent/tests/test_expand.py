@@ -0,0 +1,166 @@
+"""
+Tests for expanding related objects on the agreement APIs.
+"""
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Customer, Agreement
+from core.tests.helpers import create_user, create_vehicle, create_customer
+from rent.mixins import FastListMixin
+
+
+AGREEMENTS_URL = reverse('rent:agreement-list')
+
+
+class ExpandTests(TestCase):
+    """Test nesting customers and vehicles in agreements."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def create_agreements(self, count):
+        """Create count agreements, each with its own customer and vehicle."""
+        agreements = []
+        for i in range(count):
+            customer = Customer.objects.create(
+                user=self.user,
+                customer_type='Individual',
+                customer_name=f'Customer {i}',
+                cr_id_no=str(i),
+                customer_email=f'c{i}@example.com',
+                customer_mobile='555',
+            )
+            vehicle = create_vehicle(self.user, registration_no=str(i))
+            agreements.append(Agreement.objects.create(
+                user=self.user,
+                rent_type='Daily',
+                agreement_no=f'A-{vehicle.id}',
+                deposit_type='Cash',
+                checkin_date=date(2023, 1, 1),
+                customer=customer,
+                vehicle=vehicle,
+            ))
+
+        return agreements
+
+    def test_list_expanded(self):
+        """Test expanded agreements nest the list representations."""
+        agreement, = self.create_agreements(1)
+        customer = self.client.get(reverse('rent:customer-list'))
+        vehicle = self.client.get(reverse('rent:vehicle-list'))
+
+        res = self.client.get(AGREEMENTS_URL, {'expand': 'customer,vehicle'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        result, = res.json()['results']
+        self.assertEqual(result['id'], agreement.id)
+        self.assertEqual(result['customer'], customer.json()['results'][0])
+        self.assertEqual(result['vehicle'], vehicle.json()['results'][0])
+
+    def test_other_users_objects_rejected(self):
+        """Test agreements cannot refer to another user's objects."""
+        other = create_user(email='other@example.com')
+        customer = create_customer(other, customer_name='Not yours')
+        vehicle = create_vehicle(other)
+        payload = {
+            'rent_type': 'Daily',
+            'deposit_type': 'Cash',
+            'checkin_date': '2023-01-01',
+            'customer': customer.id,
+            'vehicle': vehicle.id,
+        }
+
+        res = self.client.post(AGREEMENTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('customer', res.data)
+        self.assertIn('vehicle', res.data)
+        res = self.client.get(AGREEMENTS_URL, {'expand': 'customer,vehicle'})
+        self.assertEqual(res.json()['results'], [])
+        self.assertNotIn(b'Not yours', res.content)
+
+    def test_query_count_constant(self):
+        """Test a page of expanded agreements costs a fixed query count."""
+        self.create_agreements(1)
+        params = {'expand': 'customer,vehicle'}
+
+        with self.assertNumQueries(2):
+            self.client.get(AGREEMENTS_URL, params)
+
+        self.create_agreements(20)
+        cache.clear()
+        for fast_list in (True, False):
+            with patch.object(FastListMixin, 'fast_list', fast_list), \
+                    self.assertNumQueries(2):
+                res = self.client.get(AGREEMENTS_URL, params)
+            self.assertEqual(len(res.json()['results']), 21)
+            cache.clear()
+
+    def test_fast_path_matches_serializer(self):
+        """Test the fast path writes the same expanded bytes."""
+        self.create_agreements(3)
+        params = {'expand': 'vehicle,customer'}
+        fast = self.client.get(AGREEMENTS_URL, params)
+        cache.clear()
+
+        with patch.object(FastListMixin, 'fast_list', False):
+            slow = self.client.get(AGREEMENTS_URL, params)
+
+        self.assertEqual(fast.content, slow.content)
+
+    def test_detail_expanded(self):
+        """Test a detail nests the expanded customer only."""
+        agreement, = self.create_agreements(1)
+        url = reverse('rent:agreement-detail', args=[agreement.id])
+
+        res = self.client.get(url, {'expand': 'customer'})
+
+        self.assertEqual(res.data['customer']['customer_name'], 'Customer 0')
+        self.assertEqual(res.data['vehicle'], agreement.vehicle_id)
+
+    def test_expand_with_fields(self):
+        """Test fields left out are not expanded."""
+        agreement, = self.create_agreements(1)
+
+        res = self.client.get(AGREEMENTS_URL, {
+            'fields': 'id,vehicle',
+            'expand': 'customer,vehicle',
+        })
+
+        result, = res.json()['results']
+        self.assertEqual(set(result), {'id', 'vehicle'})
+        self.assertEqual(result['vehicle']['id'], agreement.vehicle_id)
+
+    def test_unknown_expand_rejected(self):
+        """Test only related objects can be expanded."""
+        res = self.client.get(AGREEMENTS_URL, {'expand': 'customer,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['expand'], ['Unknown fields: user.'])
+
+    def test_related_change_modifies_etag(self):
+        """Test changing a customer changes expanded agreements only."""
+        agreement, = self.create_agreements(1)
+        params = {'expand': 'customer'}
+        expanded = self.client.get(AGREEMENTS_URL, params)['ETag']
+        plain = self.client.get(AGREEMENTS_URL)['ETag']
+
+        agreement.customer.customer_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            agreement.customer.save()
+
+        res = self.client.get(AGREEMENTS_URL, params)
+        self.assertNotEqual(res['ETag'], expanded)
+        self.assertEqual(
+            res.json()['results'][0]['customer']['customer_name'], 'Renamed')
+        self.assertEqual(self.client.get(AGREEMENTS_URL)['ETag'], plain)
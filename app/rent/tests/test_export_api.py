@@ -0,0 +1,108 @@
+"""
+Tests for the export APIs.
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.helpers import (
+    create_user,
+    create_vehicle,
+    create_customer,
+    create_agreement,
+)
+
+
+def export_url(basename, export_format):
+    """Create and return an export URL."""
+    return reverse(f'rent:{basename}-export', args=[export_format])
+
+
+class ExportApiTests(TestCase):
+    """Test exporting customers and agreements."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        # An address with a line break, a comma and quotes to escape.
+        self.customer = create_customer(
+            self.user, customer_address='Line 1\nLine 2, "Block" 3')
+        self.vehicle = create_vehicle(self.user)
+        self.agreements = [
+            create_agreement(
+                self.user, self.vehicle, self.customer,
+                agreement_no=f'A-{month}',
+                checkin_date=date(2023, month, 1),
+                checkout_date=date(2023, month, 10),
+            )
+            for month in (1, 2, 3)
+        ]
+
+    def read(self, res):
+        """Return the body of a streamed response as text."""
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_customers_csv(self):
+        """Test customers are exported as CSV with a header."""
+        other_user = create_user(email='other@example.com')
+        create_customer(other_user, customer_name='Other customer')
+
+        res = self.client.get(export_url('customer', 'csv'))
+
+        rows = list(csv.reader(io.StringIO(self.read(res))))
+        self.assertEqual(rows[0][:2], ['id', 'customer_name'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Sample customer')
+        address = rows[0].index('customer_address')
+        self.assertEqual(rows[1][address], self.customer.customer_address)
+        self.assertIn('attachment', res['Content-Disposition'])
+
+    def test_export_agreements_ndjson(self):
+        """Test agreements are exported as one JSON object per line."""
+        res = self.client.get(export_url('agreement', 'ndjson'))
+
+        lines = self.read(res).splitlines()
+        items = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [item['id'] for item in items],
+            [agreement.id for agreement in self.agreements],
+        )
+        self.assertEqual(items[0]['checkin_date'], '2023-01-01')
+        self.assertEqual(items[0]['vehicle'], self.vehicle.id)
+
+    def test_export_agreements_checkin_range(self):
+        """Test agreements are filtered by checkin date."""
+        params = {
+            'checkin_after': '2023-02-01',
+            'checkin_before': '2023-02-28',
+        }
+        res = self.client.get(export_url('agreement', 'csv'), params)
+
+        rows = list(csv.reader(io.StringIO(self.read(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.agreements[1].id))
+
+    def test_export_invalid_filter(self):
+        """Test an invalid date filter is rejected."""
+        res = self.client.get(
+            export_url('agreement', 'csv'), {'checkin_after': 'soon'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_accepts_csv_media_type(self):
+        """Test clients asking for text/csv get the export."""
+        res = self.client.get(
+            export_url('customer', 'csv'), HTTP_ACCEPT='text/csv')
+
+        self.assertIn('Sample customer', self.read(res))
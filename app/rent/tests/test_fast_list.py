@@ -0,0 +1,157 @@
+"""
+Tests for the fast list read path.
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Customer, Agreement
+from core.tests.helpers import create_user, create_vehicle
+from rent.mixins import FastListMixin
+
+
+# Quotes, escapes, control and non-ASCII characters, and the two
+# separators JSONRenderer escapes for JavaScript.
+AWKWARD_TEXT = 'Q8 "Line"\\\n\t\x01 \u00e9\u062f \u2028\u2029 \U0001f697 </a>'
+
+
+class FastListTests(TestCase):
+    """Test the fast path writes the same bytes as the serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+        vehicles = [
+            create_vehicle(
+                self.user,
+                vehicle_name=AWKWARD_TEXT,
+                daily_min_rate=Decimal('0'),
+                monthly_min_rate=Decimal('1E+2'),
+                image_renditions={'thumbnail': 'uploads/a/thumbnail.webp'},
+            ),
+            create_vehicle(self.user, daily_min_rate=Decimal('-0.5')),
+            create_vehicle(self.user, registration_no=''),
+        ]
+        customers = [
+            Customer.objects.create(
+                user=self.user,
+                customer_type='Individual',
+                customer_name=AWKWARD_TEXT,
+                cr_id_no=str(i),
+                customer_email=f'c{i}@example.com',
+                customer_mobile='555',
+                customer_address=AWKWARD_TEXT if i else None,
+                is_blocked=bool(i),
+            )
+            for i in range(3)
+        ]
+        for i, (vehicle, customer) in enumerate(zip(vehicles, customers)):
+            Agreement.objects.create(
+                user=self.user,
+                rent_type='Daily',
+                agreement_no=f'{AWKWARD_TEXT}{i}',
+                deposit_type='Cash',
+                checkin_date=date(2023, 1, 1 + i),
+                checkout_date=date(2023, 2, 1) if i else None,
+                customer=customer,
+                vehicle=vehicle,
+            )
+
+    def get_both(self, url, params=None, **extra):
+        """Return the fast and the serializer responses for url."""
+        cache.clear()
+        fast = self.client.get(url, params, **extra)
+        cache.clear()
+        with patch.object(FastListMixin, 'fast_list', False):
+            slow = self.client.get(url, params, **extra)
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(slow.status_code, status.HTTP_200_OK)
+        return fast, slow
+
+    def assertSameResponse(self, url, params=None):
+        """Assert both paths answer url with the same bytes."""
+        fast, slow = self.get_both(url, params)
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast['Content-Type'], slow['Content-Type'])
+        return fast
+
+    def test_vehicle_list(self):
+        """Test vehicle list pages match byte for byte."""
+        url = reverse('rent:vehicle-list')
+        first = self.assertSameResponse(url, {'page_size': 2})
+        cursor = first.json()['next']
+        self.assertIsNotNone(cursor)
+
+        self.assertSameResponse(cursor)
+
+    def test_customer_list(self):
+        """Test customer list pages match byte for byte."""
+        self.assertSameResponse(reverse('rent:customer-list'))
+
+    def test_agreement_list(self):
+        """Test agreement list pages match byte for byte."""
+        self.assertSameResponse(reverse('rent:agreement-list'))
+
+    def test_vehicle_availability(self):
+        """Test the availability search matches byte for byte."""
+        self.assertSameResponse(
+            reverse('rent:vehicle-available'), {'start': '2024-01-01'})
+
+    def test_serializer_not_used(self):
+        """Test the fast path never calls the serializer."""
+        with patch(
+            'rent.serializers.VehicleSerializer.to_representation',
+            side_effect=AssertionError,
+        ):
+            res = self.client.get(reverse('rent:vehicle-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['results']), 3)
+
+    def test_escaped_separators(self):
+        """Test the JavaScript line separators are escaped."""
+        fast = self.assertSameResponse(reverse('rent:customer-list'))
+
+        self.assertIn(b'\\u2028\\u2029', fast.content)
+        self.assertIn('\U0001f697'.encode(), fast.content)
+
+    def test_indented_json_uses_serializer(self):
+        """Test indented JSON still goes through the renderer."""
+        fast, slow = self.get_both(
+            reverse('rent:vehicle-list'),
+            HTTP_ACCEPT='application/json; indent=2',
+        )
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertIn(b'\n  ', fast.content)
+
+    def test_bench_command(self):
+        """Test the benchmark reports both paths and leaves no rows."""
+        out = StringIO()
+
+        call_command(
+            'bench_list', rows=5, page_size=2, repeat=1,
+            resource=['vehicles'], stdout=out,
+        )
+
+        self.assertRegex(
+            out.getvalue(),
+            r'vehicles: serializer [\d,]+ rows/s, fast [\d,]+ rows/s',
+        )
+        self.assertFalse(
+            get_user_model().objects.filter(
+                email='bench-list@example.com').exists())
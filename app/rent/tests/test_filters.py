@@ -0,0 +1,207 @@
+"""
+Tests for filtering and ordering the rent APIs.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Vehicle, Customer, Agreement
+from core.tests.helpers import create_user, create_vehicle, create_customer
+from rent.mixins import FastListMixin
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+CUSTOMERS_URL = reverse('rent:customer-list')
+AGREEMENTS_URL = reverse('rent:agreement-list')
+
+
+class FilterTests(TestCase):
+    """Test filtering and ordering rent lists."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def get_ids(self, url, params):
+        """Walk every page of url and return the ids listed."""
+        ids = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in res.json()['results'])
+            if res.json()['next'] is None:
+                return ids
+            res = self.client.get(res.json()['next'])
+
+    def test_vehicle_filters(self):
+        """Test vehicles filter by status, type and rate ranges."""
+        cheap = create_vehicle(self.user, daily_min_rate=Decimal('5'))
+        rented = create_vehicle(self.user, status='Rented')
+        suv = create_vehicle(
+            self.user,
+            vehicle_type='SUV',
+            monthly_min_rate=Decimal('900'),
+        )
+        create_vehicle(self.user, daily_min_rate=Decimal('50'))
+
+        cases = [
+            ({'status': 'Rented'}, [rented.id]),
+            ({'vehicle_type': 'SUV'}, [suv.id]),
+            ({'daily_rate_to': '5.000'}, [cheap.id]),
+            ({'daily_rate_from': '6', 'daily_rate_to': '10'},
+             [suv.id, rented.id]),
+            ({'monthly_rate_from': '500'}, [suv.id]),
+            ({'status': 'Ready', 'vehicle_type': 'Sedan',
+              'daily_rate_from': '6'}, [Vehicle.objects.last().id]),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.get_ids(VEHICLES_URL, params), expected)
+
+    def test_customer_filters(self):
+        """Test customers filter by type and blocked flag."""
+        blocked = create_customer(self.user, is_blocked=True)
+        company = create_customer(self.user, customer_type='Company')
+
+        self.assertEqual(
+            self.get_ids(CUSTOMERS_URL, {'is_blocked': 'true'}), [blocked.id])
+        self.assertEqual(
+            self.get_ids(CUSTOMERS_URL, {'is_blocked': 'false'}),
+            [company.id],
+        )
+        self.assertEqual(
+            self.get_ids(CUSTOMERS_URL, {'customer_type': 'Company'}),
+            [company.id],
+        )
+        self.assertEqual(len(self.get_ids(CUSTOMERS_URL, {})), 2)
+
+    def test_agreement_filters(self):
+        """Test agreements filter by dates, customer, vehicle and open."""
+        customers = [
+            create_customer(self.user, cr_id_no=str(i)) for i in range(2)]
+        vehicles = [
+            create_vehicle(self.user, registration_no=str(i))
+            for i in range(2)
+        ]
+        agreements = [
+            Agreement.objects.create(
+                user=self.user,
+                rent_type='Daily',
+                agreement_no=f'A-{i}',
+                deposit_type='Cash',
+                checkin_date=date(2023, 1 + i, 1),
+                checkout_date=None if i == 2 else date(2023, 1 + i, 10),
+                customer=customers[i % 2],
+                vehicle=vehicles[i % 2],
+            )
+            for i in range(3)
+        ]
+        first, second, third = (agreement.id for agreement in agreements)
+
+        cases = [
+            ({'checkin_after': '2023-02-01'}, [third, second]),
+            ({'checkin_before': '2023-02-01'}, [second, first]),
+            ({'checkout_after': '2023-01-15'}, [second]),
+            ({'checkout_before': '2023-01-10'}, [first]),
+            ({'customer': customers[0].id}, [third, first]),
+            ({'vehicle': vehicles[1].id}, [second]),
+            ({'open': 'true'}, [third]),
+            ({'open': 'false'}, [second, first]),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.get_ids(AGREEMENTS_URL, params), expected)
+
+    def test_invalid_filter_rejected(self):
+        """Test badly formed filter values are rejected."""
+        res = self.client.get(VEHICLES_URL, {'daily_rate_from': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('daily_rate_from', res.data)
+
+    def test_ordering_pages_through_ties(self):
+        """Test keyset pages on a non-unique field list every row once."""
+        rates = ['20', '10', '20', '10', '30', '20', '10']
+        vehicles = [
+            create_vehicle(self.user, daily_min_rate=Decimal(rate))
+            for rate in rates
+        ]
+        ascending = [
+            vehicle.id for vehicle in sorted(
+                vehicles, key=lambda v: (v.daily_min_rate, v.id))
+        ]
+
+        for fast_list in (True, False):
+            with patch.object(FastListMixin, 'fast_list', fast_list):
+                self.assertEqual(
+                    self.get_ids(VEHICLES_URL, {
+                        'ordering': 'daily_min_rate', 'page_size': 2}),
+                    ascending,
+                )
+                self.assertEqual(
+                    self.get_ids(VEHICLES_URL, {
+                        'ordering': '-daily_min_rate', 'page_size': 3}),
+                    ascending[::-1],
+                )
+
+    def test_ordering_previous_link(self):
+        """Test the previous link of an ordered page goes back."""
+        for name in ['b', 'a', 'c', 'a', 'b']:
+            create_vehicle(self.user, vehicle_name=name)
+        params = {'ordering': 'vehicle_name', 'page_size': 2}
+        first = self.client.get(VEHICLES_URL, params)
+        second = self.client.get(first.json()['next'])
+
+        back = self.client.get(second.json()['previous'])
+
+        self.assertEqual(back.json()['results'], first.json()['results'])
+
+    def test_ordering_with_filter_and_fields(self):
+        """Test ordering works with filters and columns left out."""
+        create_customer(self.user, customer_name='b')
+        create_customer(self.user, customer_name='a', customer_type='Company')
+        create_customer(self.user, customer_name='c', customer_type='Company')
+
+        res = self.client.get(CUSTOMERS_URL, {
+            'customer_type': 'Company',
+            'ordering': '-customer_name',
+            'fields': 'id',
+            'page_size': 1,
+        })
+        second = self.client.get(res.json()['next'])
+
+        names = [
+            Customer.objects.get(id=page.json()['results'][0]['id'])
+            .customer_name for page in (res, second)
+        ]
+        self.assertEqual(names, ['c', 'a'])
+
+    def test_unknown_ordering_rejected(self):
+        """Test only whitelisted fields can be ordered by."""
+        for ordering in ['registration_no', 'status,id', 'user__email']:
+            with self.subTest(ordering=ordering):
+                res = self.client.get(VEHICLES_URL, {'ordering': ordering})
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ordering', res.data)
+
+    def test_export_filtered(self):
+        """Test exports take the list filters."""
+        create_customer(self.user, customer_name='Blocked', is_blocked=True)
+        create_customer(self.user)
+        url = reverse('rent:customer-export', args=['csv'])
+
+        res = self.client.get(url, {'is_blocked': 'true'})
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Blocked', lines[1])
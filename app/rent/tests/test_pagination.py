@@ -0,0 +1,91 @@
+"""
+Tests for cursor pagination of the rent APIs.
+"""
+from base64 import b64encode
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.helpers import create_user, create_vehicle
+
+from rent.pagination import IdCursorPagination
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+
+
+def encode_cursor(querystring):
+    """Encode a raw cursor querystring the way DRF does."""
+    return b64encode(querystring.encode('ascii')).decode('ascii')
+
+
+class CursorPaginationTests(TestCase):
+    """Test paginating rent list endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicles = [create_vehicle(self.user) for _ in range(5)]
+
+    def test_walk_pages(self):
+        """Test following next links returns every vehicle once."""
+        seen = []
+        res = self.client.get(VEHICLES_URL, {'page_size': 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in res.data['results'])
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        expected = sorted((v.id for v in self.vehicles), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_previous_link(self):
+        """Test the previous link returns to the first page."""
+        first = self.client.get(VEHICLES_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_no_count_or_offset(self):
+        """Test fetching a later page issues no COUNT or OFFSET."""
+        first = self.client.get(VEHICLES_URL, {'page_size': 2})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first.data['next'])
+
+        # The version lookup for the ETag, then the page.
+        self.assertEqual(len(ctx.captured_queries), 2)
+        sql = ctx.captured_queries[1]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertIn('LIMIT 3', sql)
+
+    def test_max_page_size(self):
+        """Test the requested page size is capped."""
+        with patch.object(IdCursorPagination, 'max_page_size', 3):
+            res = self.client.get(VEHICLES_URL, {'page_size': 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_offset_cursor_rejected(self):
+        """Test a cursor carrying an offset is rejected."""
+        res = self.client.get(VEHICLES_URL, {'cursor': encode_cursor('o=3')})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_position_rejected(self):
+        """Test a cursor with a non-integer position is rejected."""
+        res = self.client.get(VEHICLES_URL, {'cursor': encode_cursor('p=x')})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,206 @@
+"""
+Query plan regression tests for the rent APIs.
+
+Each test seeds several tenants, calls an endpoint, runs ``EXPLAIN`` on
+every query it issued and fails if the plan scans a whole table or sorts
+rows instead of reading them from an index.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Vehicle, Customer, Agreement, ResourceVersion
+from core.seeding import seed_tenant
+from core.tests.helpers import create_user
+from core.versions import resource_name
+
+
+TENANTS = 20
+ROWS_PER_TENANT = 200
+IDLE_TENANTS = 2000
+BAD_NODES = {'Seq Scan', 'Sort', 'Incremental Sort'}
+# Filtered pages are a small part of the matching rows, as for a real
+# tenant; otherwise sorting all the matches is the cheaper plan.
+FILTERED_PAGE_SIZE = 5
+
+
+def plan_nodes(plan):
+    """Yield every node of a JSON query plan."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+class QueryPlanTests(TestCase):
+    """Test rent endpoint queries are served from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            create_user(email=f'user{i}@example.com')
+            for i in range(TENANTS)
+        ]
+        for tenant, user in enumerate(users):
+            seed_tenant(user.id, 0, tenant, (ROWS_PER_TENANT,) * 3)
+        cls.user = users[TENANTS // 2]
+
+        # Version counters of many more tenants, so the planner sees a
+        # table too large to scan.
+        idle = get_user_model().objects.bulk_create(
+            get_user_model()(email=f'idle{i}@example.com')
+            for i in range(IDLE_TENANTS)
+        )
+        ResourceVersion.objects.bulk_create(
+            ResourceVersion(user=user, resource=resource_name(model))
+            for user in users + idle
+            for model in (Vehicle, Customer, Agreement)
+        )
+
+        with connection.cursor() as cursor:
+            for model in (Vehicle, Customer, Agreement, ResourceVersion):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def setUp(self):
+        # Cached responses would skip the queries under test.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertIndexedQueries(self, url, params=None, bad_nodes=BAD_NODES):
+        """Call url and assert no query it ran scans or sorts."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(ctx.captured_queries)
+
+        for query in ctx.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {query["sql"]}')
+                raw = cursor.fetchone()[0]
+            plan = raw if isinstance(raw, list) else json.loads(raw)
+            nodes = {
+                node['Node Type'] for node in plan_nodes(plan[0]['Plan'])
+            }
+            self.assertFalse(
+                nodes & bad_nodes,
+                f'{query["sql"]}\n{json.dumps(plan, indent=2)}',
+            )
+
+        return res
+
+    def assertListIndexed(self, url_name, params=None):
+        """Assert the first and a following list page use indexes."""
+        url = reverse(f'rent:{url_name}-list')
+        if params is not None:
+            params = {'page_size': FILTERED_PAGE_SIZE, **params}
+        first = self.assertIndexedQueries(url, params)
+        self.assertIsNotNone(first.data['next'])
+        self.assertIndexedQueries(first.data['next'])
+
+    def assertDetailIndexed(self, url_name, model):
+        """Assert the detail endpoint uses indexes."""
+        obj = model.objects.filter(user=self.user).first()
+        url = reverse(f'rent:{url_name}-detail', args=[obj.id])
+        self.assertIndexedQueries(url)
+
+    def test_vehicle_list(self):
+        """Test vehicle list pages are indexed."""
+        self.assertListIndexed('vehicle')
+
+    def test_vehicle_detail(self):
+        """Test vehicle detail is indexed."""
+        self.assertDetailIndexed('vehicle', Vehicle)
+
+    def test_vehicle_availability(self):
+        """Test the availability search uses the period index."""
+        url = reverse('rent:vehicle-available')
+        params = {'start': '2018-03-01', 'end': '2018-03-10'}
+        self.assertIndexedQueries(url, params)
+
+    def test_customer_list(self):
+        """Test customer list pages are indexed."""
+        self.assertListIndexed('customer')
+
+    def test_customer_detail(self):
+        """Test customer detail is indexed."""
+        self.assertDetailIndexed('customer', Customer)
+
+    def test_agreement_list(self):
+        """Test agreement list pages are indexed."""
+        self.assertListIndexed('agreement')
+
+    def test_agreement_detail(self):
+        """Test agreement detail is indexed."""
+        self.assertDetailIndexed('agreement', Agreement)
+
+    def test_vehicle_filters(self):
+        """Test vehicle filters and orderings are indexed."""
+        for params in [
+            {'status': 'Rented'},
+            {'vehicle_type': 'Sedan'},
+            {'ordering': 'vehicle_name'},
+            {'ordering': '-daily_min_rate', 'daily_rate_to': '10'},
+            {'ordering': 'monthly_min_rate', 'monthly_rate_from': '100'},
+        ]:
+            with self.subTest(params=params):
+                self.assertListIndexed('vehicle', params)
+
+    def test_customer_filters(self):
+        """Test customer filters and orderings are indexed."""
+        for params in [
+            {'customer_type': 'Individual'},
+            {'is_blocked': 'false'},
+            {'ordering': '-customer_name'},
+        ]:
+            with self.subTest(params=params):
+                self.assertListIndexed('customer', params)
+
+    def test_agreement_filters(self):
+        """Test agreement filters and orderings are indexed."""
+        agreement = Agreement.objects.filter(user=self.user).first()
+        for params in [
+            {'ordering': 'checkin_date', 'checkin_after': '2018-02-01'},
+            {'ordering': '-checkin_date', 'checkin_before': '2018-04-01'},
+            {'open': 'true'},
+        ]:
+            with self.subTest(params=params):
+                self.assertListIndexed('agreement', params)
+
+        url = reverse('rent:agreement-list')
+        for params in [
+            {'customer': agreement.customer_id},
+            {'vehicle': agreement.vehicle_id},
+        ]:
+            with self.subTest(params=params):
+                self.assertIndexedQueries(url, params)
+
+        # Checkout dates can be null, so they are not an ordering; the
+        # rows in the range are read from its index and sorted by id.
+        self.assertIndexedQueries(
+            url, {'checkout_after': '2018-06-01'}, bad_nodes={'Seq Scan'})
+
+    def test_search(self):
+        """Test searches and autocompletes use the trigram indexes."""
+        customer = Customer.objects.filter(user=self.user).first()
+        vehicle = Vehicle.objects.filter(user=self.user).first()
+        # Matches are sorted by similarity, which no index orders by.
+        for url_name, query in [
+            ('customer', customer.customer_mobile[-8:]),
+            ('customer', 'customer42@exa'),
+            ('vehicle', vehicle.registration_no),
+        ]:
+            for action in ('list', 'autocomplete'):
+                with self.subTest(url_name=url_name, action=action):
+                    self.assertIndexedQueries(
+                        reverse(f'rent:{url_name}-{action}'),
+                        {'search': query},
+                        bad_nodes={'Seq Scan'},
+                    )
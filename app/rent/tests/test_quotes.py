@@ -0,0 +1,92 @@
+"""
+Tests for the vehicle quote API.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.helpers import create_user, create_vehicle
+
+
+QUOTE_URL = reverse('rent:vehicle-quote')
+
+
+class QuoteApiTests(TestCase):
+    """Test quoting rental periods for the fleet."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_quote_fleet(self):
+        """Test every vehicle is quoted in one query."""
+        monthly_rates = {
+            'monthly_min_rate': Decimal('280.00'),
+            'monthly_max_rate': Decimal('300.50'),
+        }
+        sedan = create_vehicle(self.user, **monthly_rates)
+        van = create_vehicle(
+            self.user,
+            vehicle_type='Van',
+            daily_min_rate=Decimal('25.125'),
+            daily_max_rate=Decimal('30.00'),
+            **monthly_rates,
+        )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                QUOTE_URL, {'start': '2023-01-15', 'end': '2023-03-20'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {
+            'months': 2,
+            'days': 5,
+            'results': [
+                {'id': van.id, 'min_price': '685.625',
+                 'max_price': '751.000'},
+                {'id': sedan.id, 'min_price': '610.000',
+                 'max_price': '661.000'},
+            ],
+        })
+
+    def test_quote_filtered(self):
+        """Test only the vehicles matching the filters are quoted."""
+        create_vehicle(self.user)
+        van = create_vehicle(self.user, vehicle_type='Van')
+        other = create_user(email='other@example.com')
+        create_vehicle(other, vehicle_type='Van')
+
+        res = self.client.get(QUOTE_URL, {
+            'start': '2023-01-01',
+            'end': '2023-01-04',
+            'vehicle_type': 'Van',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': van.id, 'min_price': '30.000', 'max_price': '36.000'},
+        ])
+
+    def test_quote_no_vehicles(self):
+        """Test a fleet with no vehicles gets no quotes."""
+        res = self.client.get(
+            QUOTE_URL, {'start': '2023-01-01', 'end': '2023-01-04'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_quote_requires_range(self):
+        """Test a quote needs an end after its start."""
+        res = self.client.get(QUOTE_URL, {'start': '2023-01-04'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('end', res.data)
+
+        res = self.client.get(
+            QUOTE_URL, {'start': '2023-01-04', 'end': '2023-01-04'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('end', res.data)
@@ -79,7 +79,7 @@ class PrivateVehicleApiTests(TestCase):
         vehicles = Vehicle.objects.all().order_by('-id')
         serializer = VehicleSerializer(vehicles, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_vehicle_list_limited_to_user(self):
         """Test list of vehicles is limited to authenticated user."""
@@ -89,10 +89,10 @@ class PrivateVehicleApiTests(TestCase):
 
         res = self.client.get(VEHICLES_URL)
 
-        vehicles = Vehicle.objects.filter(user=self.user)
+        vehicles = Vehicle.objects.filter(user=self.user).order_by('-id')
         serializer = VehicleSerializer(vehicles, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_vehicle_detail(self):
         """Test get vehicle detail."""
@@ -0,0 +1,166 @@
+"""
+Tests for the rental report APIs.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Agreement
+from core.summaries import rebuild_summaries
+from core.tests.helpers import (
+    create_user,
+    create_vehicle,
+    create_customer,
+    create_agreement,
+    summary_rows,
+)
+
+
+MONTHS_URL = reverse('rent:report-months')
+VEHICLES_URL = reverse('rent:report-vehicles')
+CUSTOMERS_URL = reverse('rent:report-customers')
+VEHICLES_BULK_URL = reverse('rent:vehicle-bulk')
+AGREEMENTS_BULK_URL = reverse('rent:agreement-bulk')
+
+
+class PublicReportApiTests(TestCase):
+    """Test unauthenticated report requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to read reports."""
+        res = APIClient().get(MONTHS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateReportApiTests(TestCase):
+    """Test the reports read from the monthly summaries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.car = create_vehicle(self.user)
+        self.van = create_vehicle(
+            self.user, registration_no='2', daily_min_rate=Decimal('20.00'))
+        self.alice = create_customer(self.user, customer_name='Alice')
+        self.bob = create_customer(self.user, customer_name='Bob')
+        create_agreement(self.user, self.car, self.alice)
+        create_agreement(
+            self.user, self.van, self.bob,
+            agreement_no='A-2',
+            checkin_date=date(2023, 2, 10),
+            checkout_date=date(2023, 2, 13),
+        )
+
+    def test_months_report(self):
+        """Test listing the totals of each month."""
+        res = self.client.get(MONTHS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [
+            {
+                'month': '2023-01',
+                'rentals': 1,
+                'rental_days': 2,
+                'revenue': '20.000',
+            },
+            {
+                'month': '2023-02',
+                'rentals': 1,
+                'rental_days': 5,
+                'revenue': '80.000',
+            },
+        ])
+
+    def test_vehicles_report_by_revenue(self):
+        """Test listing vehicle totals, highest revenue first."""
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['vehicle'], row['revenue']) for row in res.json()],
+            [(self.van.id, '60.000'), (self.car.id, '40.000')],
+        )
+
+    def test_customers_report_month_range(self):
+        """Test limiting a report to a range of months."""
+        res = self.client.get(
+            CUSTOMERS_URL, {'month_from': '2023-02', 'month_to': '2023-02'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [
+            {
+                'customer': self.bob.id,
+                'rentals': 1,
+                'rental_days': 3,
+                'revenue': '60.000',
+            },
+            {
+                'customer': self.alice.id,
+                'rentals': 0,
+                'rental_days': 2,
+                'revenue': '20.000',
+            },
+        ])
+
+    def test_invalid_month(self):
+        """Test a month not written as YYYY-MM is rejected."""
+        res = self.client.get(MONTHS_URL, {'month_from': '2023-02-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('month_from', res.data)
+
+    def test_reports_limited_to_user(self):
+        """Test reports only total the user's own rentals."""
+        other = create_user(email='other@example.com')
+        create_agreement(
+            other, create_vehicle(other), create_customer(other),
+            checkin_date=date(2023, 3, 1),
+            checkout_date=date(2023, 3, 2),
+        )
+
+        res = self.client.get(MONTHS_URL)
+
+        self.assertEqual(
+            [row['month'] for row in res.json()], ['2023-01', '2023-02'])
+
+    def test_reports_read_summaries_only(self):
+        """Test reports do not query the agreements."""
+        with self.assertNumQueries(1) as queries:
+            self.client.get(VEHICLES_URL)
+
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn(Agreement._meta.db_table, sql)
+
+    def test_bulk_changes_update_summaries(self):
+        """Test bulk creates and rate updates keep the summaries current."""
+        item = {
+            'rent_type': 'Monthly',
+            'agreement_no': 'A-3',
+            'deposit_type': 'Cash',
+            'checkin_date': '2023-04-01',
+            'customer': self.alice.id,
+            'vehicle': self.car.id,
+        }
+        res = self.client.post(AGREEMENTS_BULK_URL, [item], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.patch(VEHICLES_BULK_URL, [
+            {'id': self.car.id, 'daily_min_rate': '12.50'},
+            {'id': self.van.id, 'status': 'Rented'},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(VEHICLES_URL)
+        revenue = {row['vehicle']: row['revenue'] for row in res.json()}
+        self.assertEqual(revenue[self.car.id], '50.000')
+        self.assertEqual(revenue[self.van.id], '60.000')
+        rows = summary_rows()
+        rebuild_summaries()
+        self.assertEqual(summary_rows(), rows)
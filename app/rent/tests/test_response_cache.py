@@ -0,0 +1,119 @@
+"""
+Tests for the rent API response cache.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Customer
+from core.tests.helpers import create_user, create_vehicle
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+CUSTOMERS_URL = reverse('rent:customer-list')
+STATS_URL = reverse('rent:cache-stats')
+
+
+class ResponseCacheTests(TestCase):
+    """Test caching rent API responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+
+    def test_hit_serves_same_response(self):
+        """Test a repeated request is served from the cache."""
+        miss = self.client.get(VEHICLES_URL, {'page_size': 10})
+
+        with self.assertNumQueries(1):
+            hit = self.client.get(VEHICLES_URL, {'page_size': 10})
+
+        self.assertEqual(miss['X-Cache'], 'MISS')
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(hit.status_code, status.HTTP_200_OK)
+        self.assertEqual(hit.content, miss.content)
+        for header in ('Content-Type', 'ETag', 'Vary', 'Allow'):
+            self.assertEqual(hit[header], miss[header])
+
+    def test_write_invalidates(self):
+        """Test saving and deleting objects invalidate cached lists."""
+        self.client.get(VEHICLES_URL)
+
+        self.vehicle.status = 'Rented'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.save()
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['status'], 'Rented')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.delete()
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    def test_other_model_write_keeps_entry(self):
+        """Test a write only invalidates the model it changed."""
+        self.client.get(VEHICLES_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.create(
+                user=self.user,
+                customer_type='Individual',
+                customer_name='Sample customer',
+                cr_id_no='1234',
+                customer_email='customer@example.com',
+                customer_mobile='555000',
+            )
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_cache_per_user(self):
+        """Test users never get each other's cached responses."""
+        self.client.get(VEHICLES_URL)
+        other = create_user(email='other@example.com')
+        self.client.force_authenticate(other)
+
+        res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    def test_browsable_api_not_cached(self):
+        """Test HTML responses bypass the cache."""
+        self.client.get(VEHICLES_URL, HTTP_ACCEPT='text/html')
+        res = self.client.get(VEHICLES_URL, HTTP_ACCEPT='text/html')
+
+        self.assertNotIn('X-Cache', res)
+
+    def test_stats(self):
+        """Test the counters are shown to admins."""
+        self.client.get(VEHICLES_URL)
+        self.client.get(VEHICLES_URL)
+        self.client.get(VEHICLES_URL)
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com',
+            'test123',
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(
+            res.data, {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3})
+
+    def test_stats_admin_only(self):
+        """Test other users cannot see the counters."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
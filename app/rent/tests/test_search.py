@@ -0,0 +1,163 @@
+"""
+Tests for searching and autocompleting rent resources.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.helpers import create_user, create_vehicle, create_customer
+from rent.mixins import FastListMixin
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+CUSTOMERS_URL = reverse('rent:customer-list')
+CUSTOMER_AUTOCOMPLETE_URL = reverse('rent:customer-autocomplete')
+VEHICLE_AUTOCOMPLETE_URL = reverse('rent:vehicle-autocomplete')
+
+
+class SearchTests(TestCase):
+    """Test trigram search of customers and vehicles."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.alice = create_customer(self.user, customer_name='Alice Smith')
+        self.alicia = create_customer(
+            self.user, customer_name='Alicia Smith')
+        self.bob = create_customer(
+            self.user,
+            customer_name='Bob Stone',
+            customer_mobile='+971 555 0123',
+            customer_email='bob.stone@example.org',
+            cr_id_no='784-1990-77',
+        )
+
+    def search_ids(self, url, query, **params):
+        """Return the ids url lists for a search."""
+        res = self.client.get(url, {'search': query, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['id'] for item in res.json()['results']]
+
+    def test_ranked_by_similarity(self):
+        """Test the closest name is listed first."""
+        self.assertEqual(
+            self.search_ids(CUSTOMERS_URL, 'alice'),
+            [self.alice.id, self.alicia.id],
+        )
+
+    def test_partial_fields(self):
+        """Test parts of a phone, email or ID number are found."""
+        for query in ['5 0123', 'stone@exa', '1990', 'BOB']:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.search_ids(CUSTOMERS_URL, query), [self.bob.id])
+
+    def test_typo_found(self):
+        """Test a misspelt name still finds the customer."""
+        self.assertEqual(
+            self.search_ids(CUSTOMERS_URL, 'Stonr'), [self.bob.id])
+
+    def test_wildcards_escaped(self):
+        """Test LIKE wildcards in the query match themselves."""
+        self.assertEqual(self.search_ids(CUSTOMERS_URL, '%_%'), [])
+
+    def test_other_users_not_found(self):
+        """Test searches only see the user's customers."""
+        other = create_user(email='other@example.com')
+        create_customer(other, customer_name='Alice Smith')
+
+        self.assertEqual(
+            self.search_ids(CUSTOMERS_URL, 'alice smith'),
+            [self.alice.id, self.alicia.id],
+        )
+
+    def test_pages_in_rank_order(self):
+        """Test search results page through every match once."""
+        for fast_list in (True, False):
+            with patch.object(FastListMixin, 'fast_list', fast_list):
+                ids = []
+                res = self.client.get(
+                    CUSTOMERS_URL, {'search': 'smith', 'page_size': 1})
+                while True:
+                    ids += [item['id'] for item in res.json()['results']]
+                    if res.json()['next'] is None:
+                        break
+                    res = self.client.get(res.json()['next'])
+            cache.clear()
+
+            self.assertCountEqual(ids, [self.alice.id, self.alicia.id])
+
+    def test_fast_path_matches_serializer(self):
+        """Test search pages are the same on both list paths."""
+        fast = self.client.get(CUSTOMERS_URL, {'search': 'ali'})
+        cache.clear()
+
+        with patch.object(FastListMixin, 'fast_list', False):
+            slow = self.client.get(CUSTOMERS_URL, {'search': 'ali'})
+
+        self.assertEqual(fast.content, slow.content)
+
+    def test_short_query_rejected(self):
+        """Test queries too short for the trigram index are rejected."""
+        res = self.client.get(CUSTOMERS_URL, {'search': 'al'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('search', res.data)
+
+    def test_search_with_ordering_rejected(self):
+        """Test search results cannot be reordered."""
+        res = self.client.get(
+            CUSTOMERS_URL, {'search': 'alice', 'ordering': 'customer_name'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', res.data)
+
+    def test_vehicle_registration_search(self):
+        """Test vehicles are found by part of the registration number."""
+        vehicle = create_vehicle(self.user, registration_no='DXB-A-48213')
+        create_vehicle(self.user, registration_no='AUH-9-11111')
+
+        self.assertEqual(
+            self.search_ids(VEHICLES_URL, 'a-482'), [vehicle.id])
+        self.assertEqual(
+            self.search_ids(VEHICLES_URL, '48213', status='Rented'), [])
+
+    def test_autocomplete(self):
+        """Test autocomplete lists the best matches with few fields."""
+        res = self.client.get(CUSTOMER_AUTOCOMPLETE_URL, {'search': 'alice'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0], {
+            'id': self.alice.id,
+            'customer_name': 'Alice Smith',
+            'customer_mobile': '555000',
+            'cr_id_no': '1234',
+        })
+        self.assertEqual(len(res.data), 2)
+
+    @override_settings(AUTOCOMPLETE_LIMIT=1)
+    def test_autocomplete_limit(self):
+        """Test autocomplete lists at most AUTOCOMPLETE_LIMIT rows."""
+        create_vehicle(self.user, registration_no='DXB-1')
+        create_vehicle(self.user, registration_no='DXB-2')
+
+        res = self.client.get(VEHICLE_AUTOCOMPLETE_URL, {'search': 'DXB'})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(
+            set(res.data[0]), {'id', 'registration_no', 'vehicle_name'})
+
+    def test_autocomplete_needs_search(self):
+        """Test autocomplete without a query is rejected."""
+        res = self.client.get(CUSTOMER_AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('search', res.data)
@@ -0,0 +1,126 @@
+"""
+Tests for sparse fieldsets on the rent APIs.
+"""
+import json
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Customer
+from core.tests.helpers import create_user, create_vehicle
+from rent.mixins import FastListMixin
+
+
+VEHICLES_URL = reverse('rent:vehicle-list')
+CUSTOMERS_URL = reverse('rent:customer-list')
+
+
+class SparseFieldsTests(TestCase):
+    """Test narrowing responses with the fields parameter."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+        self.customer = Customer.objects.create(
+            user=self.user,
+            customer_type='Individual',
+            customer_name='Sample customer',
+            cr_id_no='1234',
+            customer_email='customer@example.com',
+            customer_mobile='555000',
+            customer_address='Line 1\nLine 2',
+        )
+
+    def get_queries(self, url, params=None):
+        """Get url and return the response and the SQL it ran."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query['sql'] for query in ctx.captured_queries]
+
+    def test_list_narrowed(self):
+        """Test the list shows and selects only the asked fields."""
+        res, queries = self.get_queries(
+            VEHICLES_URL, {'fields': 'status,vehicle_name'})
+
+        self.assertEqual(
+            res.json()['results'],
+            [{'vehicle_name': 'Sample vehicle name', 'status': 'Ready'}],
+        )
+        self.assertNotIn('"registration_no"', queries[-1])
+
+    def test_list_narrowed_without_fast_path(self):
+        """Test the serializer path narrows the same way."""
+        params = {'fields': 'id,status'}
+        fast = self.client.get(VEHICLES_URL, params)
+
+        with patch.object(FastListMixin, 'fast_list', False):
+            res, queries = self.get_queries(VEHICLES_URL, params)
+
+        self.assertEqual(res.content, fast.content)
+        self.assertNotIn('"registration_no"', queries[-1])
+
+    def test_detail_narrowed(self):
+        """Test a detail shows and selects only the asked fields."""
+        url = reverse('rent:customer-detail', args=[self.customer.id])
+
+        res, queries = self.get_queries(url, {'fields': 'customer_name'})
+
+        self.assertEqual(res.data, {'customer_name': 'Sample customer'})
+        self.assertNotIn('"customer_address"', queries[-1])
+
+    def test_list_defers_unshown_columns(self):
+        """Test a list without fields skips the columns it does not show."""
+        res, queries = self.get_queries(CUSTOMERS_URL)
+
+        self.assertIn('customer_email', res.data['results'][0])
+        self.assertNotIn('"customer_address"', queries[-1])
+
+    def test_availability_narrowed(self):
+        """Test the availability search takes the fields parameter."""
+        res = self.client.get(
+            reverse('rent:vehicle-available'),
+            {'start': '2024-01-01', 'fields': 'id'},
+        )
+
+        self.assertEqual(res.data['results'], [{'id': self.vehicle.id}])
+
+    def test_unknown_field_rejected(self):
+        """Test fields the serializer does not show are rejected."""
+        res = self.client.get(
+            VEHICLES_URL, {'fields': 'status,daily_max_rate,nope'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data['fields'], ['Unknown fields: daily_max_rate, nope.'])
+
+    def test_write_ignores_fields(self):
+        """Test writes validate and answer with every field."""
+        url = reverse('rent:vehicle-detail', args=[self.vehicle.id])
+
+        res = self.client.patch(
+            f'{url}?fields=status', {'vehicle_name': 'New name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['vehicle_name'], 'New name')
+        self.assertIn('registration_no', res.data)
+
+    def test_export_narrowed(self):
+        """Test exports only write the asked columns."""
+        url = reverse('rent:customer-export', args=['ndjson'])
+
+        res = self.client.get(url, {'fields': 'customer_name,id'})
+
+        self.assertEqual(
+            json.loads(b''.join(res.streaming_content)),
+            {'id': self.customer.id, 'customer_name': 'Sample customer'},
+        )
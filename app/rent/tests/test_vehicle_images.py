@@ -0,0 +1,299 @@
+"""
+Tests for vehicle image uploads and renditions.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import images
+from core.tests.helpers import create_user, create_vehicle
+from rent.uploads import MULTIPART_OVERHEAD
+
+
+def image_upload_url(vehicle_id):
+    """Create and return an image upload URL."""
+    return reverse('rent:vehicle-upload-image', args=[vehicle_id])
+
+
+def create_image_file(size=(2000, 1000), color='red'):
+    """Create and return an open temporary JPEG file."""
+    image_file = tempfile.NamedTemporaryFile(suffix='.jpg')
+    Image.new('RGB', size, color=color).save(image_file, format='JPEG')
+    image_file.seek(0)
+
+    return image_file
+
+
+def render_callbacks(callbacks):
+    """Return the on commit callbacks rendering an image."""
+    return [
+        callback for callback in callbacks
+        if getattr(callback, 'func', None) is images._render
+    ]
+
+
+class ImageTestMixin:
+    """Store media files in a temporary directory."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media_root = media_root
+
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.vehicle = create_vehicle(self.user)
+
+    def upload(self, size=(2000, 1000), color='red', vehicle=None):
+        """Upload an image to a vehicle and return the response."""
+        vehicle = vehicle or self.vehicle
+        with create_image_file(size, color) as image_file:
+            return self.client.post(
+                image_upload_url(vehicle.id),
+                {'image': image_file},
+                format='multipart',
+            )
+
+    def assertRenditions(self, renditions):
+        """Assert every rendition is stored within its size."""
+        self.assertEqual(set(renditions), set(images.RENDITIONS))
+        for rendition, name in renditions.items():
+            path = os.path.join(self.media_root, name)
+            with Image.open(path) as image:
+                self.assertEqual(image.format, images.FORMAT)
+                self.assertEqual(
+                    max(image.size), images.RENDITIONS[rendition])
+
+
+@override_settings(IMAGE_WORKERS=0)
+class VehicleImageTests(ImageTestMixin, TestCase):
+    """Test uploading vehicle images."""
+
+    def test_upload_returns_before_rendering(self):
+        """Test the upload responds with the original and no renditions."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_renditions'], {})
+        self.vehicle.refresh_from_db()
+        self.assertTrue(os.path.exists(self.vehicle.image.path))
+        self.assertEqual(len(render_callbacks(callbacks)), 1)
+
+    def test_renditions_made_after_commit(self):
+        """Test renditions are made once the upload commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+
+        self.vehicle.refresh_from_db()
+        self.assertRenditions(self.vehicle.image_renditions)
+
+    def test_small_image_not_enlarged(self):
+        """Test renditions are never larger than the original."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(size=(300, 200))
+
+        self.vehicle.refresh_from_db()
+        path = os.path.join(
+            self.media_root, self.vehicle.image_renditions['full'])
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (300, 200))
+
+    def test_renditions_listed(self):
+        """Test the vehicle list shows rendition URLs."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+
+        res = self.client.get(reverse('rent:vehicle-list'))
+
+        renditions = res.data['results'][0]['image_renditions']
+        self.vehicle.refresh_from_db()
+        for rendition, name in self.vehicle.image_renditions.items():
+            self.assertEqual(
+                renditions[rendition],
+                f'http://testserver/static/media/{name}',
+            )
+
+    def test_new_upload_clears_renditions(self):
+        """Test replacing the image drops the old renditions."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+
+        with self.captureOnCommitCallbacks():
+            self.upload(color='blue')
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.image_renditions, {})
+
+    def test_render_command(self):
+        """Test the command renders images without renditions."""
+        with self.captureOnCommitCallbacks():
+            self.upload()
+        out = StringIO()
+
+        call_command('render_vehicle_images', stdout=out)
+
+        self.vehicle.refresh_from_db()
+        self.assertRenditions(self.vehicle.image_renditions)
+        self.assertIn('Rendered 1 images', out.getvalue())
+
+    def test_image_named_by_content(self):
+        """Test the stored name is the hash of the uploaded bytes."""
+        with create_image_file() as image_file:
+            digest = hashlib.sha256(image_file.read()).hexdigest()
+            image_file.seek(0)
+            self.client.post(
+                image_upload_url(self.vehicle.id),
+                {'image': image_file},
+                format='multipart',
+            )
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(
+            self.vehicle.image.name,
+            f'uploads/vehicle/{digest[:2]}/{digest}.jpg',
+        )
+
+    def test_same_image_stored_once(self):
+        """Test vehicles uploading the same image share one file."""
+        other = create_vehicle(self.user, registration_no='999')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            res = self.upload(vehicle=other)
+
+        self.vehicle.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, self.vehicle.image.name)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(other.image.path))), 2)
+        self.assertEqual(
+            other.image_renditions, self.vehicle.image_renditions)
+        self.assertEqual(len(res.data['image_renditions']), 3)
+        self.assertEqual(render_callbacks(callbacks), [])
+
+    def test_replaced_image_deleted(self):
+        """Test an image no vehicle shows any more is deleted."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        self.vehicle.refresh_from_db()
+        old = self.vehicle.image.path
+        old_renditions = self.vehicle.image_renditions
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(color='blue')
+
+        self.assertFalse(os.path.exists(old))
+        for name in old_renditions.values():
+            self.assertFalse(
+                os.path.exists(os.path.join(self.media_root, name)))
+        self.vehicle.refresh_from_db()
+        self.assertTrue(os.path.exists(self.vehicle.image.path))
+
+    def test_shared_image_kept(self):
+        """Test an image is kept while another vehicle shows it."""
+        other = create_vehicle(self.user, registration_no='999')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+            self.upload(vehicle=other)
+        self.vehicle.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(color='blue')
+            other.delete()
+
+        self.assertFalse(os.path.exists(self.vehicle.image.path))
+
+    def test_deleted_vehicle_image_deleted(self):
+        """Test deleting a vehicle deletes its unshared image."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        self.vehicle.refresh_from_db()
+        path = self.vehicle.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse('rent:vehicle-detail', args=[self.vehicle.id]))
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_declared_size_too_large(self):
+        """Test a body declared too large is refused before reading."""
+        url = image_upload_url(self.vehicle.id)
+        with override_settings(IMAGE_MAX_BYTES=1000):
+            res = self.client.generic(
+                'POST',
+                url,
+                b'',
+                content_type='multipart/form-data; boundary=x',
+                CONTENT_LENGTH=str(1000 + MULTIPART_OVERHEAD + 1),
+            )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_streamed_size_too_large(self):
+        """Test an upload is refused once it passes the size limit."""
+        with override_settings(IMAGE_MAX_BYTES=10000):
+            res = self.upload()
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.vehicle.refresh_from_db()
+        self.assertFalse(self.vehicle.image)
+
+    def test_dimensions_too_large(self):
+        """Test an image with a side over the limit is rejected."""
+        with override_settings(IMAGE_MAX_DIMENSION=1500):
+            res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+        self.vehicle.refresh_from_db()
+        self.assertFalse(self.vehicle.image)
+
+
+@override_settings(IMAGE_WORKERS=1)
+class VehicleImagePoolTests(ImageTestMixin, TransactionTestCase):
+    """Test renditions made in the process pool."""
+
+    def test_renditions_made_in_pool(self):
+        """Test the pool renders and records the renditions."""
+        self.upload()
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            self.vehicle.refresh_from_db()
+            if self.vehicle.image_renditions:
+                break
+            time.sleep(0.05)
+
+        self.assertRenditions(self.vehicle.image_renditions)
+
+    def test_pool_runs_python_under_embedding_servers(self):
+        """Test workers are not spawned with an embedding server's binary."""
+        uwsgi = os.path.join(sys.exec_prefix, 'bin', 'uwsgi')
+        with patch.object(sys, 'executable', uwsgi):
+            interpreter = images._interpreter()
+
+        self.assertEqual(
+            interpreter, os.path.join(sys.exec_prefix, 'bin', 'python'))
+        self.assertTrue(os.access(interpreter, os.X_OK))
@@ -0,0 +1,83 @@
+"""
+Upload handlers for the rent APIs.
+"""
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import ValidationError
+
+from rent.exceptions import UploadTooLarge
+
+
+# Room for the multipart boundaries and headers around the file.
+MULTIPART_OVERHEAD = 64 * 1024
+# Bytes kept to read the image dimensions from before giving up.
+HEADER_BYTES = 256 * 1024
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream an image upload to a temporary file, hashing it on the way.
+
+    The request is refused before its body is read when it declares more
+    than IMAGE_MAX_BYTES, and as soon as the bytes received pass that
+    limit or the image header shows a side longer than
+    IMAGE_MAX_DIMENSION. Finished files carry their digest in ``sha256``.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > settings.IMAGE_MAX_BYTES + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+        self.header = b''
+        self.checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_MAX_BYTES:
+            raise UploadTooLarge()
+
+        self.sha256.update(raw_data)
+        if not self.checked:
+            self.header += raw_data
+            self._check_dimensions()
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def _check_dimensions(self):
+        """Reject the image once its header shows it is too large."""
+        try:
+            # Opening only parses the header, no pixels are decoded.
+            with Image.open(BytesIO(self.header)) as image:
+                size = image.size
+        except Exception:
+            if len(self.header) >= HEADER_BYTES:
+                # Not an image Pillow can size from its start. The image
+                # field validates the complete file later.
+                self.checked = True
+                self.header = b''
+            return
+
+        self.checked = True
+        self.header = b''
+        if max(size) > settings.IMAGE_MAX_DIMENSION:
+            msg = _('Image must be at most %(max)d pixels on each side.') % {
+                'max': settings.IMAGE_MAX_DIMENSION,
+            }
+            raise ValidationError({'image': [msg]})
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+
+        return file
@@ -1,6 +1,7 @@
 """
 URL mappings for the rent app.
 """
+from django.conf import settings
 from django.urls import (
     path,
     include,
@@ -9,15 +10,26 @@ from django.urls import (
 from rest_framework.routers import DefaultRouter
 
 from rent import views
+from rent.asyncviews import async_urlpatterns
 
 
 router = DefaultRouter()
 router.register('vehicles', views.VehicleViewSet)
 router.register('customers', views.CustomerViewSet)
 router.register('agreement', views.AgreementViewSet)
+router.register('reports', views.ReportViewSet, basename='report')
 
 app_name = 'rent'
 
+router_urls = router.urls
+if settings.SERVER_MODE == 'asgi':
+    router_urls = async_urlpatterns(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path(
+        'cache-stats/',
+        views.ResponseCacheStatsView.as_view(),
+        name='cache-stats',
+    ),
+    path('', include(router_urls)),
 ]
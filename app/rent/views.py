@@ -5,9 +5,15 @@ from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
+    OpenApiResponse,
     OpenApiTypes,
 )
 
+from psycopg2 import errorcodes
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Sum, Value
+
 from rest_framework import (
     viewsets,
     mixins,
@@ -15,60 +21,107 @@ from rest_framework import (
 )
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
 
-from core.models import Vehicle,Customer,Agreement
+from core.images import schedule_renditions
+from core.models import (
+    Vehicle,
+    Customer,
+    Agreement,
+    VehicleMonthlySummary,
+    CustomerMonthlySummary,
+    rental_period,
+)
+from core.quotes import quote_vehicles
 from rent import serializers
+from rent.cache import get_stats
+from rent.exceptions import BookingConflict
+from rent.filters import (
+    KeysetOrderingFilter,
+    QueryParamsFilter,
+    TrigramSearchFilter,
+)
+from rent.mixins import (
+    AutocompleteMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    ExpandMixin,
+    ExportMixin,
+    FastListMixin,
+    SparseFieldsMixin,
+    is_plain_json,
+)
+from rent.renderers import FastJSONRenderer
+from rent.uploads import ImageUploadHandler
+from user.authentication import CachedTokenAuthentication
 
-# @extend_schema_view(
-#     list=extend_schema(
-#         parameters=[
-#             OpenApiParameter(
-#                 'tags',
-#                 OpenApiTypes.STR,
-#                 description='Comma separated list of tag IDs to filter',
-#             ),
-#             OpenApiParameter(
-#                 'ingredients',
-#                 OpenApiTypes.STR,
-#                 description='Comma separated list of ingredient IDs to filter',
-#             ),
-#         ]
-#     )
-# )
-
-
-class VehicleViewSet(viewsets.ModelViewSet):
+FIELDS_PARAMETER = OpenApiParameter(
+    'fields',
+    OpenApiTypes.STR,
+    description='Comma separated list of fields to return',
+)
+FIELDS_SCHEMA = extend_schema(parameters=[FIELDS_PARAMETER])
+EXPAND_PARAMETER = OpenApiParameter(
+    'expand',
+    OpenApiTypes.STR,
+    description='Comma separated list of related objects to nest',
+)
+EXPAND_SCHEMA = extend_schema(
+    parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER])
+AUTOCOMPLETE_SCHEMA = extend_schema(
+    parameters=[
+        OpenApiParameter(
+            'search',
+            OpenApiTypes.STR,
+            required=True,
+            description='Text to match, at least 3 characters',
+        ),
+    ],
+    responses={200: OpenApiResponse(description='List of the best matches')},
+)
+
+
+@extend_schema_view(
+    list=FIELDS_SCHEMA,
+    retrieve=FIELDS_SCHEMA,
+    autocomplete=AUTOCOMPLETE_SCHEMA,
+)
+class VehicleViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    BulkModelMixin,
+    AutocompleteMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage vehicle APIs."""
     serializer_class = serializers.VehicleDetailSerializer
     queryset = Vehicle.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
-
-    def _params_to_ints(self, qs):
-        """Convert a list of strings to integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+    filter_backends = [
+        QueryParamsFilter,
+        TrigramSearchFilter,
+        KeysetOrderingFilter,
+    ]
+    filter_serializer_class = serializers.VehicleFilterSerializer
+    search_fields = ['registration_no']
+    autocomplete_fields = ['id', 'registration_no', 'vehicle_name']
+    ordering_fields = [
+        'id',
+        'vehicle_name',
+        'daily_min_rate',
+        'monthly_min_rate',
+    ]
 
     def get_queryset(self):
         """Retrieve Vehicles for authenticated user."""
-        # tags = self.request.query_params.get('tags')
-        # ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
-        # if tags:
-        #     tag_ids = self._params_to_ints(tags)
-        #     queryset = queryset.filter(tags__id__in=tag_ids)
-        # if ingredients:
-        #     ingredient_ids = self._params_to_ints(ingredients)
-        #     queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
+        return self.queryset.filter(user=self.request.user).order_by('-id')
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
-        if self.action == 'list':
+        if self.action in ('list', 'available'):
             return serializers.VehicleSerializer
         elif self.action == 'upload_image':
             return serializers.VehicleImageSerializer
@@ -79,24 +132,135 @@ class VehicleViewSet(viewsets.ModelViewSet):
         """Create a new vehicle."""
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'start',
+                OpenApiTypes.DATE,
+                required=True,
+                description='First day the vehicle is needed',
+            ),
+            OpenApiParameter(
+                'end',
+                OpenApiTypes.DATE,
+                description='Return day, the vehicle is needed until the '
+                            'day before. Omit for an open-ended rental',
+            ),
+            FIELDS_PARAMETER,
+        ]
+    )
+    @action(methods=['GET'], detail=False)
+    def available(self, request):
+        """List vehicles with no agreement overlapping a date range."""
+        params = serializers.VehicleAvailabilitySerializer(
+            data=request.query_params)
+        params.is_valid(raise_exception=True)
+        wanted = rental_period(
+            Value(params.validated_data['start']),
+            Value(params.validated_data.get('end')),
+        )
+        busy = Agreement.objects.annotate(
+            period=rental_period(),
+        ).filter(
+            vehicle=OuterRef('pk'),
+            period__overlap=wanted,
+        )
+        queryset = self.filter_queryset(
+            self.get_queryset()).filter(~Exists(busy))
+
+        return self.list_response(queryset)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'start',
+                OpenApiTypes.DATE,
+                required=True,
+                description='First day of the rental',
+            ),
+            OpenApiParameter(
+                'end',
+                OpenApiTypes.DATE,
+                required=True,
+                description='Return day, the vehicle is rented until the '
+                            'day before',
+            ),
+        ],
+        responses=serializers.FleetQuoteSerializer,
+    )
+    @action(methods=['GET'], detail=False)
+    def quote(self, request):
+        """Price a rental period for every vehicle matching the filters."""
+        params = serializers.VehicleQuoteSerializer(
+            data=request.query_params)
+        params.is_valid(raise_exception=True)
+        months, days, quotes = quote_vehicles(
+            self.filter_queryset(self.get_queryset()),
+            params.validated_data['start'],
+            params.validated_data['end'],
+        )
+
+        # Plain ints and strings, written by orjson to the same bytes.
+        if is_plain_json(request):
+            request.accepted_renderer = FastJSONRenderer()
+        return Response({'months': months, 'days': days, 'results': quotes})
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to vehicle."""
+        request.upload_handlers = [ImageUploadHandler(request)]
         vehicle = self.get_object()
         serializer = self.get_serializer(vehicle, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                schedule_renditions(vehicle)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class CustomerViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=FIELDS_SCHEMA,
+    retrieve=FIELDS_SCHEMA,
+    autocomplete=AUTOCOMPLETE_SCHEMA,
+    export=FIELDS_SCHEMA,
+)
+class CustomerViewSet(
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    BulkModelMixin,
+    AutocompleteMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage customer APIs."""
     serializer_class = serializers.CustomerDetailSerializer
     queryset = Customer.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    filter_backends = [
+        QueryParamsFilter,
+        TrigramSearchFilter,
+        KeysetOrderingFilter,
+    ]
+    filter_serializer_class = serializers.CustomerFilterSerializer
+    search_fields = [
+        '%customer_name',
+        'customer_mobile',
+        'customer_email',
+        'cr_id_no',
+    ]
+    autocomplete_fields = [
+        'id',
+        'customer_name',
+        'customer_mobile',
+        'cr_id_no',
+    ]
+    ordering_fields = ['id', 'customer_name']
+    export_fields = serializers.CustomerDetailSerializer.Meta.fields
+    export_filename = 'customers'
 
     def get_queryset(self):
         """Retrieve Customers for authenticated user."""
@@ -114,12 +278,34 @@ class CustomerViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class AgreementViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=EXPAND_SCHEMA,
+    retrieve=EXPAND_SCHEMA,
+    export=FIELDS_SCHEMA,
+)
+class AgreementViewSet(
+    ExpandMixin,
+    ConditionalGetMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    BulkModelMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
     """View for manage Agreement APIs."""
     serializer_class = serializers.AgreementDetailSerializer
     queryset = Agreement.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    filter_backends = [QueryParamsFilter, KeysetOrderingFilter]
+    filter_serializer_class = serializers.AgreementFilterSerializer
+    ordering_fields = ['id', 'checkin_date']
+    export_fields = serializers.AgreementDetailSerializer.Meta.fields
+    export_filename = 'agreements'
+    expandable_fields = {
+        'customer': serializers.CustomerSerializer,
+        'vehicle': serializers.VehicleSerializer,
+    }
 
     def get_queryset(self):
         """Retrieve Agreements for authenticated user."""
@@ -132,6 +318,177 @@ class AgreementViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def _conflicting_agreement_id(self, data, instance=None):
+        """Return the id of an agreement overlapping the given values."""
+        def value(name):
+            if name in data:
+                return data[name]
+            return getattr(instance, name, None)
+
+        conflicts = self.get_queryset().annotate(
+            period=rental_period(),
+        ).filter(
+            vehicle=value('vehicle'),
+            period__overlap=rental_period(
+                Value(value('checkin_date')),
+                Value(value('checkout_date')),
+            ),
+        )
+        if instance is not None:
+            conflicts = conflicts.exclude(pk=instance.pk)
+
+        return conflicts.values_list('id', flat=True).first()
+
+    def _save_booking(self, serializer, **kwargs):
+        """Save agreements, turning an overlap into a 409 response.
+
+        Overlaps are rejected by the agreement_vehicle_no_overlap exclusion
+        constraint, so concurrent bookings need no lock here. For bulk
+        writes the conflict reported is the first one found against stored
+        agreements, or none when items of the request overlap each other.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save(**kwargs)
+        except IntegrityError as exc:
+            pgcode = getattr(exc.__cause__, 'pgcode', None)
+            if pgcode != errorcodes.EXCLUSION_VIOLATION:
+                raise
+
+            if getattr(serializer, 'many', False):
+                items = serializer.validated_data
+                instances = serializer.instance or [None] * len(items)
+            else:
+                items = [serializer.validated_data]
+                instances = [serializer.instance]
+            conflict = None
+            for data, instance in zip(items, instances):
+                conflict = self._conflicting_agreement_id(data, instance)
+                if conflict is not None:
+                    break
+            raise BookingConflict(conflict)
+
     def perform_create(self, serializer):
         """Create a new Agreement."""
-        serializer.save(user=self.request.user)
+        self._save_booking(serializer, user=self.request.user)
+
+    def perform_update(self, serializer):
+        """Update an Agreement."""
+        self._save_booking(serializer)
+
+    def perform_bulk_create(self, serializer):
+        """Create Agreements for the user."""
+        self._save_booking(serializer, user=self.request.user)
+
+    def perform_bulk_update(self, serializer):
+        """Update Agreements."""
+        self._save_booking(serializer)
+
+
+REPORT_PARAMETERS = [
+    OpenApiParameter(
+        'month_from',
+        OpenApiTypes.STR,
+        description='First month, YYYY-MM',
+    ),
+    OpenApiParameter(
+        'month_to',
+        OpenApiTypes.STR,
+        description='Last month, YYYY-MM',
+    ),
+]
+
+
+@extend_schema_view(
+    months=extend_schema(
+        parameters=REPORT_PARAMETERS,
+        responses=serializers.MonthReportSerializer(many=True),
+    ),
+    vehicles=extend_schema(
+        parameters=REPORT_PARAMETERS,
+        responses=serializers.VehicleReportSerializer(many=True),
+    ),
+    customers=extend_schema(
+        parameters=REPORT_PARAMETERS,
+        responses=serializers.CustomerReportSerializer(many=True),
+    ),
+)
+class ReportViewSet(viewsets.GenericViewSet):
+    """View for the rental reports.
+
+    Reports read only the monthly summary tables, never the agreements.
+    """
+    queryset = VehicleMonthlySummary.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    filter_backends = [QueryParamsFilter]
+    filter_serializer_class = serializers.ReportFilterSerializer
+    pagination_class = None
+    # Summary model, column grouped by, serializer and ordering of each.
+    reports = {
+        'months': (
+            VehicleMonthlySummary,
+            'month',
+            serializers.MonthReportSerializer,
+            ['month'],
+        ),
+        'vehicles': (
+            VehicleMonthlySummary,
+            'vehicle',
+            serializers.VehicleReportSerializer,
+            ['-revenue', 'vehicle'],
+        ),
+        'customers': (
+            CustomerMonthlySummary,
+            'customer',
+            serializers.CustomerReportSerializer,
+            ['-revenue', 'customer'],
+        ),
+    }
+
+    def get_queryset(self):
+        """Retrieve the summaries of the report for authenticated user."""
+        model = self.reports[self.action][0]
+        return model.objects.filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        """Return the serializer class of the report."""
+        return self.reports[self.action][2]
+
+    def _report(self):
+        """Return the totals of the report's groups in the month range."""
+        _, group, _, ordering = self.reports[self.action]
+        rows = self.filter_queryset(self.get_queryset()).values(
+            group,
+        ).annotate(
+            rentals=Sum('rentals'),
+            rental_days=Sum('rental_days'),
+            revenue=Sum('revenue'),
+        ).order_by(*ordering)
+
+        return Response(self.get_serializer(rows, many=True).data)
+
+    @action(methods=['GET'], detail=False)
+    def months(self, request):
+        """List the rentals and estimated revenue of each month."""
+        return self._report()
+
+    @action(methods=['GET'], detail=False)
+    def vehicles(self, request):
+        """List the rentals and estimated revenue of each vehicle."""
+        return self._report()
+
+    @action(methods=['GET'], detail=False)
+    def customers(self, request):
+        """List the rentals and estimated revenue of each customer."""
+        return self._report()
+
+
+class ResponseCacheStatsView(APIView):
+    """Show the hit and miss counts of the response cache."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Return the response cache counters."""
+        return Response(get_stats())
@@ -0,0 +1,103 @@
+"""
+Authentication for the APIs.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import count_lookup
+from core.timing import timed
+
+
+class TokenCache:
+    """Bounded LRU of token key to (user, token) with a time to live.
+
+    The cache is per process. Writes made in this process evict entries
+    through signals; other processes drop stale entries after the TTL.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (user, token) for key or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        return copy.copy(user), copy.copy(token)
+
+    def set(self, key, user, token):
+        """Cache user and token for key, evicting the oldest entry."""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, copy.copy(user), copy.copy(token))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        """Remove key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        """Remove every cached token belonging to user_id."""
+        with self._lock:
+            stale = [
+                key for key, (_, user, _) in self._entries.items()
+                if user.pk == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the database on a cache hit."""
+
+    def authenticate(self, request):
+        """Authenticate request, timing it for the Server-Timing header."""
+        with timed('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        """Return (user, token) from the cache or the database."""
+        cached = token_cache.get(key)
+        count_lookup('token', cached is not None)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+
+        return user, token
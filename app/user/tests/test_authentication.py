@@ -0,0 +1,133 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+VEHICLES_URL = reverse('rent:vehicle-list')
+
+
+class TokenCacheTests(SimpleTestCase):
+    """Test the token cache container."""
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = TokenCache(maxsize=2, ttl=60)
+        user = get_user_model()(pk=1)
+        cache.set('a', user, None)
+        cache.set('b', user, None)
+        cache.get('a')
+        cache.set('c', user, None)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    @patch('user.authentication.time.monotonic')
+    def test_ttl_expiry(self, patched_monotonic):
+        """Test entries expire after the TTL."""
+        cache = TokenCache(maxsize=10, ttl=60)
+        patched_monotonic.return_value = 100
+        cache.set('a', get_user_model()(pk=1), None)
+
+        patched_monotonic.return_value = 159
+        self.assertIsNotNone(cache.get('a'))
+        patched_monotonic.return_value = 160
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_get_returns_copies(self):
+        """Test mutating a returned user does not change the cache."""
+        cache = TokenCache(maxsize=10, ttl=60)
+        cache.set('a', get_user_model()(pk=1, name='Original'), None)
+
+        user, _ = cache.get('a')
+        user.name = 'Changed'
+
+        self.assertEqual(cache.get('a')[0].name, 'Original')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating API requests through the token cache."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_cache_hit_skips_auth_query(self):
+        """Test a cached token needs no query to fetch the profile."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_cache_hit_on_rent_list(self):
+        """Test a cached token only leaves the version and list queries."""
+        self.client.get(VEHICLES_URL)
+        cache.clear()
+
+        with self.assertNumQueries(2):
+            res = self.client.get(VEHICLES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token evicts it from the cache."""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user evicts their tokens."""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_evicts(self):
+        """Test changing the password evicts the user's tokens."""
+        self.client.get(ME_URL)
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is not cached and is rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(token_cache), 0)
@@ -10,4 +10,14 @@ server {
         include                 /etc/nginx/uwsgi_params;
         client_max_body_size    10M;
     }
+
+    location = /metrics {
+        allow                   127.0.0.1;
+        allow                   10.0.0.0/8;
+        allow                   172.16.0.0/12;
+        allow                   192.168.0.0/16;
+        deny                    all;
+        uwsgi_pass              ${APP_HOST}:${APP_PORT};
+        include                 /etc/nginx/uwsgi_params;
+    }
 }
@@ -6,4 +6,17 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+# Server workers share their metrics through files in this directory,
+# which must start empty.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/vol/metrics}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"/*
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn app.asgi:application \
+        --bind :9000 \
+        --workers 4 \
+        --worker-class uvicorn.workers.UvicornWorker
+else
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi